@@ -0,0 +1,251 @@
+import argparse
+import gc
+import inspect
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+ELIFETOOLS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'elifetools')
+sys.path.insert(0, ELIFETOOLS_DIR)
+
+import parseJATS as parser
+import utils
+import utils_html
+import xmlio
+from json_rewrite import rewrite_json
+
+"""
+Time the public parseJATS functions, xml_to_html, xmlio.parse and output and
+rewrite_json over the articles in elifetools/sample-xml, and report the wall time,
+allocations and peak memory of each function for each file
+
+Run it from the repository folder with python -m benchmarks.bench_corpus, save the
+results with --output and check a later run against them with --compare, which
+lists the functions that got slower or use more memory and exits with status 1
+
+Allocations are the objects tracked by the garbage collector which the call made
+and had not freed by its end, the result and any garbage cycles. Peak memory is how
+far the resident memory rose above where it was when the call started, it is
+measured on Linux only
+"""
+
+SAMPLE_XML_DIR = os.path.join(ELIFETOOLS_DIR, 'sample-xml')
+
+# rewrite types with the parseJATS function giving the JSON they rewrite
+REWRITE_TYPES = [
+    ("authors_json", "authors_json"),
+    ("editors_json", "editors_json"),
+    ("references_json", "references_json"),
+    ("datasets_json", "datasets_json"),
+    ("body_json", "body_json"),
+    ("funding_awards", "funding_awards_json"),
+    ]
+
+# a value is a regression if it is this fraction above the baseline and by more
+# than the minimum difference, which keeps out the noise of very small values
+DEFAULT_THRESHOLD = 0.2
+MINIMUM_DIFFERENCES = {"time": 0.002, "allocations": 1000, "peak_memory": 1024 * 1024}
+
+def soup_functions():
+    "Names of the public parseJATS functions which need no more than the soup"
+    names = []
+    for name in parser.soup_function_names():
+        function = getattr(parser, name)
+        while hasattr(function, '__wrapped__'):
+            function = function.__wrapped__
+        argspec = inspect.getargspec(function)
+        if len(argspec.args) - len(argspec.defaults or ()) == 1:
+            names.append(name)
+    return names
+
+def soup_call(name):
+    return lambda filename, soup: lambda: getattr(parser, name)(soup)
+
+def xml_to_html_call(filename, soup):
+    "Convert the contents of each paragraph of the article"
+    paragraphs = [utils.node_contents_str(tag) for tag in utils.extract_nodes(soup, "p")]
+    return lambda: [utils_html.xml_to_html(True, paragraph) for paragraph in paragraphs]
+
+def xmlio_output_call(filename, soup):
+    root = xmlio.parse(filename)
+    return lambda: xmlio.output(root)
+
+def rewrite_json_call(rewrite_type, function_name):
+    def make_call(filename, soup):
+        json_content = getattr(parser, function_name)(soup)
+        return lambda: rewrite_json(rewrite_type, soup, json_content)
+    return make_call
+
+def benchmarks():
+    """
+    Names of the benchmarks with a function which makes the call to time from the
+    file name and the parsed article
+    """
+    calls = OrderedDict()
+    calls["parse_document"] = lambda filename, soup: lambda: parser.parse_document(filename)
+    for name in soup_functions():
+        calls[name] = soup_call(name)
+    calls["xml_to_html"] = xml_to_html_call
+    calls["xmlio.parse"] = lambda filename, soup: lambda: xmlio.parse(filename)
+    calls["xmlio.output"] = xmlio_output_call
+    for rewrite_type, function_name in REWRITE_TYPES:
+        calls["rewrite_json." + rewrite_type] = rewrite_json_call(rewrite_type, function_name)
+    return calls
+
+def sample_files():
+    return sorted(filename for filename in os.listdir(SAMPLE_XML_DIR) if filename.endswith('.xml'))
+
+def memory_status(field):
+    "Value in bytes of a memory field of /proc/self/status, None where there is none"
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except IOError:
+        pass
+    return None
+
+def reset_peak_memory():
+    "Start the peak resident memory of the process again from the current memory"
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except IOError:
+        return False
+
+def measure(call, repeat):
+    "Best wall time of repeat calls, then the allocations and peak memory of one more call"
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        call()
+        times.append(time.time() - start)
+    gc.collect()
+    gc.disable()
+    try:
+        peak_memory = None
+        start_memory = memory_status('VmRSS') if reset_peak_memory() else None
+        allocations = gc.get_count()[0]
+        result = call()
+        allocations = gc.get_count()[0] - allocations
+        if start_memory is not None:
+            peak_memory = max(memory_status('VmHWM') - start_memory, 0)
+        del result
+    finally:
+        gc.enable()
+    return OrderedDict([("time", min(times)), ("allocations", allocations),
+                        ("peak_memory", peak_memory)])
+
+def run(filenames, names=None, repeat=3, progress=None):
+    "Results of the benchmarks named, by default all of them, for each of the sample files"
+    calls = benchmarks()
+    for name in names or []:
+        if name not in calls:
+            raise ValueError("no benchmark %s" % name)
+    results = OrderedDict([("python", sys.version.split()[0]), ("repeat", repeat),
+                           ("files", OrderedDict())])
+    for filename in filenames:
+        path = os.path.join(SAMPLE_XML_DIR, filename)
+        soup = parser.parse_document(path)
+        file_results = results["files"][filename] = OrderedDict()
+        for name, make_call in calls.items():
+            if names and name not in names:
+                continue
+            if progress:
+                progress("%s %s\n" % (filename, name))
+            try:
+                file_results[name] = measure(make_call(path, soup), repeat)
+            except Exception as exception:
+                file_results[name] = {"error": "%s: %s" % (type(exception).__name__, exception)}
+    return results
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Regressions of the results against the baseline results, a list of the file,
+    the benchmark, the measure, its baseline value and its value
+    """
+    regressions = []
+    for filename, file_results in results["files"].items():
+        baseline_results = baseline["files"].get(filename, {})
+        for name, values in file_results.items():
+            baseline_values = baseline_results.get(name, {})
+            for field, minimum_difference in sorted(MINIMUM_DIFFERENCES.items()):
+                value, baseline_value = values.get(field), baseline_values.get(field)
+                if value is None or baseline_value is None:
+                    continue
+                if (value > baseline_value * (1 + threshold)
+                        and value - baseline_value > minimum_difference):
+                    regressions.append((filename, name, field, baseline_value, value))
+    return regressions
+
+def totals(results):
+    """
+    Total time and allocations of each benchmark over the files and its largest
+    peak memory, slowest first
+    """
+    function_totals = OrderedDict()
+    for file_results in results["files"].values():
+        for name, values in file_results.items():
+            total = function_totals.setdefault(name, {"time": 0, "allocations": 0,
+                                                      "peak_memory": None, "errors": 0})
+            if "error" in values:
+                total["errors"] += 1
+                continue
+            total["time"] += values["time"]
+            total["allocations"] += values["allocations"]
+            if values["peak_memory"] is not None:
+                total["peak_memory"] = max(total["peak_memory"], values["peak_memory"])
+    return sorted(function_totals.items(), key=lambda item: -item[1]["time"])
+
+def print_report(results):
+    print('%-40s%12s%14s%14s%8s' % ('function', 'time', 'allocations', 'peak memory', 'errors'))
+    for name, total in totals(results):
+        peak_memory = total["peak_memory"]
+        print('%-40s%11.4fs%14d%14s%8d' % (
+            name, total["time"], total["allocations"],
+            '-' if peak_memory is None else '%.1fMB' % (peak_memory / 1048576.0),
+            total["errors"]))
+
+def print_regressions(regressions):
+    for filename, name, field, baseline_value, value in regressions:
+        print('regression %s %s %s: %s -> %s' % (filename, name, field, baseline_value, value))
+
+def argument_parser():
+    parser = argparse.ArgumentParser(description="Benchmark elifetools over the sample XML")
+    parser.add_argument("files", nargs="*", help="sample XML file names, by default all of them")
+    parser.add_argument("-f", "--function", action="append", dest="functions",
+                        help="benchmark to run, by default all of them")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="number of timed calls, the best time is kept")
+    parser.add_argument("-o", "--output", help="JSON file to save the results in")
+    parser.add_argument("--compare", help="JSON file of baseline results to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction above the baseline a value is a regression at")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    return parser
+
+def main(argv=None):
+    args = argument_parser().parse_args(argv)
+    if args.list:
+        for name in benchmarks():
+            print(name)
+        return 0
+    results = run(args.files or sample_files(), args.functions, args.repeat, sys.stderr.write)
+    print_report(results)
+    if args.output:
+        with open(args.output, 'wb') as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.compare:
+        with open(args.compare, 'rb') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        print_regressions(regressions)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+ELIFETOOLS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'elifetools')
+sys.path.insert(0, ELIFETOOLS_DIR)
+sys.path.append(os.path.join(ELIFETOOLS_DIR, 'tests'))
+
+import parseJATS as parser
+from synthetic_article import article_xml
+
+"""
+Time the functions on synthetic articles of growing size, parsed with and without
+the tag index. With the index the time for each function should grow linearly with
+the scale, without it the asset ordinals and the contributors search the whole
+document for each asset or author
+
+Run it from the repository folder with python -m benchmarks.bench_scaling
+"""
+
+SCALES = [1, 3, 10]
+
+FUNCTIONS = ["refs", "components", "media", "body_json", "authors_json", "references_json",
+             "graphics", "supplementary_material", "decision_letter", "asset_manifest"]
+
+def best_time(function, soup, repeat=3):
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        function(soup)
+        times.append(time.time() - start)
+    return min(times)
+
+def main():
+    articles = [(scale, article_xml(scale)) for scale in SCALES]
+    for index in [True, False]:
+        soups = []
+        parse_times = []
+        for scale, xml in articles:
+            start = time.time()
+            soups.append(parser.parse_xml(xml, index=index))
+            parse_times.append(time.time() - start)
+        print('index %s' % index)
+        print('%-28s' % 'scale' + ''.join('%12d' % scale for scale in SCALES))
+        print('%-28s' % 'parse_xml' + ''.join('%11.4fs' % parse_time for parse_time in parse_times))
+        for name in FUNCTIONS:
+            function = getattr(parser, name)
+            print('%-28s' % name + ''.join('%11.4fs' % best_time(function, soup) for soup in soups))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'elifetools'))
+
+import utils_html
+
+"""
+Time converting citation dense paragraphs to HTML, the time for each function
+should grow linearly with the number of citations
+
+Run it from the repository folder with python -m benchmarks.bench_utils_html
+"""
+
+CITATION_COUNTS = [10, 100, 1000]
+
+FUNCTIONS = [
+    ('replace_xref_tags', lambda s: utils_html.replace_xref_tags(s)),
+    ('replace_ext_link_tags', lambda s: utils_html.replace_ext_link_tags(s)),
+    ('replace_named_content_tags', lambda s: utils_html.replace_named_content_tags(s)),
+    ('replace_html_tags', lambda s: utils_html.replace_html_tags(s)),
+    ('xml_to_html', lambda s: utils_html.xml_to_html(True, s)),
+    ]
+
+def citation_paragraph(count):
+    "A paragraph with count citations each to a different reference, a link and a named-content tag"
+    parts = [u'<p>']
+    for number in range(1, count + 1):
+        parts.append(
+            u'Finding <italic>%d</italic> (<xref ref-type="bibr" rid="bib%d">Author et al., %d</xref>'
+            u' <ext-link ext-link-type="uri" xlink:href="www.example.org/%d">link</ext-link>'
+            u' <named-content content-type="author-callout-style-a%d">x</named-content>). '
+            % (number, number, 2000 + number % 20, number, number % 3 + 1))
+    parts.append(u'</p>')
+    return u''.join(parts)
+
+def best_time(function, value, repeat=3):
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        function(value)
+        times.append(time.time() - start)
+    return min(times)
+
+def main():
+    paragraphs = [(count, citation_paragraph(count)) for count in CITATION_COUNTS]
+    print('%-28s' % 'citations' + ''.join('%12d' % count for count in CITATION_COUNTS))
+    for name, function in FUNCTIONS:
+        print('%-28s' % name + ''.join(
+            '%11.4fs' % best_time(function, paragraph) for count, paragraph in paragraphs))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'elifetools'))
+
+import xmlio
+
+"""
+Time renaming the xlink:href of the assets in a synthetic article bundle, the
+time should grow linearly with the number of assets
+
+Run it from the repository folder with python -m benchmarks.bench_xmlio
+"""
+
+ASSET_COUNTS = [50, 500, 5000]
+
+ASSET_TAGS = ['graphic', 'media', 'inline-graphic', 'self-uri', 'ext-link']
+
+def asset_bundle(count):
+    """
+    An article with count asset tags and the name map renaming their files, half
+    of the tags refer to a file name and half to the name without its extension
+    """
+    root = ElementTree.Element('article')
+    body = ElementTree.SubElement(root, 'body')
+    name_map = {}
+    for number in range(count):
+        name = 'elife-00666-asset%d.tif' % number
+        name_map[name] = 'elife-00666-asset%d-v1.tif' % number
+        paragraph = ElementTree.SubElement(body, 'p')
+        tag = ElementTree.SubElement(paragraph, ASSET_TAGS[number % len(ASSET_TAGS)])
+        tag.set(xmlio.XLINK_HREF, name if number % 2 else name.split('.')[0])
+    return root, name_map
+
+def best_time(count, repeat=3):
+    "Best time renaming the assets of a new bundle"
+    times = []
+    for i in range(repeat):
+        root, name_map = asset_bundle(count)
+        start = time.time()
+        xmlio.convert_xlink_href(root, name_map)
+        times.append(time.time() - start)
+    return min(times)
+
+def main():
+    print('%-28s' % 'assets' + ''.join('%12d' % count for count in ASSET_COUNTS))
+    print('%-28s' % 'convert_xlink_href' + ''.join(
+        '%11.4fs' % best_time(count) for count in ASSET_COUNTS))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+import parseJATS as parser
+from utils import memo_document
+
+"""
+article.py wraps a parsed article so the parseJATS functions can be read as
+attributes, for example Article.from_file(filename).doi
+
+Each value is computed on first use and kept in the document memo, and the
+parseJATS functions called along the way use the same memo, so building many
+fields for an article only computes each intermediate value once
+"""
+
+FIELD_NAMES = parser.soup_function_names()
+
+ARTICLE_JSON_FIELDS = ["authors_json", "editors_json", "references_json", "body_json",
+                       "appendices_json", "datasets_json", "supplementary_files_json",
+                       "funding_awards_json", "decision_letter", "author_response"]
+
+class Article(object):
+
+    def __init__(self, soup):
+        self.soup = memo_document(soup)
+
+    @classmethod
+    def from_xml(cls, xml, index=True, backend="bs4", front_only=False):
+        return cls(parser.parse_xml(xml, index, backend, front_only))
+
+    @classmethod
+    def from_file(cls, filelocation, index=True, backend="bs4", front_only=False, cache=None):
+        return cls(parser.parse_document(filelocation, index, backend, front_only, cache))
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in FIELD_NAMES:
+            raise AttributeError(name)
+        return getattr(parser, name)(self.soup)
+
+    def __dir__(self):
+        return sorted(set(dir(type(self)) + self.__dict__.keys() + FIELD_NAMES))
+
+
+# The parseJATS calls each field makes which other fields also make, as
+# (function_name, args, kwargs) stages. They are run first so their time is not
+# counted in the first field to use them, after that the same calls are memo hits
+FIELD_DEPENDENCIES = {
+    "authors_json": [("contributors", ("full",), ()),
+                     ("full_correspondence", (), ()),
+                     ("author_contributions", (None,), ()),
+                     ("competing_interests", (None,), ())],
+    "editors_json": [("contributors", ("full",), ())],
+    "references_json": [("refs", (), ())],
+    "funding_awards_json": [("full_award_groups", (), ())],
+    }
+
+def evaluation_order(fields):
+    "Stages for the fields with the stages each one depends on coming before it"
+    order = []
+    visited = set()
+    def visit(stage):
+        if stage in visited:
+            return
+        visited.add(stage)
+        for dependency in FIELD_DEPENDENCIES.get(stage[0], []):
+            visit(dependency)
+        order.append(stage)
+    for field in fields:
+        visit((field, (), ()))
+    return order
+
+def article_json(soup, fields=None):
+    """
+    Build the JSON fields of an article together, each function they share
+    is run once. Returns the content and the seconds taken by each stage,
+    where a stage is a function and its arguments and its time does not
+    include the stages it depends on
+    """
+    if fields is None:
+        fields = ARTICLE_JSON_FIELDS
+    added_memo = soup.__dict__.get('memo') is None
+    if added_memo:
+        memo_document(soup)
+    content = OrderedDict()
+    timings = OrderedDict()
+    try:
+        for function_name, args, kwargs in evaluation_order(fields):
+            start = time.time()
+            value = getattr(parser, function_name)(soup, *args, **dict(kwargs))
+            if args or kwargs:
+                stage_name = "%s%s" % (function_name, args + kwargs)
+            else:
+                stage_name = function_name
+            timings[stage_name] = time.time() - start
+            if not args and not kwargs and function_name in fields:
+                content[function_name] = value
+    finally:
+        if added_memo:
+            del soup.memo
+    return content, timings
@@ -0,0 +1,135 @@
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import OrderedDict
+from multiprocessing import Pool
+import parseJATS as parser
+from article import ARTICLE_JSON_FIELDS, FIELD_NAMES
+from utils import memo_document
+from parse_cache import document_cache, DEFAULT_MAX_SIZE
+
+"""
+cli.py is the elifetools command line, for example
+
+    elifetools extract sample-xml/ -f doi -f '["journal_issn", ["electronic"]]' --workers 4
+
+extract writes one JSON Lines record per article, with the values of the
+parseJATS functions in fields and the error of any function which failed in
+errors. The articles are parsed in a pool of worker processes
+"""
+
+def function_spec(value):
+    """
+    Function name and arguments from a function name or from a JSON list of the
+    function name and its arguments, like json_functions in generate_expected_json.py
+    """
+    if value.startswith("["):
+        spec = json.loads(value)
+        function_name, function_arguments = spec[0], tuple(spec[1]) if len(spec) > 1 else ()
+    else:
+        function_name, function_arguments = value, ()
+    if function_name not in FIELD_NAMES:
+        raise argparse.ArgumentTypeError("no parseJATS function %s" % function_name)
+    return str(function_name), function_arguments
+
+def xml_files(paths):
+    "XML files of the paths, a path can be a file, a directory of XML files or a glob"
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames += sorted(glob.glob(os.path.join(path, "*.xml")))
+        elif os.path.isfile(path):
+            filenames.append(path)
+        else:
+            filenames += sorted(glob.glob(path))
+    return filenames
+
+def error_str(exception):
+    return "%s: %s" % (exception.__class__.__name__, exception)
+
+def extract(filename, functions, backend="bs4", front_only=False, cache_dir=None,
+            cache_size=DEFAULT_MAX_SIZE):
+    "JSON Lines record of the function values for the article in the file"
+    record = OrderedDict([("file", filename), ("fields", OrderedDict()), ("errors", OrderedDict())])
+    try:
+        cache = document_cache(cache_dir, cache_size) if cache_dir else None
+        soup = memo_document(parser.parse_document(filename, True, backend, front_only, cache))
+    except Exception as exception:
+        record["errors"]["parse_document"] = error_str(exception)
+        return json.dumps(record)
+    for function_name, function_arguments in functions:
+        try:
+            value = getattr(parser, function_name)(soup, *function_arguments)
+            # check the value can be written before adding it to the record
+            json.dumps(value)
+            record["fields"][function_name] = value
+        except Exception as exception:
+            record["errors"][function_name] = error_str(exception)
+    return json.dumps(record)
+
+def extract_task(task):
+    return extract(*task)
+
+def extract_records(filenames, functions, workers=1, backend="bs4", front_only=False,
+                    cache_dir=None, cache_size=DEFAULT_MAX_SIZE):
+    "Records of the files in order, extracted by a pool of the number of workers"
+    tasks = [(filename, functions, backend, front_only, cache_dir, cache_size)
+             for filename in filenames]
+    if workers <= 1:
+        for task in tasks:
+            yield extract_task(task)
+        return
+    pool = Pool(workers)
+    try:
+        for record in pool.imap(extract_task, tasks, chunksize=1):
+            yield record
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+def extract_command(args, output):
+    functions = args.functions or [(function_name, ()) for function_name in ARTICLE_JSON_FIELDS]
+    for record in extract_records(xml_files(args.paths), functions, args.workers, args.backend,
+                                  args.front_only, args.cache_dir, args.cache_size):
+        output.write(record + "\n")
+        output.flush()
+
+def argument_parser():
+    arg_parser = argparse.ArgumentParser(prog="elifetools", description="Tools for using article data")
+    commands = arg_parser.add_subparsers(dest="command")
+    extract_parser = commands.add_parser(
+        "extract", help="write the values of parseJATS functions for articles as JSON Lines")
+    extract_parser.add_argument("paths", nargs="+",
+                                help="XML files, directories of XML files or glob patterns")
+    extract_parser.add_argument("-f", "--function", dest="functions", action="append", type=function_spec,
+                                help="a function name, or a JSON list of the name and a list of arguments, "
+                                "can be repeated, by default the article JSON fields")
+    extract_parser.add_argument("-w", "--workers", type=int, default=1,
+                                help="number of worker processes")
+    extract_parser.add_argument("-o", "--output", help="output file, by default standard output")
+    extract_parser.add_argument("--backend", choices=["bs4", "lxml", "compact"], default="bs4")
+    extract_parser.add_argument("--front-only", action="store_true",
+                                help="parse only the front of the articles, for article-meta values")
+    extract_parser.add_argument("--cache-dir",
+                                help="keep the parsed articles in this directory to skip parsing them again")
+    extract_parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_SIZE,
+                                help="maximum size of the cache directory in bytes")
+    return arg_parser
+
+def main(argv=None):
+    args = argument_parser().parse_args(argv)
+    output = open(args.output, "wb") if args.output else sys.stdout
+    try:
+        if args.command == "extract":
+            extract_command(args, output)
+    finally:
+        if args.output:
+            output.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import parse_cache
+
+"""
+metrics.py keeps counters and histograms of the work done in this process, for
+workers which parse articles for a long time, for example
+
+    import metrics
+    soup = parseJATS.parse_document(filelocation)
+    parseJATS.references_json(soup)
+    metrics.write_textfile("/var/lib/node_exporter/elifetools.prom")
+
+The counts only ever go up, from the start of the process or the last reset().
+snapshot() returns them as a dict and prometheus_text() in the Prometheus text
+format, which write_textfile() writes for the node_exporter textfile collector.
+
+They are the articles parsed with parse_document and the bytes and seconds it took
+for each backend, the time of each call of the TIMED_FUNCTIONS which was not a memo
+hit, the rewrites made by rewrite_json for each rewrite type, and the hits and misses
+of the document memos and of the parse caches made with parse_cache.document_cache
+"""
+
+# parseJATS functions with a histogram of their time
+TIMED_FUNCTIONS = ["body_json", "references_json", "authors_json"]
+
+# upper bounds in seconds of the histogram buckets
+BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+lock = threading.Lock()
+
+
+class Counter(object):
+    "Totals for each value of its label"
+
+    def __init__(self, name, help, label):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values = {}
+
+    def inc(self, label_value, amount=1):
+        with lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def reset(self):
+        with lock:
+            self.values.clear()
+
+    def snapshot(self):
+        with lock:
+            return OrderedDict(sorted(self.values.items()))
+
+    def samples(self):
+        return [(self.name, [(self.label, label_value)], value)
+                for label_value, value in self.snapshot().items()]
+
+
+class Histogram(object):
+    "Counts of the observed values in each bucket, with their count and sum, for each value of its label"
+
+    def __init__(self, name, help, label, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, label_value, value):
+        with lock:
+            counts = self.values.get(label_value)
+            if counts is None:
+                # a count for each bucket, then the count of all values and their sum
+                counts = self.values[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def reset(self):
+        with lock:
+            self.values.clear()
+
+    def snapshot(self):
+        with lock:
+            values = sorted((label_value, list(counts)) for label_value, counts in self.values.items())
+        return OrderedDict((label_value, OrderedDict([
+            ("buckets", OrderedDict(zip(self.buckets, counts))),
+            ("count", counts[-2]),
+            ("sum", counts[-1]),
+            ])) for label_value, counts in values)
+
+    def samples(self):
+        samples = []
+        for label_value, values in self.snapshot().items():
+            labels = [(self.label, label_value)]
+            for bound, count in values["buckets"].items():
+                samples.append((self.name + "_bucket", labels + [("le", format_value(bound))], count))
+            samples.append((self.name + "_bucket", labels + [("le", "+Inf")], values["count"]))
+            samples.append((self.name + "_count", labels, values["count"]))
+            samples.append((self.name + "_sum", labels, values["sum"]))
+        return samples
+
+
+ARTICLES_PARSED = Counter("elifetools_articles_parsed_total",
+                          "Articles parsed with parse_document", "backend")
+PARSE_BYTES = Counter("elifetools_parse_bytes_total",
+                      "Bytes of XML read by parse_document", "backend")
+PARSE_SECONDS = Counter("elifetools_parse_seconds_total",
+                        "Seconds spent in parse_document", "backend")
+FUNCTION_SECONDS = Histogram("elifetools_function_seconds",
+                             "Seconds of each call of the timed parseJATS functions", "function")
+REWRITES = Counter("elifetools_rewrites_total",
+                   "JSON rewritten by rewrite_json", "rewrite_type")
+MEMO_LOOKUPS = Counter("elifetools_memo_lookups_total",
+                       "Lookups of memoized values in the document memos", "result")
+
+METRICS = [ARTICLES_PARSED, PARSE_BYTES, PARSE_SECONDS, FUNCTION_SECONDS, REWRITES, MEMO_LOOKUPS]
+
+
+def parsed(backend, size, seconds):
+    "Count an article of size bytes parsed in seconds"
+    ARTICLES_PARSED.inc(backend)
+    PARSE_BYTES.inc(backend, size)
+    PARSE_SECONDS.inc(backend, seconds)
+
+def rewritten(rewrite_type):
+    REWRITES.inc(rewrite_type)
+
+def memo_lookup(hit):
+    MEMO_LOOKUPS.inc("hit" if hit else "miss")
+
+def timed(name, function):
+    "The function adding the time of each call to the histogram under the name"
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.time()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            FUNCTION_SECONDS.observe(name, time.time() - start)
+    wrapper.__wrapped__ = function
+    return wrapper
+
+def reset():
+    for metric in METRICS:
+        metric.reset()
+
+def hit_ratio(hits, misses):
+    return float(hits) / (hits + misses) if hits + misses else None
+
+def cache_counts():
+    "The hits and misses of each parse cache made with parse_cache.document_cache"
+    caches = OrderedDict()
+    for (directory, max_size), cache in sorted(parse_cache.DOCUMENT_CACHES.items()):
+        caches[directory] = OrderedDict([
+            ("hits", cache.hits),
+            ("misses", cache.misses),
+            ("hit_ratio", hit_ratio(cache.hits, cache.misses)),
+            ])
+    return caches
+
+def snapshot():
+    "The counts as a dict, with the bytes per second of parsing and the hit ratios"
+    values = OrderedDict((metric.name, metric.snapshot()) for metric in METRICS)
+    parse_bytes = values["elifetools_parse_bytes_total"]
+    parse_seconds = values["elifetools_parse_seconds_total"]
+    values["elifetools_parse_bytes_per_second"] = OrderedDict(
+        (backend, size / parse_seconds[backend] if parse_seconds.get(backend) else None)
+        for backend, size in parse_bytes.items())
+    memo = values["elifetools_memo_lookups_total"]
+    values["elifetools_memo_hit_ratio"] = hit_ratio(memo.get("hit", 0), memo.get("miss", 0))
+    values["elifetools_parse_caches"] = cache_counts()
+    return values
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+def escape_label(value):
+    return unicode(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_sample(name, labels, value):
+    if labels:
+        name += "{" + ",".join('%s="%s"' % (label, escape_label(label_value))
+                               for label, label_value in labels) + "}"
+    return name + " " + format_value(value)
+
+def prometheus_text():
+    "The counts in the Prometheus text exposition format"
+    lines = []
+    for metric in METRICS:
+        metric_type = "histogram" if isinstance(metric, Histogram) else "counter"
+        lines.append("# HELP %s %s" % (metric.name, metric.help))
+        lines.append("# TYPE %s %s" % (metric.name, metric_type))
+        for name, labels, value in metric.samples():
+            lines.append(format_sample(name, labels, value))
+    caches = cache_counts()
+    for field in ["hits", "misses"]:
+        name = "elifetools_parse_cache_%s_total" % field
+        lines.append("# HELP %s Documents %s in the parse caches" % (
+            name, "found" if field == "hits" else "not found"))
+        lines.append("# TYPE %s counter" % name)
+        for directory, counts in caches.items():
+            lines.append(format_sample(name, [("directory", directory)], counts[field]))
+    return u"\n".join(lines) + u"\n"
+
+def write_textfile(path):
+    "Write the counts to the file, replacing it at once so a collector never reads part of it"
+    folder = os.path.dirname(os.path.abspath(path))
+    handle, temporary_path = tempfile.mkstemp(dir=folder, prefix=".metrics-")
+    try:
+        with os.fdopen(handle, "w") as open_file:
+            open_file.write(prometheus_text().encode("utf8"))
+        # readable by a collector running as another user, as mkstemp makes it private
+        os.chmod(temporary_path, 0o644)
+        os.rename(temporary_path, path)
+    except:
+        os.remove(temporary_path)
+        raise
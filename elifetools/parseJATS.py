@@ -4,19 +4,103 @@ import htmlentitydefs
 import os
 import time
 import calendar
+import inspect
 from slugify import slugify
 from utils import *
-from utils_html import xml_to_html
+from utils_html import xml_to_html, nodes_html
 from json_rewrite import rewrite_json
 import rawJATS as raw_parser
+import utils_lxml
+import utils_compact
+import parse_cache
+import metrics
 import re
 from collections import OrderedDict
 
-def parse_xml(xml):
-    return BeautifulSoup(xml, ["lxml", "xml"])
-
-def parse_document(filelocation):
-    return parse_xml(open(filelocation))
+FRONT_CHUNK_SIZE = 16384
+ROOT_TAG_PATTERN = re.compile(r"<([^?!/\s>]+)")
+
+# Tags which can have a component DOI, see components
+COMPONENT_NODENAMES = ["abstract", "fig", "table-wrap", "media", "chem-struct-wrap", "sub-article",
+                       "supplementary-material", "boxed-text", "app"]
+# There are only some parent tags we care about for components
+COMPONENT_PARENT_NODENAMES = ["sub-article", "fig-group", "fig", "boxed-text", "table-wrap", "app",
+                              "media"]
+# Tags of the records of asset_manifest
+ASSET_NODENAMES = COMPONENT_NODENAMES + ["graphic", "inline-graphic", "self-uri"]
+
+def front_xml(xml):
+    """
+    The XML up to the end of the front tag with the root tag closed after it,
+    a file is only read as far as the end of the front tag.
+    XML without a front tag is returned whole
+    """
+    if hasattr(xml, 'read'):
+        content = xml.read(FRONT_CHUNK_SIZE)
+        end_tag = u"</front>" if isinstance(content, unicode) else "</front>"
+        position = content.find(end_tag)
+        while position < 0:
+            chunk = xml.read(FRONT_CHUNK_SIZE)
+            if not chunk:
+                return content
+            start = max(len(content) - len(end_tag) + 1, 0)
+            content += chunk
+            position = content.find(end_tag, start)
+    else:
+        content = xml
+        end_tag = u"</front>" if isinstance(content, unicode) else "</front>"
+        position = content.find(end_tag)
+        if position < 0:
+            return content
+    root_tag = ROOT_TAG_PATTERN.search(content)
+    if not root_tag:
+        return content
+    return content[:position + len(end_tag)] + "</%s>" % root_tag.group(1)
+
+def parse_xml(xml, index=False, backend="bs4", front_only=False):
+    """
+    Parse the XML into a soup. With index True the soup also carries a tag index
+    which extract_nodes will use instead of searching the tree.
+    With backend "lxml" the document is an lxml tree instead, see utils_lxml, and
+    with backend "compact" it is held in arrays, see utils_compact.
+    With front_only True only the root tag and the front tag are parsed,
+    enough for the article-meta values like doi, pub_date or subject_area
+    """
+    if front_only:
+        xml = front_xml(xml)
+    if backend == "lxml":
+        soup = utils_lxml.parse_xml(xml)
+    elif backend == "compact":
+        soup = utils_compact.parse_xml(xml)
+    else:
+        soup = BeautifulSoup(xml, ["lxml", "xml"])
+    if index:
+        index_document(soup)
+    return soup
+
+def parse_document(filelocation, index=False, backend="bs4", front_only=False, cache=None):
+    """
+    Parse the XML file, see parse_xml. With a parse_cache.DocumentCache as cache
+    a bs4 soup is built from the cache when the same XML was parsed before
+    """
+    start = time.time()
+    if cache is None or backend != "bs4":
+        with open(filelocation) as xml_file:
+            soup = parse_xml(xml_file, index, backend, front_only)
+            size = xml_file.tell()
+        metrics.parsed(backend, size, time.time() - start)
+        return soup
+    with open(filelocation) as xml_file:
+        xml = front_xml(xml_file) if front_only else xml_file.read()
+    key = parse_cache.cache_key(xml)
+    soup = cache.get(key)
+    if soup is None:
+        soup = parse_xml(xml)
+        cache.put(key, soup)
+    if index:
+        index_document(soup)
+    metrics.parsed(backend, len(xml), time.time() - start)
+    return soup
 
 def duplicate_tag(tag):
     # Make a completely new copy of a tag by parsing its contents again
@@ -521,26 +605,26 @@ def mixed_citations(soup):
     mc_tags = raw_parser.mixed_citations(soup)
     def name(nom):
         return {
-            'surname': nom.surname.text,
-            'given': nom.find('given-names').text,
+            'surname': first(extract_nodes(nom, "surname")).text,
+            'given': first(extract_nodes(nom, 'given-names')).text,
         }
     def preferred_name(nom):
         suffix = None
-        return author_preferred_name(nom.surname.text, nom.find('given-names').text, suffix)
+        return author_preferred_name(first(extract_nodes(nom, "surname")).text, first(extract_nodes(nom, 'given-names')).text, suffix)
     def do(mc):
         return {
             'journal': {
-                'name': mc.source.text,
-                'volume': mc.volume.text,
-                'fpage':  mc.fpage.text,
-                'lpage': node_text(mc.lpage),
+                'name': first(extract_nodes(mc, "source")).text,
+                'volume': first(extract_nodes(mc, "volume")).text,
+                'fpage':  first(extract_nodes(mc, "fpage")).text,
+                'lpage': node_text(first(extract_nodes(mc, "lpage"))),
             },
             'article': {
-                'title': mc.find('article-title').text,
-                'doi': mc.find('pub-id', attrs={'pub-id-type': 'doi'}).text,
+                'title': first(extract_nodes(mc, 'article-title')).text,
+                'doi': first(extract_nodes(mc, 'pub-id', 'pub-id-type', 'doi')).text,
                 'pub-date': map(int, ymd(soup)[::-1]),
-                'authors': map(name, mc.find('person-group', attrs={'person-group-type': 'author'}).contents),
-                'authorLine': format_author_line(map(preferred_name, mc.find('person-group', attrs={'person-group-type': 'author'}).contents)),
+                'authors': map(name, first(extract_nodes(mc, 'person-group', 'person-group-type', 'author')).contents),
+                'authorLine': format_author_line(map(preferred_name, first(extract_nodes(mc, 'person-group', 'person-group-type', 'author')).contents)),
             },
         }
     return map(do, mc_tags)
@@ -625,8 +709,15 @@ def tag_details_asset(tag):
 
 def tag_details(tag, nodenames):
     """
-    Used in media and graphics to extract data from their parent tags
+    Used in media and graphics to extract data from their parent tags.
+    The details are kept in the document details cache, see utils.document_details,
+    so the details of a parent tag are found once for all the assets in it
     """
+    details_cache = document_details(tag)
+    key = ('details', id(tag), tuple(nodenames))
+    if details_cache is not None and key in details_cache:
+        return dict(details_cache[key][1])
+
     details = {}
 
     details['type'] = tag.name
@@ -643,9 +734,86 @@ def tag_details(tag, nodenames):
     object_id_tag = first(raw_parser.object_id(tag, pub_id_type= "doi"))
     if object_id_tag:
         details['component_doi'] = extract_component_doi(tag, nodenames)
-    
-    return details
 
+    if details_cache is not None:
+        details_cache[key] = (tag, details)
+    return dict(details)
+
+def component_parent(tag, nodenames):
+    """
+    The first parent of the tag named in nodenames and the tag acting as that parent,
+    see component_acting_parent_tag, kept in the document details cache
+    """
+    details_cache = document_details(tag)
+    key = ('parent', id(tag), tuple(nodenames))
+    if details_cache is not None and key in details_cache:
+        return details_cache[key][1]
+    parent_tag = first_parent(tag, nodenames)
+    acting_parent_tag = None
+    if parent_tag:
+        acting_parent_tag = component_acting_parent_tag(parent_tag, tag)
+    if details_cache is not None:
+        details_cache[key] = (tag, (parent_tag, acting_parent_tag))
+    return parent_tag, acting_parent_tag
+
+
+def media_item(tag, position):
+    """
+    Data of a media tag with its component doi and the details of its parent tags,
+    see media
+    """
+    item = {}
+
+    copy_attribute(tag.attrs, 'mime-subtype', item)
+    copy_attribute(tag.attrs, 'mimetype', item)
+    copy_attribute(tag.attrs, 'xlink:href', item, 'xlink_href')
+    copy_attribute(tag.attrs, 'content-type', item)
+
+    nodenames = ["sub-article", "media", "fig-group", "fig", "supplementary-material"]
+
+    details = tag_details(tag, nodenames)
+    copy_attribute(details, 'component_doi', item)
+    copy_attribute(details, 'type', item)
+    copy_attribute(details, 'sibling_ordinal', item)
+
+    # Try to get the component DOI of the parent tag
+    parent_tag, acting_parent_tag = component_parent(tag, nodenames)
+    if parent_tag:
+        if acting_parent_tag:
+            details = tag_details(acting_parent_tag, nodenames)
+            copy_attribute(details, 'type', item, 'parent_type')
+            copy_attribute(details, 'ordinal', item, 'parent_ordinal')
+            copy_attribute(details, 'asset', item, 'parent_asset')
+            copy_attribute(details, 'sibling_ordinal', item, 'parent_sibling_ordinal')
+            copy_attribute(details, 'component_doi', item, 'parent_component_doi')
+
+        # Try to get the parent parent
+        p_parent_tag, acting_p_parent_tag = component_parent(parent_tag, nodenames)
+        if p_parent_tag:
+            if acting_p_parent_tag:
+                details = tag_details(acting_p_parent_tag, nodenames)
+                copy_attribute(details, 'type', item, 'p_parent_type')
+                copy_attribute(details, 'ordinal', item, 'p_parent_ordinal')
+                copy_attribute(details, 'asset', item, 'p_parent_asset')
+                copy_attribute(details, 'sibling_ordinal', item, 'p_parent_sibling_ordinal')
+                copy_attribute(details, 'component_doi', item, 'p_parent_component_doi')
+
+            # Try to get the parent parent parent
+            p_p_parent_tag, acting_p_p_parent_tag = component_parent(p_parent_tag, nodenames)
+            if p_p_parent_tag:
+                if acting_p_p_parent_tag:
+                    details = tag_details(acting_p_p_parent_tag, nodenames)
+                    copy_attribute(details, 'type', item, 'p_p_parent_type')
+                    copy_attribute(details, 'ordinal', item, 'p_p_parent_ordinal')
+                    copy_attribute(details, 'asset', item, 'p_p_parent_asset')
+                    copy_attribute(details, 'sibling_ordinal', item, 'p_p_parent_sibling_ordinal')
+                    copy_attribute(details, 'component_doi', item, 'p_p_parent_component_doi')
+
+    item['position'] = position
+    # Ordinal should be the same as position in this case but set it anyway
+    item['ordinal'] = tag_ordinal(tag)
+
+    return item
 
 def media(soup):
     """
@@ -659,68 +827,53 @@ def media(soup):
     position = 1
     
     for tag in media_tags:
-        media_item = {}
-        
-        copy_attribute(tag.attrs, 'mime-subtype', media_item)
-        copy_attribute(tag.attrs, 'mimetype', media_item)
-        copy_attribute(tag.attrs, 'xlink:href', media_item, 'xlink_href')
-        copy_attribute(tag.attrs, 'content-type', media_item)
-        
-        nodenames = ["sub-article", "media", "fig-group", "fig", "supplementary-material"]
-
-        details = tag_details(tag, nodenames)
-        copy_attribute(details, 'component_doi', media_item)
-        copy_attribute(details, 'type', media_item)
-        copy_attribute(details, 'sibling_ordinal', media_item)
-
-        # Try to get the component DOI of the parent tag
-        parent_tag = first_parent(tag, nodenames)
-        if parent_tag:
-            acting_parent_tag = component_acting_parent_tag(parent_tag, tag)
-            if acting_parent_tag:
-                details = tag_details(acting_parent_tag, nodenames)
-                copy_attribute(details, 'type', media_item, 'parent_type')
-                copy_attribute(details, 'ordinal', media_item, 'parent_ordinal')
-                copy_attribute(details, 'asset', media_item, 'parent_asset')
-                copy_attribute(details, 'sibling_ordinal', media_item, 'parent_sibling_ordinal')
-                copy_attribute(details, 'component_doi', media_item, 'parent_component_doi')
-        
-            # Try to get the parent parent
-            p_parent_tag = first_parent(parent_tag, nodenames)
-            if p_parent_tag:
-                acting_p_parent_tag = component_acting_parent_tag(p_parent_tag, parent_tag)
-                if acting_p_parent_tag:
-                    details = tag_details(acting_p_parent_tag, nodenames)
-                    copy_attribute(details, 'type', media_item, 'p_parent_type')
-                    copy_attribute(details, 'ordinal', media_item, 'p_parent_ordinal')
-                    copy_attribute(details, 'asset', media_item, 'p_parent_asset')
-                    copy_attribute(details, 'sibling_ordinal', media_item, 'p_parent_sibling_ordinal')
-                    copy_attribute(details, 'component_doi', media_item, 'p_parent_component_doi')
-                
-                # Try to get the parent parent parent
-                p_p_parent_tag = first_parent(p_parent_tag, nodenames)
-                if p_p_parent_tag:
-                    acting_p_p_parent_tag = component_acting_parent_tag(p_p_parent_tag, p_parent_tag)
-                    if acting_p_p_parent_tag:
-                        details = tag_details(acting_p_p_parent_tag, nodenames)
-                        copy_attribute(details, 'type', media_item, 'p_p_parent_type')
-                        copy_attribute(details, 'ordinal', media_item, 'p_p_parent_ordinal')
-                        copy_attribute(details, 'asset', media_item, 'p_p_parent_asset')
-                        copy_attribute(details, 'sibling_ordinal', media_item, 'p_p_parent_sibling_ordinal')
-                        copy_attribute(details, 'component_doi', media_item, 'p_p_parent_component_doi')
-
-        # Increment the position
-        media_item['position'] = position
-        # Ordinal should be the same as position in this case but set it anyway
-        media_item['ordinal'] = tag_ordinal(tag)
-        
-        media.append(media_item)
+        media.append(media_item(tag, position))
         
         position += 1
     
     return media
     
-    
+
+def graphic_item(tag, position):
+    """
+    Data of a graphic tag with the details of its parent tags, see graphics
+    """
+    item = {}
+
+    copy_attribute(tag.attrs, 'xlink:href', item, 'xlink_href')
+
+    # Get the tag type
+    nodenames = ["sub-article", "fig-group", "fig", "app"]
+    details = tag_details(tag, nodenames)
+    copy_attribute(details, 'type', item)
+
+    parent_tag, acting_parent_tag = component_parent(tag, nodenames)
+    if parent_tag:
+        details = tag_details(parent_tag, nodenames)
+        copy_attribute(details, 'type', item, 'parent_type')
+        copy_attribute(details, 'ordinal', item, 'parent_ordinal')
+        copy_attribute(details, 'asset', item, 'parent_asset')
+        copy_attribute(details, 'sibling_ordinal', item, 'parent_sibling_ordinal')
+        copy_attribute(details, 'component_doi', item, 'parent_component_doi')
+
+        # Try to get the parent parent - special for looking at fig tags
+        #  use component_acting_parent_tag
+        p_parent_tag, acting_p_parent_tag = component_parent(parent_tag, nodenames)
+        if p_parent_tag:
+            if acting_p_parent_tag:
+                details = tag_details(acting_p_parent_tag, nodenames)
+                copy_attribute(details, 'type', item, 'p_parent_type')
+                copy_attribute(details, 'ordinal', item, 'p_parent_ordinal')
+                copy_attribute(details, 'asset', item, 'p_parent_asset')
+                copy_attribute(details, 'sibling_ordinal', item, 'p_parent_sibling_ordinal')
+                copy_attribute(details, 'component_doi', item, 'p_parent_component_doi')
+
+    item['position'] = position
+    # Ordinal should be the same as position in this case but set it anyway
+    item['ordinal'] = tag_ordinal(tag)
+
+    return item
+
 def graphics(soup):
     """
     All graphic tags and some associated data about the related component doi
@@ -734,48 +887,29 @@ def graphics(soup):
     position = 1
     
     for tag in graphic_tags:
-        graphic_item = {}
-        
-        copy_attribute(tag.attrs, 'xlink:href', graphic_item, 'xlink_href')
-        
-        # Get the tag type
-        nodenames = ["sub-article", "fig-group", "fig", "app"]
-        details = tag_details(tag, nodenames)
-        copy_attribute(details, 'type', graphic_item)
-        
-        parent_tag = first_parent(tag, nodenames)
-        if parent_tag:
-            details = tag_details(parent_tag, nodenames)
-            copy_attribute(details, 'type', graphic_item, 'parent_type')
-            copy_attribute(details, 'ordinal', graphic_item, 'parent_ordinal')
-            copy_attribute(details, 'asset', graphic_item, 'parent_asset')
-            copy_attribute(details, 'sibling_ordinal', graphic_item, 'parent_sibling_ordinal')
-            copy_attribute(details, 'component_doi', graphic_item, 'parent_component_doi')
-
-            # Try to get the parent parent - special for looking at fig tags
-            #  use component_acting_parent_tag
-            p_parent_tag = first_parent(parent_tag, nodenames)
-            if p_parent_tag:
-                acting_p_parent_tag = component_acting_parent_tag(p_parent_tag, parent_tag)
-                if acting_p_parent_tag:
-                    details = tag_details(acting_p_parent_tag, nodenames)
-                    copy_attribute(details, 'type', graphic_item, 'p_parent_type')
-                    copy_attribute(details, 'ordinal', graphic_item, 'p_parent_ordinal')
-                    copy_attribute(details, 'asset', graphic_item, 'p_parent_asset')
-                    copy_attribute(details, 'sibling_ordinal', graphic_item, 'p_parent_sibling_ordinal')
-                    copy_attribute(details, 'component_doi', graphic_item, 'p_parent_component_doi')
-                            
-        # Increment the position
-        graphic_item['position'] = position
-        # Ordinal should be the same as position in this case but set it anyway
-        graphic_item['ordinal'] = tag_ordinal(tag)
-        
-        graphics.append(graphic_item)
+        graphics.append(graphic_item(tag, position))
         
         position += 1
     
     return graphics
 
+def inline_graphic_item(tag, position):
+    "Data of an inline-graphic tag, see inline_graphics"
+    item = {}
+
+    copy_attribute(tag.attrs, 'xlink:href', item, 'xlink_href')
+
+    # Get the tag type
+    nodenames = ["sub-article"]
+    details = tag_details(tag, nodenames)
+    copy_attribute(details, 'type', item)
+
+    item['position'] = position
+    # Ordinal should be the same as position in this case but set it anyway
+    item['ordinal'] = tag_ordinal(tag)
+
+    return item
+
 def inline_graphics(soup):
     """
     inline-graphic tags
@@ -787,23 +921,27 @@ def inline_graphics(soup):
     position = 1
     
     for tag in inline_graphic_tags:
-        item = {}
-        
-        copy_attribute(tag.attrs, 'xlink:href', item, 'xlink_href')
+        inline_graphics.append(inline_graphic_item(tag, position))
 
-        # Get the tag type
-        nodenames = ["sub-article"]
-        details = tag_details(tag, nodenames)
-        copy_attribute(details, 'type', item)
+    return inline_graphics
 
-        # Increment the position
-        item['position'] = position
-        # Ordinal should be the same as position in this case but set it anyway
-        item['ordinal'] = tag_ordinal(tag)
-        
-        inline_graphics.append(item)
+def self_uri_item(tag, position):
+    "Data of a self-uri tag, see self_uri"
+    item = {}
 
-    return inline_graphics
+    copy_attribute(tag.attrs, 'xlink:href', item, 'xlink_href')
+    copy_attribute(tag.attrs, 'content-type', item)
+
+    # Get the tag type
+    nodenames = ["sub-article"]
+    details = tag_details(tag, nodenames)
+    copy_attribute(details, 'type', item)
+
+    item['position'] = position
+    # Ordinal should be the same as position in this case but set it anyway
+    item['ordinal'] = tag_ordinal(tag)
+
+    return item
 
 def self_uri(soup):
     """
@@ -814,25 +952,34 @@ def self_uri(soup):
     self_uri_tags = raw_parser.self_uri(soup)
     position = 1
     for tag in self_uri_tags:
-        item = {}
-        
-        copy_attribute(tag.attrs, 'xlink:href', item, 'xlink_href')
-        copy_attribute(tag.attrs, 'content-type', item)
-        
-        # Get the tag type
-        nodenames = ["sub-article"]
-        details = tag_details(tag, nodenames)
-        copy_attribute(details, 'type', item)
-        
-        # Increment the position
-        item['position'] = position
-        # Ordinal should be the same as position in this case but set it anyway
-        item['ordinal'] = tag_ordinal(tag)
-        
-        self_uri.append(item)
+        self_uri.append(self_uri_item(tag, position))
         
     return self_uri
 
+def supplementary_material_item(tag, position):
+    "Data of a supplementary-material tag, see supplementary_material"
+    item = {}
+
+    copy_attribute(tag.attrs, 'id', item)
+
+    # Get the tag type
+    nodenames = ["supplementary-material"]
+    details = tag_details(tag, nodenames)
+    copy_attribute(details, 'type', item)
+    copy_attribute(details, 'asset', item)
+    copy_attribute(details, 'component_doi', item)
+    copy_attribute(details, 'sibling_ordinal', item)
+
+    if raw_parser.label(tag):
+        item['label'] = node_text(raw_parser.label(tag))
+        item['full_label'] = node_contents_str(raw_parser.label(tag))
+
+    item['position'] = position
+    # Ordinal should be the same as position in this case but set it anyway
+    item['ordinal'] = tag_ordinal(tag)
+
+    return item
+
 def supplementary_material(soup):
     """
     supplementary-material tags
@@ -844,31 +991,67 @@ def supplementary_material(soup):
     position = 1
     
     for tag in supplementary_material_tags:
-        item = {}
-        
-        copy_attribute(tag.attrs, 'id', item)
-
-        # Get the tag type
-        nodenames = ["supplementary-material"]
-        details = tag_details(tag, nodenames)
-        copy_attribute(details, 'type', item)
-        copy_attribute(details, 'asset', item)
-        copy_attribute(details, 'component_doi', item)
-        copy_attribute(details, 'sibling_ordinal', item)
-        
-        if raw_parser.label(tag):
-            item['label'] = node_text(raw_parser.label(tag))
-            item['full_label'] = node_contents_str(raw_parser.label(tag))
-
-        # Increment the position
-        item['position'] = position
-        # Ordinal should be the same as position in this case but set it anyway
-        item['ordinal'] = tag_ordinal(tag)
-        
-        supplementary_material.append(item)
+        supplementary_material.append(supplementary_material_item(tag, position))
 
     return supplementary_material
 
+def asset_record(asset_type, item):
+    item['asset_type'] = asset_type
+    return item
+
+def asset_manifest(soup):
+    """
+    A record for each asset of the document in document order, found in one pass.
+    The asset_type of a record is graphics, inline_graphics, media, self_uri,
+    supplementary_material or components, and the records of each type are the
+    items that function returns, the components with only the values from
+    component_asset, article_doi and position. A media or supplementary-material
+    tag with a component DOI has a record of both types.
+    The ordinals are found with a tag index, see utils.index_document, so the time
+    grows linearly with the document on each backend. If the document has no
+    index, one is added for the call and removed when it returns
+    """
+    added_index = document_index(soup) is None
+    if added_index:
+        index_document(soup)
+    try:
+        return asset_manifest_records(soup)
+    finally:
+        if added_index:
+            unindex_document(soup)
+
+def asset_manifest_records(soup):
+    manifest = []
+    article_doi = doi(soup)
+
+    # inline_graphics, self_uri and supplementary_material give all their items position 1
+    graphics_position = media_position = component_position = 1
+
+    for tag in extract_nodes(soup, ASSET_NODENAMES):
+        if tag.name == "graphic":
+            manifest.append(asset_record("graphics", graphic_item(tag, graphics_position)))
+            graphics_position += 1
+        elif tag.name == "inline-graphic":
+            manifest.append(asset_record("inline_graphics", inline_graphic_item(tag, 1)))
+        elif tag.name == "self-uri":
+            manifest.append(asset_record("self_uri", self_uri_item(tag, 1)))
+        elif tag.name == "media":
+            manifest.append(asset_record("media", media_item(tag, media_position)))
+            media_position += 1
+        elif tag.name == "supplementary-material":
+            manifest.append(asset_record("supplementary_material",
+                                         supplementary_material_item(tag, 1)))
+
+        if tag.name in COMPONENT_NODENAMES:
+            component = component_asset(tag)
+            if component is not None:
+                component['article_doi'] = article_doi
+                component['position'] = component_position
+                manifest.append(asset_record("components", component))
+                component_position += 1
+
+    return manifest
+
 
 def add_to_list_dictionary(list_dict, list_key, val):
     if val is not None:
@@ -976,9 +1159,7 @@ def format_contributor(contrib_tag, soup, detail="brief", contrib_type=None,
         collab_tag = first(raw_parser.collab(contrib_tag))
         if collab_tag:
             # Clean up if there are tags inside the collab tag
-            tag_copy = duplicate_tag(collab_tag)
-            tag_copy = remove_tag_from_tag(tag_copy, 'contrib-group')
-            contributor['collab'] = node_contents_str(tag_copy).rstrip()
+            contributor['collab'] = node_contents_str(collab_tag, exclude='contrib-group').rstrip()
 
     # Check if it is not a group author
     if not is_author_group_author(contrib_tag):
@@ -1380,6 +1561,65 @@ def extract_component_doi(tag, nodenames):
 
     return component_doi
 
+def component_asset(tag):
+    """
+    The component DOI, type, ordinals, asset, parent and mimetype values of a
+    component tag, see components, or None when it has no component DOI
+    """
+    component_doi = extract_component_doi(tag, COMPONENT_NODENAMES)
+    if component_doi is None:
+        return None
+
+    component = {}
+    component['doi'] = doi_uri_to_doi(component_doi)
+    component['doi_url'] = doi_to_doi_uri(component['doi'])
+
+    # Only check two levels of parentage
+    parent_tag, acting_parent_tag = component_parent(tag, COMPONENT_PARENT_NODENAMES)
+
+    if parent_tag:
+
+        # For fig-group we actually want the first fig of the fig-group as the parent
+        # Only counts if the acting parent tag has a DOI
+        if (acting_parent_tag and \
+           extract_component_doi(acting_parent_tag, COMPONENT_PARENT_NODENAMES) is not None):
+
+            component['parent_type'] = acting_parent_tag.name
+            component['parent_ordinal'] = tag_ordinal(acting_parent_tag)
+            component['parent_sibling_ordinal'] = tag_details_sibling_ordinal(acting_parent_tag)
+            component['parent_asset'] = tag_details_asset(acting_parent_tag)
+
+        # Look for parent parent, if available
+        parent_parent_tag, acting_parent_tag = component_parent(parent_tag,
+                                                                COMPONENT_PARENT_NODENAMES)
+
+        if parent_parent_tag:
+
+            if (acting_parent_tag and \
+               extract_component_doi(acting_parent_tag, COMPONENT_PARENT_NODENAMES) is not None):
+                component['parent_parent_type'] = acting_parent_tag.name
+                component['parent_parent_ordinal'] = tag_ordinal(acting_parent_tag)
+                component['parent_parent_sibling_ordinal'] = tag_details_sibling_ordinal(acting_parent_tag)
+                component['parent_parent_asset'] = tag_details_asset(acting_parent_tag)
+
+    # mime type
+    media_tag = None
+    if(tag.name == "media"):
+        media_tag = tag
+    elif(tag.name == "supplementary-material"):
+        media_tag = first(raw_parser.media(tag))
+    if media_tag:
+        component['mimetype'] = media_tag.get("mimetype")
+        component['mime-subtype'] = media_tag.get("mime-subtype")
+
+    component['type'] = tag.name
+    # Ordinal is based on all tags of the same type even if they have no DOI
+    component['ordinal'] = tag_ordinal(tag)
+    component['sibling_ordinal'] = tag_details_sibling_ordinal(tag)
+    component['asset'] = tag_details_asset(tag)
+
+    return component
+
 def components(soup):
     """
     Find the components, i.e. those parts that would be assigned
@@ -1389,9 +1629,7 @@ def components(soup):
     """
     components = []
     
-    nodenames = ["abstract", "fig", "table-wrap", "media",
-                 "chem-struct-wrap", "sub-article", "supplementary-material",
-                 "boxed-text", "app"]
+    nodenames = COMPONENT_NODENAMES
     
     # Count node order overall
     position = 1
@@ -1408,19 +1646,13 @@ def components(soup):
     
     for tag in component_tags:
         
-        component = {}
-        
         # Component type is the tag's name
         ctype = tag.name
         
-        # First find the doi if present
-        component_doi = extract_component_doi(tag, nodenames)
-        if component_doi is None:
+        # First find the doi if present, with the values from the tag and its parents
+        component = component_asset(tag)
+        if component is None:
             continue
-        else:
-            component['doi'] = doi_uri_to_doi(component_doi)
-            component['doi_url'] = doi_to_doi_uri(component['doi'])
-            
         
         if(ctype == "sub-article"):
             title_tag = raw_parser.article_title(tag)
@@ -1452,14 +1684,13 @@ def components(soup):
         if raw_parser.caption(tag):
             first_paragraph = first(paragraphs(raw_parser.caption(tag)))
             if first_paragraph and not starts_with_doi(first_paragraph):
-                # Remove the supplementary tag from the paragraph if present
+                # Leave out the supplementary tag from the paragraph if present
                 #  fixes a problem with the new kitchen sink of caption within caption tag
-                paragraph_tag_copy = duplicate_tag(first_paragraph)
-                if raw_parser.supplementary_material(paragraph_tag_copy):
-                    paragraph_tag_copy = remove_tag_from_tag(paragraph_tag_copy, 'supplementary-material')
-                if node_text(paragraph_tag_copy).strip() != '':
-                    component['caption'] = node_text(paragraph_tag_copy)
-                    component['full_caption'] = node_contents_str(paragraph_tag_copy)
+                caption = node_text(first_paragraph, exclude='supplementary-material')
+                if caption.strip() != '':
+                    component['caption'] = caption
+                    component['full_caption'] = node_contents_str(
+                        first_paragraph, exclude='supplementary-material')
 
 
         if raw_parser.permissions(tag):
@@ -1492,39 +1723,6 @@ def components(soup):
             for contributor_tag in raw_parser.contributors(tag):
                 component['contributors'].append(format_contributor(contributor_tag, soup))
 
-        # There are only some parent tags we care about for components
-        #  and only check two levels of parentage
-        parent_nodenames = ["sub-article", "fig-group", "fig", "boxed-text", "table-wrap", "app", "media"]
-        parent_tag = first_parent(tag, parent_nodenames)
-        
-        if parent_tag:
-
-            # For fig-group we actually want the first fig of the fig-group as the parent
-            acting_parent_tag = component_acting_parent_tag(parent_tag, tag)
-            
-            # Only counts if the acting parent tag has a DOI
-            if (acting_parent_tag and \
-               extract_component_doi(acting_parent_tag, parent_nodenames) is not None):
-                
-                component['parent_type'] = acting_parent_tag.name
-                component['parent_ordinal'] = tag_ordinal(acting_parent_tag)
-                component['parent_sibling_ordinal'] = tag_details_sibling_ordinal(acting_parent_tag)
-                component['parent_asset'] = tag_details_asset(acting_parent_tag)
-
-            # Look for parent parent, if available
-            parent_parent_tag = first_parent(parent_tag, parent_nodenames)
-            
-            if parent_parent_tag:
-                
-                acting_parent_tag = component_acting_parent_tag(parent_parent_tag, parent_tag)
-                
-                if (acting_parent_tag and \
-                   extract_component_doi(acting_parent_tag, parent_nodenames) is not None):
-                    component['parent_parent_type'] = acting_parent_tag.name
-                    component['parent_parent_ordinal'] = tag_ordinal(acting_parent_tag)
-                    component['parent_parent_sibling_ordinal'] = tag_details_sibling_ordinal(acting_parent_tag)
-                    component['parent_parent_asset'] = tag_details_asset(acting_parent_tag)
-
         content = ""
         for p_tag in extract_nodes(tag, "p"):
             if content != "":
@@ -1535,31 +1733,14 @@ def components(soup):
         if(content != ""):
             component['content'] = content
     
-        # mime type
-        media_tag = None
-        if(ctype == "media"):
-            media_tag = tag
-        elif(ctype == "supplementary-material"):
-            media_tag = first(raw_parser.media(tag))
-        if media_tag:
-            component['mimetype'] = media_tag.get("mimetype")
-            component['mime-subtype'] = media_tag.get("mime-subtype")
-    
-        if(len(component) > 0):
-            component['article_doi'] = article_doi
-            component['type'] = ctype
-            component['position'] = position
-            
-            # Ordinal is based on all tags of the same type even if they have no DOI
-            component['ordinal'] = tag_ordinal(tag)
-            component['sibling_ordinal'] = tag_details_sibling_ordinal(tag)
-            component['asset'] = tag_details_asset(tag)
-            #component['ordinal'] = position_by_type[ctype]
-                        
-            components.append(component)
-            
-            position += 1
-            position_by_type[ctype] += 1
+        component['article_doi'] = article_doi
+        component['position'] = position
+        #component['ordinal'] = position_by_type[ctype]
+
+        components.append(component)
+
+        position += 1
+        position_by_type[ctype] += 1
 
     
     return components
@@ -1969,9 +2150,10 @@ def body_json(soup, base_url=None):
     body_content_rewritten = rewrite_json("body_json", soup, body_content)
     return body_content_rewritten
 
-def render_raw_body(tag, remove_key_info_box=False, base_url=None):
+def render_raw_body(tag, remove_key_info_box=False, base_url=None, exclude=None):
+    "Render the body blocks of the tag, leaving out the exclude tags, see body_blocks"
     body_content = []
-    body_tags = body_blocks(tag)
+    body_tags = body_blocks(tag, exclude)
     for tag in body_tags:
         if tag.name == "boxed-text":
             # Extract the text of the first child tag for comparison, if present
@@ -2075,33 +2257,31 @@ def body_block_paragraph_render(p_tag, html_flag=True, base_url=None):
     paragraphs may wrap some other body block content
     this is separated out so it can be called from more than one place
     """
-    # Configure the XML to HTML conversion preference for shorthand use below
-    convert = lambda xml_string: xml_to_html(html_flag, xml_string, base_url)
-
     block_content_list = []
 
     tag_content_content = []
     nodenames = body_block_nodenames()
 
-    paragraph_content = u''
+    paragraph_nodes = []
     for child_tag in p_tag:
 
         if child_tag.name is None or body_block_content(child_tag) == {}:
-            paragraph_content = paragraph_content + unicode(child_tag)
+            paragraph_nodes.append(child_tag)
+            continue
 
-        else:
-            # Add previous paragraph content first
-            if paragraph_content.strip() != '':
-                tag_content_content.append(body_block_paragraph_content(convert(paragraph_content)))
-                paragraph_content = u''
-
-        if child_tag.name is not None and body_block_content(child_tag) != {}:
-            for block_content in body_block_content_render(child_tag, base_url=base_url):
-                if block_content != {}:
-                    tag_content_content.append(block_content)
+        # Add previous paragraph content first
+        paragraph_content = paragraph_nodes_content(paragraph_nodes, html_flag, base_url)
+        if paragraph_content is not None:
+            tag_content_content.append(body_block_paragraph_content(paragraph_content))
+            paragraph_nodes = []
+
+        for block_content in body_block_content_render(child_tag, base_url=base_url):
+            if block_content != {}:
+                tag_content_content.append(block_content)
     # finish up
-    if paragraph_content.strip() != '':
-        tag_content_content.append(body_block_paragraph_content(convert(paragraph_content)))
+    paragraph_content = paragraph_nodes_content(paragraph_nodes, html_flag, base_url)
+    if paragraph_content is not None:
+        tag_content_content.append(body_block_paragraph_content(paragraph_content))
 
     if len(tag_content_content) > 0:
         for block_content in tag_content_content:
@@ -2109,6 +2289,14 @@ def body_block_paragraph_render(p_tag, html_flag=True, base_url=None):
 
     return block_content_list
 
+def paragraph_nodes_content(nodes, html_flag=True, base_url=None):
+    "paragraph content of the nodes, converted from the tree to HTML, None if it is only whitespace"
+    if all(node.name is None for node in nodes) and u''.join(map(unicode, nodes)).strip() == '':
+        return None
+    if html_flag is True:
+        return nodes_html(nodes, base_url)
+    return u''.join(map(unicode, nodes))
+
 def body_block_caption_render(caption_tags, base_url=None):
     """fig and media tag captions are similar so use this common function"""
     caption_content = []
@@ -2196,11 +2384,14 @@ def body_block_content(tag, html_flag=True, base_url=None):
 
         # Remove unwanted nested tags
         unwanted_tag_names = body_block_nodenames()
-        tag_copy = duplicate_tag(tag)
-        tag_copy = remove_tag_from_tag(tag_copy, unwanted_tag_names)
+        if html_flag is True:
+            # Written from the tree, which leaves out the unwanted tags
+            text = nodes_html(tag.children, base_url, unwanted_tag_names, clean=True)
+        else:
+            text = clean_whitespace(node_contents_str(tag, exclude=unwanted_tag_names))
 
-        if node_contents_str(tag_copy):
-            tag_content["text"] = convert(clean_whitespace(node_contents_str(tag_copy)))
+        if text is not None:
+            tag_content["text"] = text
 
     elif tag.name == "disp-quote":
         tag_content["type"] = "quote"
@@ -2454,11 +2645,22 @@ def body_block_content(tag, html_flag=True, base_url=None):
 
     return tag_content
 
-def body_blocks(soup):
+def is_excluded_tag(tag, exclude):
+    """
+    Whether the tag is one of the exclude tags, by identity for bs4 tags
+    which compare equal when only their contents are the same
+    """
+    for excluded_tag in exclude:
+        if tag is excluded_tag or (not isinstance(tag, Tag) and tag == excluded_tag):
+            return True
+    return False
+
+def body_blocks(soup, exclude=None):
     """
     Note: for some reason this works and few other attempted methods work
     Search for certain node types, find the first nodes siblings of the same type
-    Add the first sibling and the other siblings to a list and return them
+    Add the first sibling and the other siblings to a list and return them.
+    Tags in the exclude list are left out of the blocks as if they were removed
     """
     nodenames = body_block_nodenames()
 
@@ -2467,12 +2669,22 @@ def body_blocks(soup):
     if not soup:
         return body_block_tags
 
-    first_sibling_node = firstnn(soup.find_all())
+    if exclude:
+        first_sibling_node = None
+        for tag in soup.find_all():
+            if not is_excluded_tag(tag, exclude) and not any(
+                    is_excluded_tag(parent_tag, exclude) for parent_tag in tag.parents):
+                first_sibling_node = tag
+                break
+    else:
+        first_sibling_node = firstnn(soup.find_all())
 
     if first_sibling_node is None:
         return body_block_tags
 
     sibling_tags = first_sibling_node.find_next_siblings(nodenames)
+    if exclude:
+        sibling_tags = [tag for tag in sibling_tags if not is_excluded_tag(tag, exclude)]
 
     # Add the first component tag and the ResultSet tags together
     body_block_tags.append(first_sibling_node)
@@ -2502,6 +2714,7 @@ def decision_letter(soup):
         raw_body = None
 
     # description
+    boxed_text_description = None
     if raw_body:
         # Description will be the first boxed-text tag
         if raw_parser.boxed_text(raw_body):
@@ -2514,12 +2727,10 @@ def decision_letter(soup):
                     if tag_content != {}:
                         sub_article_content["description"].append(tag_content)
 
-            # Remove the tag before content is compiled
-            boxed_text_description.decompose()
-
-    # content
+    # content, leaving out the description tag
     if raw_body:
-        body_content = render_raw_body(raw_body)
+        exclude = [boxed_text_description] if boxed_text_description else None
+        body_content = render_raw_body(raw_body, exclude=exclude)
         body_content_rewritten = rewrite_json("body_json", soup, body_content)
         if len(body_content) > 0:
             sub_article_content["content"] = body_content
@@ -3373,18 +3584,19 @@ def references_json_unknown_details(ref_content, soup=None):
     if soup:
         # Attempt to find the XML element by id, and convert it to details
         if "id" in ref_content:
-            ref_tag = first(soup.select("ref#" + ref_content["id"]))
+            ref_tag = first(extract_nodes(soup, "ref", "id", ref_content["id"]))
             if ref_tag:
-                # Now remove tags that would be already part of the unknown reference by now
-                for remove_tag in ["person-group", "year", "article-title",
-                                   "elocation-id", "fpage", "lpage"]:
-                    ref_tag = remove_tag_from_tag(ref_tag, remove_tag)
+                # Leave out tags that would be already part of the unknown reference by now
+                exclude = ["person-group", "year", "article-title",
+                           "elocation-id", "fpage", "lpage"]
                 # Add the remaining tag content comma separated
                 for tag in first(raw_parser.element_citation(ref_tag)):
+                    if tag.name in exclude:
+                        continue
                     if node_text(tag) is not None:
                         if details != "":
                             details += ", "
-                        details += node_text(tag)
+                        details += node_text(tag, exclude)
     if details == "":
         return None
     else:
@@ -3716,3 +3928,32 @@ def funding_awards_json(soup):
     awards = rewrite_json("funding_awards", soup, awards)
 
     return awards
+
+
+def soup_function_names():
+    "Names of the public functions in this module taking the article soup as first argument"
+    names = []
+    for name, function in globals().items():
+        if (name.startswith('_') or not inspect.isfunction(function)
+                or function.__module__ != __name__):
+            continue
+        while hasattr(function, '__wrapped__'):
+            function = function.__wrapped__
+        args = inspect.getargspec(function).args
+        if args and args[0] == 'soup':
+            names.append(name)
+    return sorted(names)
+
+# Time the calls of these functions which are not memo hits, see metrics
+for function_name in metrics.TIMED_FUNCTIONS:
+    globals()[function_name] = metrics.timed(function_name, globals()[function_name])
+
+# Calls to these functions, including calls between them, go through the document
+# memo when there is one, see utils.memo_document and article.Article
+for function_name in soup_function_names():
+    globals()[function_name] = memoize(globals()[function_name])
+
+# Count the calls and time of the functions, see profiling
+if os.environ.get("ELIFETOOLS_PROFILE"):
+    import profiling
+    profiling.enable()
@@ -0,0 +1,210 @@
+import os
+import sys
+import marshal
+import hashlib
+import tempfile
+import zlib
+from collections import OrderedDict
+import bs4
+from lxml import etree
+from bs4 import BeautifulSoup
+from bs4.element import (Tag, NavigableString, NamespacedAttribute, Comment, Doctype, CData,
+                         ProcessingInstruction, Declaration)
+try:
+    from elifetools import __version__
+except ImportError:
+    # imported from within the elifetools folder
+    from __init__ import __version__
+
+"""
+parse_cache.py keeps parsed documents in a directory on disk
+
+A soup is stored as a compressed list of its tags and strings, keyed by a hash
+of the XML with the library versions, and is built again from the list without
+parsing the XML. The least recently used documents are removed when the
+directory grows beyond its maximum size
+"""
+
+CACHE_FORMAT = 1
+CACHE_SUFFIX = ".soup"
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+# after evicting documents the cache is this fraction of its maximum size
+EVICT_TO = 0.9
+
+START, END, STRING = 0, 1, 2
+STRING_TYPES = [NavigableString, Comment, Doctype, CData, ProcessingInstruction, Declaration]
+
+
+def soup_nodes(soup):
+    "List of the start tags, end tags and strings of the soup in document order"
+    nodes = []
+    stack = [iter(soup.contents)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            if stack:
+                nodes.append((END,))
+        elif isinstance(child, Tag):
+            attrs = []
+            for name, value in child.attrs.items():
+                if isinstance(name, NamespacedAttribute):
+                    name = (name.prefix, name.name, name.namespace)
+                attrs.append((name, value))
+            nodes.append((START, child.name, child.namespace, child.prefix, attrs))
+            stack.append(iter(child.contents))
+        else:
+            nodes.append((STRING, unicode(child), STRING_TYPES.index(type(child))))
+    return nodes
+
+def nodes_soup(nodes):
+    "Build the soup of the nodes from soup_nodes, linking the elements as the parser does"
+    soup = BeautifulSoup("", ["lxml", "xml"])
+    builder = soup.builder
+    parents = [soup]
+    previous = None
+    for node in nodes:
+        if node[0] == START:
+            attrs = {}
+            for name, value in node[4]:
+                if type(name) is tuple:
+                    name = NamespacedAttribute(*name)
+                attrs[name] = value
+            tag = Tag(soup, builder, node[1], node[2], node[3], attrs, parents[-1], previous)
+            parents[-1].contents.append(tag)
+            parents.append(tag)
+            previous = tag
+        elif node[0] == END:
+            parents.pop()
+        else:
+            string = STRING_TYPES[node[2]](node[1])
+            string.setup(parents[-1], previous)
+            parents[-1].contents.append(string)
+            previous = string
+    soup._most_recent_element = previous
+    return soup
+
+def cache_key(xml):
+    "Hash of the XML and of the versions which affect the parsed document"
+    key = hashlib.sha1()
+    key.update("%s %s %s %s %s\n" % (CACHE_FORMAT, __version__, bs4.__version__,
+                                     etree.LXML_VERSION, sys.version_info[:2]))
+    key.update(xml.encode("utf8") if isinstance(xml, unicode) else xml)
+    return key.hexdigest()
+
+
+class DocumentCache(object):
+    "Parsed documents kept in a directory, up to max_size bytes"
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        # estimate of the size of the directory, other processes can write to it too
+        self.size = None
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        "The soup for the key, or None"
+        path = self.path(key)
+        try:
+            with open(path, "rb") as fp:
+                nodes = marshal.loads(zlib.decompress(fp.read()))
+            soup = nodes_soup(nodes)
+            # the modified time orders the documents for eviction
+            os.utime(path, None)
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        except (zlib.error, ValueError, EOFError, TypeError, IndexError):
+            # an unreadable file is removed and parsed again
+            self.remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return soup
+
+    def put(self, key, soup):
+        "Keep the soup for the key, removing the least recently used documents over max_size"
+        content = zlib.compress(marshal.dumps(soup_nodes(soup)), 1)
+        handle, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        with os.fdopen(handle, "wb") as fp:
+            fp.write(content)
+        os.rename(temp_path, self.path(key))
+        self.writes += 1
+        if self.size is None:
+            self.size = sum(size for path, size, mtime in self.entries())
+        else:
+            self.size += len(content)
+        if self.max_size is not None and self.size > self.max_size:
+            self.evict()
+
+    def entries(self):
+        "Path, size and modified time of the documents in the directory"
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+        return True
+
+    def evict(self):
+        "Remove the least recently used documents until the cache is below max_size"
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        self.size = sum(size for path, size, mtime in entries)
+        for path, size, mtime in entries:
+            if self.size <= self.max_size * EVICT_TO:
+                break
+            if self.remove(path):
+                self.evictions += 1
+            self.size -= size
+
+    def clear(self):
+        for path, size, mtime in self.entries():
+            self.remove(path)
+        self.size = 0
+
+    def stats(self):
+        "Counts of this process with the number of documents and size of the directory"
+        entries = self.entries()
+        return OrderedDict([
+            ("hits", self.hits),
+            ("misses", self.misses),
+            ("writes", self.writes),
+            ("evictions", self.evictions),
+            ("documents", len(entries)),
+            ("size", sum(size for path, size, mtime in entries)),
+            ("max_size", self.max_size),
+        ])
+
+
+DOCUMENT_CACHES = {}
+
+def document_cache(directory, max_size=DEFAULT_MAX_SIZE):
+    "The cache of the directory shared in this process"
+    key = (os.path.abspath(directory), max_size)
+    if key not in DOCUMENT_CACHES:
+        DOCUMENT_CACHES[key] = DocumentCache(directory, max_size)
+    return DOCUMENT_CACHES[key]
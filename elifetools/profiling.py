@@ -0,0 +1,211 @@
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+import parseJATS
+import rawJATS
+import utils_html
+import json_rewrite
+
+"""
+profiling.py counts the calls and the time of the public functions of parseJATS,
+rawJATS, utils_html and json_rewrite, for example
+
+    import profiling
+    profiling.enable()
+    parseJATS.references_json(soup)
+    print profiling.report()
+
+Setting ELIFETOOLS_PROFILE in the environment enables it when parseJATS is
+imported. enable() replaces the functions with ones which keep the counts, in their
+modules and in the modules which imported them by name, and disable() puts the
+functions back, so there is nothing to pay while it is off.
+
+For each function the counts are its calls, its inclusive time, the time in
+it and the functions it called, and its exclusive time, the time in it less the
+time in the profiled functions it called, and the BeautifulSoup find_all calls and
+BeautifulSoup documents made in it but not in the profiled functions it called.
+"""
+
+PROFILED_MODULES = [parseJATS, rawJATS, utils_html, json_rewrite]
+
+FIELDS = ["calls", "inclusive", "exclusive", "find_all", "soups"]
+
+# counts of each function name
+STATS = {}
+# counts for all the calls
+COUNTERS = {"find_all": 0, "BeautifulSoup": 0}
+# functions replaced while enabled, the module, name and original function
+ORIGINALS = []
+
+local = threading.local()
+# STATS and COUNTERS are updated from any thread
+lock = threading.Lock()
+
+
+class FunctionStats(object):
+    __slots__ = FIELDS
+
+    def __init__(self):
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.find_all = 0
+        self.soups = 0
+
+
+class Frame(object):
+    "A running profiled function, with the time and counts of the profiled functions it called"
+    __slots__ = ['name', 'child_time', 'find_all', 'soups']
+
+    def __init__(self, name):
+        self.name = name
+        self.child_time = 0.0
+        self.find_all = 0
+        self.soups = 0
+
+
+def call_stack():
+    stack = getattr(local, 'stack', None)
+    if stack is None:
+        stack = local.stack = []
+    return stack
+
+def profiled(name, function):
+    "The function counting its calls and time under the name"
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        stack = call_stack()
+        frame = Frame(name)
+        stack.append(frame)
+        start = time.time()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            stack.pop()
+            # time of a recursive call is already in the outer call
+            recursive = any(outer.name == name for outer in stack)
+            with lock:
+                stats = STATS.get(name)
+                if stats is None:
+                    stats = STATS[name] = FunctionStats()
+                stats.calls += 1
+                if not recursive:
+                    stats.inclusive += elapsed
+                stats.exclusive += elapsed - frame.child_time
+                stats.find_all += frame.find_all
+                stats.soups += frame.soups
+            if stack:
+                stack[-1].child_time += elapsed
+    wrapper.__wrapped__ = function
+    return wrapper
+
+def counted_find_all(find_all):
+    @wraps(find_all)
+    def wrapper(*args, **kwargs):
+        with lock:
+            COUNTERS["find_all"] += 1
+        stack = call_stack()
+        if stack:
+            stack[-1].find_all += 1
+        return find_all(*args, **kwargs)
+    return wrapper
+
+def counted_soup_init(init):
+    @wraps(init)
+    def wrapper(*args, **kwargs):
+        with lock:
+            COUNTERS["BeautifulSoup"] += 1
+        stack = call_stack()
+        if stack:
+            stack[-1].soups += 1
+        return init(*args, **kwargs)
+    return wrapper
+
+def public_functions(module):
+    "Names and functions defined in the module which do not start with an underscore"
+    return [(name, value) for name, value in sorted(vars(module).items())
+            if not name.startswith('_') and inspect.isfunction(value)
+            and value.__module__ == module.__name__]
+
+def elifetools_modules():
+    "The loaded modules of this package"
+    folder = os.path.dirname(os.path.abspath(__file__))
+    modules = []
+    for module in sys.modules.values():
+        module_file = getattr(module, '__file__', None)
+        if module_file and os.path.dirname(os.path.abspath(module_file)) == folder:
+            modules.append(module)
+    return modules
+
+def is_enabled():
+    return bool(ORIGINALS)
+
+def enable():
+    "Start counting, the counts go on from any earlier counts"
+    if is_enabled():
+        return
+    replacements = {}
+    for module in PROFILED_MODULES:
+        short_name = module.__name__.split('.')[-1]
+        for name, function in public_functions(module):
+            replacements[id(function)] = (function, profiled(short_name + '.' + name, function))
+    for module in elifetools_modules():
+        for name, value in vars(module).items():
+            replacement = replacements.get(id(value))
+            if replacement and replacement[0] is value:
+                ORIGINALS.append((module, name, value))
+                setattr(module, name, replacement[1])
+    ORIGINALS.append((Tag, 'find_all', Tag.__dict__['find_all']))
+    Tag.find_all = counted_find_all(Tag.__dict__['find_all'])
+    ORIGINALS.append((BeautifulSoup, '__init__', BeautifulSoup.__dict__['__init__']))
+    BeautifulSoup.__init__ = counted_soup_init(BeautifulSoup.__dict__['__init__'])
+
+def disable():
+    "Stop counting and put the functions back, the counts are kept"
+    while ORIGINALS:
+        owner, name, value = ORIGINALS.pop()
+        setattr(owner, name, value)
+
+def reset():
+    with lock:
+        STATS.clear()
+        for name in COUNTERS:
+            COUNTERS[name] = 0
+
+def stats(sort="exclusive"):
+    "The counts of each function, largest first by the sort field, and the counters"
+    with lock:
+        functions = [(name, OrderedDict((field, getattr(function_stats, field)) for field in FIELDS))
+                     for name, function_stats in STATS.items()]
+        counters = OrderedDict(sorted(COUNTERS.items()))
+    functions.sort(key=lambda item: (-item[1][sort], item[0]))
+    duplicate_tag = dict(functions).get("parseJATS.duplicate_tag")
+    counters["duplicate_tag"] = duplicate_tag["calls"] if duplicate_tag else 0
+    return OrderedDict([
+        ("functions", OrderedDict(functions)),
+        ("counters", counters),
+        ])
+
+def report(format="table", sort="exclusive", limit=None):
+    "The counts as a table or as JSON, limited to the first functions by the sort field"
+    profile = stats(sort)
+    if limit is not None:
+        profile["functions"] = OrderedDict(profile["functions"].items()[:limit])
+    if format == "json":
+        return json.dumps(profile, indent=2)
+    lines = ['%-48s%10s%12s%12s%10s%8s' % ('function', 'calls', 'inclusive', 'exclusive',
+                                            'find_all', 'soups')]
+    for name, values in profile["functions"].items():
+        lines.append('%-48s%10d%11.4fs%11.4fs%10d%8d' % (
+            name, values["calls"], values["inclusive"], values["exclusive"],
+            values["find_all"], values["soups"]))
+    lines.append(', '.join('%s %d' % item for item in profile["counters"].items()))
+    return '\n'.join(lines)
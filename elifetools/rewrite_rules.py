@@ -0,0 +1,95 @@
+import os
+import json
+import mmap
+import struct
+import zlib
+from collections import OrderedDict
+
+"""
+rewrite_rules.py reads the per-DOI JSON rewrite rules which ship with the package
+
+The rules are edited in the JSON source file and packed into the rules file
+with write_rules_file(). The rules file is an index of DOIs sorted for a
+binary search followed by the compressed JSON of each article's rules, it is
+memory mapped and only the entry for the DOI looked up is decoded
+"""
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rewrite-rules")
+SOURCE_FILE = os.path.join(RULES_DIR, "elife-rewrite-rules.json")
+RULES_FILE = os.path.join(RULES_DIR, "elife-rewrite-rules.bin")
+
+MAGIC = b"JRWR"
+# magic, rules version, number of DOIs
+HEADER = struct.Struct(">4sII")
+# DOI offset, DOI length, rules offset, rules length
+ENTRY = struct.Struct(">IHII")
+
+
+def read_source(filename=SOURCE_FILE):
+    "Rules version and the rules keyed by DOI from a JSON source file"
+    with open(filename, "rb") as fp:
+        source = json.loads(fp.read().decode("utf8"), object_pairs_hook=OrderedDict)
+    return source["version"], source["rules"]
+
+def pack_rules(version, rules):
+    "Contents of a rules file for the rules keyed by DOI"
+    keys = sorted(doi.encode("utf8") for doi in rules)
+    values = [zlib.compress(json.dumps(rules[key.decode("utf8")], separators=(',', ':')))
+              for key in keys]
+    offset = HEADER.size + ENTRY.size * len(keys)
+    entries = []
+    for key, value in zip(keys, values):
+        entries.append(ENTRY.pack(offset, len(key), offset + len(key), len(value)))
+        offset += len(key) + len(value)
+    parts = [HEADER.pack(MAGIC, version, len(keys))] + entries
+    for key, value in zip(keys, values):
+        parts.append(key)
+        parts.append(value)
+    return b"".join(parts)
+
+def write_rules_file(source_filename=SOURCE_FILE, filename=RULES_FILE):
+    "Pack the JSON source into the rules file, run after editing the source"
+    version, rules = read_source(source_filename)
+    with open(filename, "wb") as fp:
+        fp.write(pack_rules(version, rules))
+
+
+class RulesIndex(object):
+    "Rules read from a memory mapped rules file"
+
+    def __init__(self, filename=RULES_FILE):
+        with open(filename, "rb") as fp:
+            self.data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError("not a rules file: %s" % filename)
+
+    def entry(self, index):
+        return ENTRY.unpack_from(self.data, HEADER.size + ENTRY.size * index)
+
+    def get(self, doi):
+        "Rules for the DOI keyed by rewrite type, or None"
+        key = doi.encode("utf8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = self.entry(middle)
+            entry_key = self.data[key_offset:key_offset + key_length]
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle
+            else:
+                value = zlib.decompress(self.data[value_offset:value_offset + value_length])
+                return json.loads(value, object_pairs_hook=OrderedDict)
+        return None
+
+
+RULES_INDEX = None
+
+def rules_index():
+    "The rules index of the package rules file, opened on first use"
+    global RULES_INDEX
+    if RULES_INDEX is None:
+        RULES_INDEX = RulesIndex()
+    return RULES_INDEX
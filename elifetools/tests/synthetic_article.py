@@ -0,0 +1,356 @@
+# coding=utf-8
+
+"""
+Build the JATS XML of an eLife article of any size, for timing the parser on
+articles larger than the samples. The article is modeled on elife-kitchen-sink.xml
+and has the number of each part asked for: authors with their affiliations and
+contributions, body sections with figures, figure groups with their figure
+supplements, videos and tables with source data, supplementary files, references
+cited from the text and a decision letter and author response.
+
+Run it from the elifetools folder to write an article, for example
+
+    python tests/synthetic_article.py --scale 10 > /tmp/elife-large.xml
+"""
+
+DOI = u"10.7554/eLife.00013"
+
+DEFAULT_COUNTS = {
+    "contribs": 10,
+    "refs": 30,
+    "sections": 3,
+    "figs": 5,
+    "fig_groups": 3,
+    "fig_supplements": 2,
+    "media": 3,
+    "tables": 2,
+    "supplementary_material": 3,
+    "review_paragraphs": 4,
+}
+
+# counts which stay the same for articles of every scale
+UNSCALED_COUNTS = ["fig_supplements"]
+
+
+class ArticleWriter(object):
+    "Write the parts of the article, numbering the component DOIs in document order"
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.parts = []
+        self.doi_number = 0
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def component_doi(self):
+        self.doi_number += 1
+        return u"%s.%03d" % (DOI, self.doi_number)
+
+    def doi_paragraph(self, doi):
+        return (u'<p><bold>DOI:</bold> <ext-link ext-link-type="doi" xlink:href="%s">'
+                u'http://dx.doi.org/%s</ext-link></p>\n' % (doi, doi))
+
+    def citations(self, number):
+        "A sentence citing two of the references"
+        refs = self.counts["refs"]
+        if not refs:
+            return u''
+        first, second = number % refs + 1, (number * 7 + 3) % refs + 1
+        return (u' as reported before (<xref ref-type="bibr" rid="bib%d">Author%d et al., %d</xref>;'
+                u' <xref ref-type="bibr" rid="bib%d">Author%d and Other, %d</xref>).'
+                % (first, first, 2000 + first % 15, second, second, 2000 + second % 15))
+
+    def source_data(self, asset_id, label):
+        doi = self.component_doi()
+        return (u'<supplementary-material id="%s">\n'
+                u'<object-id pub-id-type="doi">%s</object-id>\n'
+                u'<label>%s</label>\n'
+                u'<caption><title>Source data for %s.</title>\n%s</caption>\n'
+                u'<media mime-subtype="xlsx" mimetype="application" xlink:href="elife00013-%s.xlsx"/>\n'
+                u'</supplementary-material>\n' % (asset_id, doi, label, asset_id,
+                                                  self.doi_paragraph(doi), asset_id))
+
+    def fig(self, fig_id, label, graphic, specific_use=None):
+        doi = self.component_doi()
+        attributes = u' specific-use="%s"' % specific_use if specific_use else u''
+        self.write(
+            u'<fig id="%s" position="float"%s>\n'
+            u'<object-id pub-id-type="doi">%s</object-id>\n'
+            u'<label>%s</label>\n'
+            u'<caption><title>The title of %s, with <italic>S. rosetta</italic>.</title>\n'
+            u'<p><bold>(A)</bold> Rosette colonies in <italic>S. rosetta</italic> cultures, '
+            u'scale bar 20 μm.</p>\n%s'
+            u'<p>%s</p>\n'
+            u'</caption>\n'
+            u'<graphic xlink:href="%s"/>\n'
+            u'</fig>\n' % (fig_id, attributes, doi, label, fig_id, self.doi_paragraph(doi),
+                           self.source_data(fig_id + u'-data1', label + u' source data 1.'),
+                           graphic))
+
+    def video(self, number):
+        doi = self.component_doi()
+        self.write(
+            u'<media content-type="glencoe play-in-place height-250 width-310" id="video%d" '
+            u'mime-subtype="mp4" mimetype="video" xlink:href="elife00013v%03d.mp4">\n'
+            u'<object-id pub-id-type="doi">%s</object-id>\n'
+            u'<label>Video %d.</label>\n'
+            u'<caption><title>The title of video %d.</title>\n'
+            u'<p>On-plant assay, plant %d, WT.</p>\n%s</caption>\n'
+            u'</media>\n' % (number, number, doi, number, number, number,
+                             self.doi_paragraph(doi)))
+
+    def table(self, number):
+        doi = self.component_doi()
+        self.write(
+            u'<table-wrap id="tbl%d" position="float">\n'
+            u'<object-id pub-id-type="doi">%s</object-id>\n'
+            u'<label>Table %d.</label>\n'
+            u'<caption><p>Species tested in experiment %d</p>\n%s</caption>\n'
+            u'<table frame="hsides" rules="groups">\n'
+            u'<thead><tr><th>Species</th><th>Accession</th><th>Reference</th></tr></thead>\n'
+            u'<tbody>\n' % (number, doi, number, number, self.doi_paragraph(doi)))
+        for row in range(1, 6):
+            self.write(u'<tr><td><italic>Species %d</italic></td><td>NZ_%08d</td><td>%s</td></tr>\n'
+                       % (row, number * 100 + row, self.citations(number * 10 + row)))
+        self.write(u'</tbody>\n</table>\n'
+                   u'<table-wrap-foot><fn id="tbl%dfn1"><p>Colonies counted after 48h.</p></fn>'
+                   u'</table-wrap-foot>\n' % number)
+        self.write(self.source_data(u'tbl%d-data1' % number, u'Table %d source data 1.' % number))
+        self.write(u'</table-wrap>\n')
+
+    def front(self):
+        counts = self.counts
+        self.write(
+            u'<?xml version="1.0" encoding="UTF-8"?>\n'
+            u'<!DOCTYPE article PUBLIC "-//NLM//DTD JATS (Z39.96) Journal Archiving and Interchange '
+            u'DTD v1.1d3 20150301//EN" "JATS-archivearticle1.dtd">\n'
+            u'<article xmlns:mml="http://www.w3.org/1998/Math/MathML" '
+            u'xmlns:xlink="http://www.w3.org/1999/xlink" article-type="research-article" '
+            u'dtd-version="1.1d3">\n'
+            u'<front>\n'
+            u'<journal-meta>\n'
+            u'<journal-id journal-id-type="nlm-ta">elife</journal-id>\n'
+            u'<journal-id journal-id-type="publisher-id">eLife</journal-id>\n'
+            u'<journal-title-group><journal-title>eLife</journal-title></journal-title-group>\n'
+            u'<issn publication-format="electronic">2050-084X</issn>\n'
+            u'<publisher><publisher-name>eLife Sciences Publications, Ltd</publisher-name></publisher>\n'
+            u'</journal-meta>\n'
+            u'<article-meta>\n'
+            u'<article-id pub-id-type="publisher-id">00013</article-id>\n'
+            u'<article-id pub-id-type="doi">%s</article-id>\n'
+            u'<article-categories>\n'
+            u'<subj-group subj-group-type="display-channel"><subject>Research article</subject></subj-group>\n'
+            u'<subj-group subj-group-type="heading"><subject>Cell biology</subject></subj-group>\n'
+            u'</article-categories>\n'
+            u'<title-group><article-title>Bacterial regulation of colony development in a '
+            u'synthetic article</article-title></title-group>\n'
+            u'<contrib-group>\n' % DOI)
+        affs = max(1, counts["contribs"] // 3)
+        for number in range(1, counts["contribs"] + 1):
+            self.write(
+                u'<contrib contrib-type="author" id="author-%d"%s>\n'
+                u'<name><surname>Surname%d</surname><given-names>Given %d</given-names></name>\n'
+                u'<contrib-id contrib-id-type="orcid">http://orcid.org/0000-0002-%04d-560X</contrib-id>\n'
+                u'<xref ref-type="aff" rid="aff%d">%d</xref>\n'
+                u'%s'
+                u'<xref ref-type="fn" rid="con%d"/>\n'
+                u'<xref ref-type="fn" rid="conf1"/>\n'
+                u'</contrib>\n' % (
+                    number, u' corresp="yes"' if number == 1 else u'', number, number, number,
+                    number % affs + 1, number % affs + 1,
+                    u'<xref ref-type="corresp" rid="cor1">*</xref>\n' if number == 1 else u'',
+                    number))
+        for number in range(1, affs + 1):
+            self.write(
+                u'<aff id="aff%d"><label>%d</label>'
+                u'<institution content-type="dept">Department %d</institution>, '
+                u'<institution>University %d</institution>, '
+                u'<addr-line><named-content content-type="city">City %d</named-content></addr-line>, '
+                u'<country>United States</country></aff>\n' % (number, number, number, number, number))
+        self.write(
+            u'</contrib-group>\n'
+            u'<contrib-group content-type="section">\n'
+            u'<contrib contrib-type="editor" id="author-9999">\n'
+            u'<name><surname>Editor</surname><given-names>Reviewing</given-names></name>\n'
+            u'<role>Reviewing editor</role>\n'
+            u'<aff><institution>Stanford University</institution>, <country>United States</country></aff>\n'
+            u'</contrib>\n'
+            u'</contrib-group>\n'
+            u'<author-notes><corresp id="cor1"><label>*</label>For correspondence: '
+            u'<email>author@example.org</email></corresp></author-notes>\n'
+            u'<pub-date publication-format="electronic" date-type="pub">'
+            u'<day>28</day><month>02</month><year>2014</year></pub-date>\n'
+            u'<pub-date pub-type="collection"><year>2014</year></pub-date>\n'
+            u'<volume>3</volume>\n'
+            u'<elocation-id>e00013</elocation-id>\n'
+            u'<history>\n'
+            u'<date date-type="received"><day>22</day><month>06</month><year>2012</year></date>\n'
+            u'<date date-type="accepted"><day>18</day><month>07</month><year>2012</year></date>\n'
+            u'</history>\n'
+            u'<permissions>\n'
+            u'<copyright-statement>\xa9 2012, Surname1 et al</copyright-statement>\n'
+            u'<copyright-year>2012</copyright-year>\n'
+            u'<copyright-holder>Surname1 et al</copyright-holder>\n'
+            u'<license xlink:href="http://creativecommons.org/licenses/by/4.0/"><license-p>This '
+            u'article is distributed under the terms of the <ext-link ext-link-type="uri" '
+            u'xlink:href="http://creativecommons.org/licenses/by/4.0/">Creative Commons Attribution '
+            u'License</ext-link>.</license-p></license>\n'
+            u'</permissions>\n'
+            u'<self-uri content-type="pdf" xlink:href="elife00013.pdf"/>\n')
+        doi = self.component_doi()
+        self.write(
+            u'<abstract>\n<object-id pub-id-type="doi">%s</object-id>\n'
+            u'<p>Bacterially-produced small molecules exert profound influences on animal health.</p>\n'
+            u'%s</abstract>\n' % (doi, self.doi_paragraph(doi)))
+        self.write(
+            u'<kwd-group kwd-group-type="author-keywords"><title>Author keywords</title>'
+            u'<kwd>choanoflagellate</kwd><kwd>multicellularity</kwd></kwd-group>\n'
+            u'<kwd-group kwd-group-type="research-organism"><title>Research organism</title>'
+            u'<kwd>Other</kwd></kwd-group>\n'
+            u'</article-meta>\n'
+            u'</front>\n')
+
+    def body(self):
+        counts = self.counts
+        sections = max(1, counts["sections"])
+        # the figures, videos and tables go round the sections in turn
+        assets = ([('fig', number) for number in range(1, counts["figs"] + 1)]
+                  + [('fig_group', number) for number in range(1, counts["fig_groups"] + 1)]
+                  + [('video', number) for number in range(1, counts["media"] + 1)]
+                  + [('table', number) for number in range(1, counts["tables"] + 1)])
+        self.write(u'<body>\n')
+        fig_number = 0
+        supplement_number = 0
+        for section in range(1, sections + 1):
+            self.write(u'<sec id="s%d">\n<title>Section %d</title>\n' % (section, section))
+            for paragraph in range(1, 4):
+                self.write(u'<p>Finding %d.%d in <italic>S. rosetta</italic>%s</p>\n'
+                           % (section, paragraph, self.citations(section * 3 + paragraph)))
+            for kind, number in assets[section - 1::sections]:
+                self.write(u'<p>The results are shown%s\n' % self.citations(number))
+                if kind == 'fig':
+                    fig_number += 1
+                    self.fig(u'fig%d' % fig_number, u'Figure %d.' % fig_number,
+                             u'elife00013f%03d' % fig_number)
+                elif kind == 'fig_group':
+                    fig_number += 1
+                    self.write(u'<fig-group>\n')
+                    self.fig(u'fig%d' % fig_number, u'Figure %d.' % fig_number,
+                             u'elife00013f%03d' % fig_number)
+                    for supplement in range(1, counts["fig_supplements"] + 1):
+                        supplement_number += 1
+                        self.fig(u'fig%ds%d' % (fig_number, supplement),
+                                 u'Figure %d—figure supplement %d.' % (fig_number, supplement),
+                                 u'elife00013fs%03d' % supplement_number, u'child-fig')
+                    self.write(u'</fig-group>\n')
+                elif kind == 'video':
+                    self.video(number)
+                else:
+                    self.table(number)
+                self.write(u'</p>\n')
+            self.write(u'</sec>\n')
+        self.write(u'</body>\n')
+
+    def back(self):
+        counts = self.counts
+        self.write(
+            u'<back>\n'
+            u'<ack id="ack"><title>Acknowledgements</title><p>We thank the reviewers.</p></ack>\n'
+            u'<sec sec-type="additional-information" id="s-info">\n'
+            u'<title>Additional information</title>\n'
+            u'<fn-group content-type="competing-interest"><title>Competing interests</title>\n'
+            u'<fn fn-type="conflict" id="conf1"><p>The authors declare that no competing '
+            u'interests exist.</p></fn>\n'
+            u'</fn-group>\n'
+            u'<fn-group content-type="author-contribution"><title>Author contributions</title>\n')
+        for number in range(1, counts["contribs"] + 1):
+            self.write(u'<fn fn-type="con" id="con%d"><p>GS%d, Conception and design, '
+                       u'Acquisition of data</p></fn>\n' % (number, number))
+        self.write(u'</fn-group>\n</sec>\n')
+        self.write(u'<sec sec-type="supplementary-material" id="s-supplementary">\n'
+                   u'<title>Additional files</title>\n')
+        for number in range(1, counts["supplementary_material"] + 1):
+            doi = self.component_doi()
+            self.write(
+                u'<supplementary-material id="SD%d-data">\n'
+                u'<object-id pub-id-type="doi">%s</object-id>\n'
+                u'<label>Supplementary file %d.</label>\n'
+                u'<caption><title>Supplementary file %d.</title>\n%s</caption>\n'
+                u'<media mime-subtype="docx" mimetype="application" '
+                u'xlink:href="elife00013s%03d.docx"/>\n'
+                u'</supplementary-material>\n' % (number, doi, number, number,
+                                                  self.doi_paragraph(doi), number))
+        self.write(u'</sec>\n<ref-list>\n<title>References</title>\n')
+        for number in range(1, counts["refs"] + 1):
+            self.write(
+                u'<ref id="bib%d">\n'
+                u'<element-citation publication-type="journal">\n'
+                u'<person-group person-group-type="author">'
+                u'<name><surname>Author%d</surname><given-names>A</given-names></name>'
+                u'<name><surname>Other</surname><given-names>B</given-names></name>'
+                u'<name><surname>Third</surname><given-names>CD</given-names></name>'
+                u'</person-group>\n'
+                u'<year iso-8601-date="%d">%d</year>\n'
+                u'<article-title>Finding number %d in <italic>S. rosetta</italic></article-title>\n'
+                u'<source>Journal of Examples</source>\n'
+                u'<volume>%d</volume><fpage>%d</fpage><lpage>%d</lpage>\n'
+                u'<pub-id pub-id-type="doi">10.1000/example.%d</pub-id>\n'
+                u'</element-citation>\n'
+                u'</ref>\n' % (number, number, 2000 + number % 15, 2000 + number % 15, number,
+                               number % 40 + 1, number * 10, number * 10 + 9, number))
+        self.write(u'</ref-list>\n</back>\n')
+
+    def sub_articles(self):
+        for sub_article_id, article_type, title in [(u'SA1', u'article-commentary', u'Decision letter'),
+                                                    (u'SA2', u'reply', u'Author response')]:
+            self.write(
+                u'<sub-article article-type="%s" id="%s">\n'
+                u'<front-stub>\n'
+                u'<article-id pub-id-type="doi">%s</article-id>\n'
+                u'<title-group><article-title>%s</article-title></title-group>\n'
+                u'</front-stub>\n'
+                u'<body>\n' % (article_type, sub_article_id, self.component_doi(), title))
+            for number in range(1, self.counts["review_paragraphs"] + 1):
+                self.write(u'<p>Comment %d on <xref ref-type="fig" rid="fig1">Figure 1</xref>%s</p>\n'
+                           % (number, self.citations(number)))
+            self.write(u'</body>\n</sub-article>\n')
+
+    def article(self):
+        self.front()
+        self.body()
+        self.back()
+        self.sub_articles()
+        self.write(u'</article>\n')
+        return u''.join(self.parts)
+
+
+def article_counts(scale=1, **counts):
+    "The default counts of each part multiplied by scale, with any counts given instead"
+    scaled = dict((name, count if name in UNSCALED_COUNTS else count * scale)
+                  for name, count in DEFAULT_COUNTS.items())
+    for name, count in counts.items():
+        if name not in DEFAULT_COUNTS:
+            raise TypeError("no part named %s" % name)
+        scaled[name] = count
+    return scaled
+
+def article_xml(scale=1, **counts):
+    """
+    XML of an article with the default number of each part multiplied by scale,
+    the number of any part can be given instead, for example refs=300
+    """
+    return ArticleWriter(article_counts(scale, **counts)).article()
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    argument_parser = argparse.ArgumentParser(description="Write a synthetic eLife article")
+    argument_parser.add_argument("--scale", type=int, default=1)
+    for name in sorted(DEFAULT_COUNTS):
+        argument_parser.add_argument("--" + name.replace("_", "-"), type=int, dest=name)
+    args = argument_parser.parse_args()
+    counts = dict((name, getattr(args, name)) for name in DEFAULT_COUNTS
+                  if getattr(args, name) is not None)
+    sys.stdout.write(article_xml(args.scale, **counts).encode('utf8'))
@@ -0,0 +1,109 @@
+# coding=utf-8
+
+import unittest
+import os
+import json
+from ddt import ddt, data, unpack
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parseJATS as parser
+import article
+from article import Article
+
+from file_utils import sample_xml
+
+
+@ddt
+class TestArticle(unittest.TestCase):
+
+    @unpack
+    @data(
+        ("elife-kitchen-sink.xml", ["doi", "journal_id", "title", "authors_json", "references_json",
+                                    "body_json", "decision_letter", "author_response",
+                                    "appendices_json", "funding_awards_json", "pub_date"]),
+        ("elife-00666.xml", ["doi", "abstract_json", "digest_json", "components", "media",
+                             "supplementary_material", "editors_json", "datasets_json"]),
+        ("elife00013.xml", ["doi", "authors", "contributors", "refs", "body_json"]),
+        )
+    def test_fields(self, filename, field_names):
+        article_object = Article.from_file(sample_xml(filename))
+        for field_name in field_names:
+            soup = parser.parse_document(sample_xml(filename))
+            self.assertEqual(json.dumps(getattr(article_object, field_name), sort_keys=True, default=unicode),
+                             json.dumps(getattr(parser, field_name)(soup), sort_keys=True, default=unicode),
+                             "%s %s" % (filename, field_name))
+
+    def test_fields_computed_once(self):
+        article_object = Article.from_file(sample_xml("elife-kitchen-sink.xml"))
+        original_doi = parser.doi.__wrapped__
+        calls = []
+        def counting_doi(soup):
+            calls.append(soup)
+            return original_doi(soup)
+        memo_doi = parser.memoize(counting_doi)
+        parser.doi, saved_doi = memo_doi, parser.doi
+        try:
+            article_object.authors_json
+            article_object.references_json
+            self.assertEqual(article_object.doi, u"10.7554/eLife.00013")
+        finally:
+            parser.doi = saved_doi
+        self.assertEqual(len(calls), 1)
+
+    def test_values_are_copies(self):
+        article_object = Article.from_file(sample_xml("elife-kitchen-sink.xml"))
+        keywords = article_object.keywords
+        keywords.append(u"not a keyword")
+        self.assertNotIn(u"not a keyword", article_object.keywords)
+
+    def test_field_names(self):
+        article_object = Article.from_xml("<article/>")
+        self.assertIn("doi", article.FIELD_NAMES)
+        self.assertIn("references_json", dir(article_object))
+        self.assertNotIn("parse_xml", article.FIELD_NAMES)
+        self.assertIsNone(article_object.doi)
+        self.assertRaises(AttributeError, getattr, article_object, "parse_xml")
+        self.assertRaises(AttributeError, getattr, article_object, "not_a_field")
+
+    @data("elife-kitchen-sink.xml", "elife-00666.xml", "elife00013.xml")
+    def test_article_json(self, filename):
+        content, timings = article.article_json(parser.parse_document(sample_xml(filename)))
+        self.assertEqual(content.keys(), article.ARTICLE_JSON_FIELDS)
+        for field_name in article.ARTICLE_JSON_FIELDS:
+            soup = parser.parse_document(sample_xml(filename))
+            self.assertEqual(json.dumps(content[field_name], sort_keys=True, default=unicode),
+                             json.dumps(getattr(parser, field_name)(soup), sort_keys=True,
+                                        default=unicode),
+                             "%s %s" % (filename, field_name))
+            self.assertIn(field_name, timings)
+        # shared stages are timed once, before the fields using them
+        stage_names = timings.keys()
+        self.assertEqual(stage_names.count("contributors('full',)"), 1)
+        self.assertLess(stage_names.index("contributors('full',)"), stage_names.index("authors_json"))
+        self.assertLess(stage_names.index("refs"), stage_names.index("references_json"))
+
+    def test_article_json_fields(self):
+        soup = parser.parse_document(sample_xml("elife-kitchen-sink.xml"))
+        content, timings = article.article_json(soup, ["doi", "references_json"])
+        self.assertEqual(content.keys(), ["doi", "references_json"])
+        self.assertEqual(content["doi"], u"10.7554/eLife.00013")
+        self.assertNotIn("body_json", timings)
+
+    def test_article_json_removes_memo(self):
+        soup = parser.parse_document(sample_xml("elife-kitchen-sink.xml"))
+        article.article_json(soup, ["doi"])
+        self.assertIsNone(soup.__dict__.get('memo'))
+
+    @unpack
+    @data(
+        ("references_json", ("refs", (), ())),
+        ("authors_json", ("contributors", ("full",), ())),
+        ("funding_awards_json", ("full_award_groups", (), ())),
+        )
+    def test_field_dependencies(self, function_name, expected_call):
+        self.assertIn(expected_call, article.FIELD_DEPENDENCIES[function_name])
+
+
+if __name__ == '__main__':
+    unittest.main()
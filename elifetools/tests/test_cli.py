@@ -0,0 +1,114 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from ddt import ddt, data, unpack
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parseJATS as parser
+import cli
+
+from file_utils import sample_xml
+
+
+@ddt
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.output = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.output)
+
+    def records(self):
+        with open(self.output, "rb") as fp:
+            return [json.loads(line) for line in fp]
+
+    @unpack
+    @data(
+        ("doi", ("doi", ())),
+        ('["journal_issn", ["electronic"]]', ("journal_issn", ("electronic",))),
+        ('["competing_interests", [["conflict", "COI-statement"]]]',
+         ("competing_interests", (["conflict", "COI-statement"],))),
+        )
+    def test_function_spec(self, value, expected):
+        self.assertEqual(cli.function_spec(value), expected)
+
+    @data(1, 2)
+    def test_extract(self, workers):
+        filenames = [sample_xml("elife00013.xml"), sample_xml("elife-00666.xml")]
+        cli.main(["extract"] + filenames + ["-f", "doi", "-f", '["journal_issn", ["electronic"]]',
+                  "-f", "references_json", "--workers", str(workers), "-o", self.output])
+        records = self.records()
+        self.assertEqual([record["file"] for record in records], filenames)
+        for record in records:
+            soup = parser.parse_document(record["file"])
+            self.assertEqual(record["fields"]["doi"], parser.doi(soup))
+            self.assertEqual(record["fields"]["journal_issn"], parser.journal_issn(soup, "electronic"))
+            self.assertEqual(record["errors"], {})
+
+    def test_extract_errors(self):
+        def failing_function(soup):
+            raise ValueError("no value")
+        references_json = parser.references_json
+        parser.references_json = failing_function
+        try:
+            cli.main(["extract", sample_xml("elife00013.xml"), "-f", "doi", "-f", "references_json",
+                      "-o", self.output])
+        finally:
+            parser.references_json = references_json
+        record = self.records()[0]
+        self.assertEqual(record["fields"].keys(), ["doi"])
+        self.assertEqual(record["errors"], {"references_json": "ValueError: no value"})
+
+    def test_extract_parse_errors(self):
+        handle, filename = tempfile.mkstemp(suffix=".xml")
+        try:
+            with os.fdopen(handle, "w") as fp:
+                fp.write("<article><front></article>")
+            # the compact backend does not recover from malformed XML
+            cli.main(["extract", filename, "-f", "doi", "--backend", "compact", "-o", self.output])
+        finally:
+            os.remove(filename)
+        record = self.records()[0]
+        self.assertEqual(record["fields"], {})
+        self.assertTrue(record["errors"]["parse_document"].startswith("ExpatError"))
+
+    def test_extract_front_only(self):
+        filename = sample_xml("elife-kitchen-sink.xml")
+        cli.main(["extract", filename, "-f", "doi", "-f", "subject_area", "-f", "body",
+                  "--front-only", "-o", self.output])
+        record = self.records()[0]
+        soup = parser.parse_document(filename)
+        self.assertEqual(record["fields"]["doi"], parser.doi(soup))
+        self.assertEqual(record["fields"]["subject_area"], parser.subject_area(soup))
+        self.assertEqual(record["fields"]["body"], [])
+
+    def test_extract_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        filename = sample_xml("elife00013.xml")
+        try:
+            for run in range(2):
+                cli.main(["extract", filename, "-f", "doi", "-f", "references_json",
+                          "--cache-dir", cache_dir, "-o", self.output])
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+        finally:
+            shutil.rmtree(cache_dir)
+        soup = parser.parse_document(filename)
+        record = self.records()[0]
+        self.assertEqual(record["fields"]["doi"], parser.doi(soup))
+        self.assertEqual(record["fields"]["references_json"], parser.references_json(soup))
+
+    def test_xml_files(self):
+        sample_dir = os.path.dirname(sample_xml("elife00013.xml"))
+        filenames = cli.xml_files([sample_dir])
+        self.assertTrue(sample_xml("elife00013.xml") in filenames)
+        self.assertEqual(cli.xml_files([os.path.join(sample_dir, "elife0001*.xml")]),
+                         [sample_xml("elife00013.xml")])
+
+
+if __name__ == '__main__':
+    unittest.main()
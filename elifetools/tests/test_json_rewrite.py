@@ -5,6 +5,8 @@ import os
 import time
 from ddt import ddt, data, unpack
 import copy
+import sys
+import threading
 
 os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -46,6 +48,61 @@ class TestJsonRewrite(unittest.TestCase):
     def test_rewrite_function_name(self, journal_id, rewrite_type, expected):
         self.assertEqual(json_rewrite.rewrite_function_name(journal_id, rewrite_type), expected)
 
+    @unpack
+    @data(
+        ('references_json', '10.7554/eLife.00051', 1),
+        ('references_json', '10.7554/eLife.12125', 1),
+        ('datasets_json', '10.7554/eLife.02304', 1),
+        ('authors_json', '10.7554/eLife.00133', 1),
+        ('editors_json', '10.7554/eLife.23804', 1),
+        ('body_json', '10.7554/eLife.00001', 0),
+        ('not_a_rewrite_type', '10.7554/eLife.00051', 0),
+        )
+    def test_doi_rewrites(self, rewrite_type, doi, expected):
+        self.assertEqual(len(json_rewrite.doi_rewrites(rewrite_type, doi)), expected)
+        self.assertTrue(json_rewrite.rewrite_registry() is json_rewrite.rewrite_registry())
+
+    def test_doi_rules_threads(self):
+        dois = ['10.7554/eLife.00051', '10.7554/eLife.02304', '10.7554/eLife.00001']
+        expected = dict((doi, json_rewrite.rewrite_rules.rules_index().get(doi) or {})
+                        for doi in dois)
+        wrong = []
+        def read_rules(doi):
+            for i in range(20000):
+                if json_rewrite.doi_rules(doi) != expected[doi]:
+                    wrong.append(doi)
+        check_interval = sys.getcheckinterval()
+        # switch threads as often as possible
+        sys.setcheckinterval(1)
+        try:
+            threads = [threading.Thread(target=read_rules, args=(doi,)) for doi in dois * 2]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setcheckinterval(check_interval)
+        self.assertEqual(wrong, [])
+
+    @unpack
+    @data(
+        ('references_json', [{'id': 'bib25'}], [{'id': 'bib25'}]),
+        ('authors_json', [{'competingInterests': 'The remaining authors declare'}],
+            [{'competingInterests': 'No competing interests declared.'}]),
+        ('editors_json', [{'role': 'Reviewing editor'}], [{'role': 'Reviewing Editor'}]),
+        )
+    def test_rewrite_json_no_doi_rewrites(self, rewrite_type, json_content, expected):
+        xml_content = '<root><journal-meta><journal-id journal-id-type="publisher-id">eLife</journal-id></journal-meta><article-meta><article-id pub-id-type="doi">10.7554/eLife.00001</article-id></article-meta></root>'
+        soup = parser.parse_xml(xml_content)
+        self.assertEqual(json_rewrite.rewrite_json(rewrite_type, soup, json_content), expected)
+
+    def test_rewrite_references_json_copies_value(self):
+        doi = '10.7554/eLife.00051'
+        json_content = json_rewrite.rewrite_elife_references_json([{'id': 'bib25'}], doi)
+        json_content[0]['date'] = '2000'
+        self.assertEqual(json_rewrite.rewrite_elife_references_json([{'id': 'bib25'}], doi),
+                         [{'id': 'bib25', 'date': '2012'}])
+
     @unpack
     @data(
         ({'used': [{'id': 'dataro17'}]}, '10.7554/eLife.00348'),
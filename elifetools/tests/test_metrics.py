@@ -0,0 +1,102 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parseJATS as parser
+import metrics
+import json_rewrite
+from parse_cache import document_cache, DOCUMENT_CACHES
+from utils import memo_document
+
+from file_utils import sample_xml
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        metrics.reset()
+        DOCUMENT_CACHES.clear()
+        shutil.rmtree(self.directory)
+
+    def test_parse(self):
+        filename = sample_xml("elife-kitchen-sink.xml")
+        parser.parse_document(filename)
+        parser.parse_document(filename, backend="compact")
+        values = metrics.snapshot()
+        self.assertEqual(values["elifetools_articles_parsed_total"], {"bs4": 1, "compact": 1})
+        self.assertEqual(values["elifetools_parse_bytes_total"]["bs4"], os.path.getsize(filename))
+        self.assertTrue(values["elifetools_parse_bytes_per_second"]["bs4"] > 0)
+
+    def test_cache(self):
+        filename = sample_xml("elife-kitchen-sink.xml")
+        cache = document_cache(self.directory)
+        parser.parse_document(filename, cache=cache)
+        parser.parse_document(filename, cache=cache)
+        values = metrics.snapshot()
+        self.assertEqual(values["elifetools_articles_parsed_total"], {"bs4": 2})
+        self.assertEqual(values["elifetools_parse_bytes_total"]["bs4"], 2 * os.path.getsize(filename))
+        caches = values["elifetools_parse_caches"]
+        self.assertEqual(caches[os.path.abspath(self.directory)]["hit_ratio"], 0.5)
+        self.assertTrue(('elifetools_parse_cache_hits_total{directory="%s"} 1'
+                         % os.path.abspath(self.directory)) in metrics.prometheus_text())
+
+    def test_functions(self):
+        soup = memo_document(parser.parse_document(sample_xml("elife-kitchen-sink.xml")))
+        parser.references_json(soup)
+        # a memo hit is not timed
+        parser.references_json(soup)
+        parser.body_json(soup)
+        values = metrics.snapshot()
+        histogram = values["elifetools_function_seconds"]
+        self.assertEqual(histogram.keys(), ["body_json", "references_json"])
+        self.assertEqual(histogram["references_json"]["count"], 1)
+        self.assertEqual(histogram["references_json"]["buckets"][10.0], 1)
+        self.assertEqual(values["elifetools_rewrites_total"], {"body_json": 1})
+        self.assertTrue(values["elifetools_memo_lookups_total"]["miss"] >= 2)
+        self.assertTrue(values["elifetools_memo_lookups_total"]["hit"] >= 1)
+
+    def test_general_rewrites(self):
+        soup = parser.parse_xml(
+            '<article><front><journal-meta><journal-id journal-id-type="publisher-id">eLife'
+            '</journal-id></journal-meta><article-meta><article-id pub-id-type="doi">'
+            '10.7554/eLife.00001</article-id></article-meta></front></article>')
+        # rewrites which change nothing are not counted
+        json_rewrite.rewrite_json("editors_json", soup, [{"name": "Editor"}])
+        json_rewrite.rewrite_json("authors_json", soup, [{"competingInterests": "None"}])
+        self.assertEqual(metrics.snapshot()["elifetools_rewrites_total"], {})
+        json_rewrite.rewrite_json("authors_json", soup, [
+            {"competingInterests": "The other authors declare that no competing interests exist."}])
+        self.assertEqual(metrics.snapshot()["elifetools_rewrites_total"], {"authors_json": 1})
+
+    def test_prometheus_text(self):
+        metrics.FUNCTION_SECONDS.observe("body_json", 0.003)
+        metrics.rewritten('references_json')
+        text = metrics.prometheus_text()
+        self.assertTrue("# TYPE elifetools_function_seconds histogram\n" in text)
+        self.assertTrue('elifetools_function_seconds_bucket{function="body_json",le="0.0025"} 0\n'
+                        in text)
+        self.assertTrue('elifetools_function_seconds_bucket{function="body_json",le="0.005"} 1\n'
+                        in text)
+        self.assertTrue('elifetools_function_seconds_bucket{function="body_json",le="+Inf"} 1\n'
+                        in text)
+        self.assertTrue('elifetools_function_seconds_count{function="body_json"} 1\n' in text)
+        self.assertTrue('elifetools_rewrites_total{rewrite_type="references_json"} 1\n' in text)
+
+    def test_write_textfile(self):
+        metrics.rewritten('references_json')
+        path = os.path.join(self.directory, "elifetools.prom")
+        metrics.write_textfile(path)
+        with open(path) as open_file:
+            self.assertEqual(open_file.read().decode("utf8"), metrics.prometheus_text())
+        self.assertEqual(os.listdir(self.directory), ["elifetools.prom"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import shutil
+import tempfile
+from ddt import ddt, data, unpack
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parseJATS as parser
+import parse_cache
+
+from file_utils import sample_xml
+
+
+@ddt
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def elements(self, soup):
+        "The elements of the soup in document order with their links as positions"
+        elements = [soup] + list(soup.descendants)
+        positions = dict((id(element), position) for position, element in enumerate(elements))
+        position = lambda element: positions.get(id(element))
+        return [(repr(element), getattr(element, "attrs", None), position(element.parent),
+                 position(element.next_element), position(element.previous_element),
+                 position(element.next_sibling), position(element.previous_sibling))
+                for element in elements]
+
+    @unpack
+    @data(
+        ("elife-kitchen-sink.xml", False),
+        ("elife-kitchen-sink.xml", True),
+        ("elife-02833-v2.xml", False),
+        ("simple-jats-doctype-1.1.xml", False),
+        )
+    def test_parse_document_cache(self, filename, front_only):
+        cache = parse_cache.DocumentCache(self.directory)
+        soup = parser.parse_document(sample_xml(filename), front_only=front_only)
+        parser.parse_document(sample_xml(filename), front_only=front_only, cache=cache)
+        cached_soup = parser.parse_document(sample_xml(filename), True, front_only=front_only,
+                                            cache=cache)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(self.elements(cached_soup), self.elements(soup))
+        self.assertEqual(unicode(cached_soup), unicode(soup))
+        self.assertEqual(parser.doi(cached_soup), parser.doi(soup))
+        self.assertEqual(parser.pub_date(cached_soup), parser.pub_date(soup))
+
+    def test_cache_key(self):
+        key = parse_cache.cache_key("<article/>")
+        self.assertEqual(key, parse_cache.cache_key(u"<article/>"))
+        self.assertNotEqual(key, parse_cache.cache_key("<article />"))
+
+    def test_unreadable_document(self):
+        cache = parse_cache.DocumentCache(self.directory)
+        key = parse_cache.cache_key("<article/>")
+        with open(cache.path(key), "wb") as fp:
+            fp.write("not a document")
+        self.assertEqual(cache.get(key), None)
+        self.assertFalse(os.path.exists(cache.path(key)))
+        self.assertEqual(cache.misses, 1)
+
+    def test_evict(self):
+        "the least recently used documents are removed"
+        soup = parser.parse_xml("<article><front><p>" + "text " * 1000 + "</p></front></article>")
+        cache = parse_cache.DocumentCache(self.directory, None)
+        cache.put("a", soup)
+        document_size = cache.stats()["size"]
+        cache = parse_cache.DocumentCache(self.directory, document_size * 3)
+        for key, mtime in zip(["a", "b", "c"], [100, 300, 200]):
+            cache.put(key, soup)
+            os.utime(cache.path(key), (mtime, mtime))
+        cache.put("d", soup)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["b.soup", "d.soup"])
+        stats = cache.stats()
+        self.assertEqual(stats["writes"], 4)
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual(stats["documents"], 2)
+        self.assertEqual(stats["size"], document_size * 2)
+
+    def test_document_cache(self):
+        cache = parse_cache.document_cache(self.directory)
+        self.assertTrue(parse_cache.document_cache(self.directory) is cache)
+        self.assertFalse(parse_cache.document_cache(self.directory, 1) is cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,7 +10,7 @@ os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))
 
 import parseJATS as parser
 import rawJATS as raw_parser
-from utils import date_struct, node_contents_str
+from utils import date_struct, node_contents_str, document_index
 from collections import OrderedDict
 
 from file_utils import sample_xml, json_expected_folder, json_expected_file
@@ -44,6 +44,43 @@ class TestParseJats(unittest.TestCase):
         soup = parser.parse_document(sample_xml(filename))
         self.assertTrue(isinstance(soup, BeautifulSoup))
 
+    @unpack
+    @data(
+        ('<?xml version="1.0"?><!DOCTYPE article><article a="b"><front><p/></front><body/></article>',
+         '<?xml version="1.0"?><!DOCTYPE article><article a="b"><front><p/></front></article>'),
+        (u'<article>\n<front/></article>', u'<article>\n<front/></article>'),
+        ('<article><body/></article>', '<article><body/></article>'),
+        )
+    def test_front_xml(self, xml, expected):
+        self.assertEqual(parser.front_xml(xml), expected)
+
+    def test_front_xml_file(self):
+        "the file is read in chunks only as far as the end of the front tag"
+        with open(sample_xml("elife-kitchen-sink.xml")) as xml_file:
+            xml = xml_file.read()
+        with open(sample_xml("elife-kitchen-sink.xml")) as xml_file:
+            front_xml = parser.front_xml(xml_file)
+            self.assertTrue(xml_file.tell() < len(xml))
+        self.assertEqual(front_xml, parser.front_xml(xml))
+        self.assertTrue(front_xml.endswith("</front></article>"))
+
+    @unpack
+    @data(
+        ("elife-kitchen-sink.xml", "bs4"),
+        ("elife-kitchen-sink.xml", "lxml"),
+        ("elife-02833-v2.xml", "bs4"),
+        ("elife_poa_e06828.xml", "bs4"),
+        ("elife00013.xml", "lxml"),
+        )
+    def test_parse_document_front_only(self, filename, backend):
+        soup = parser.parse_document(sample_xml(filename), backend=backend)
+        front_soup = parser.parse_document(sample_xml(filename), backend=backend, front_only=True)
+        self.assertEqual(raw_parser.article_body(front_soup), None)
+        for function_name in ["doi", "title", "pub_date", "subject_area", "keywords", "is_poa",
+                              "article_type", "license"]:
+            self.assertEqual(getattr(parser, function_name)(front_soup),
+                             getattr(parser, function_name)(soup), function_name)
+
     """
     Quick test cases during development checking syntax errors and coverage
     """
@@ -790,6 +827,25 @@ class TestParseJats(unittest.TestCase):
         self.assertEqual(expected, tag_content)
 
 
+    @data("elife-kitchen-sink.xml", "elife00013.xml", "elife00240.xml", "elife-00666.xml",
+          "elife04493.xml")
+    def test_asset_manifest(self, filename):
+        soup = self.soup(filename)
+        records = {}
+        for record in parser.asset_manifest(soup):
+            records.setdefault(record.pop("asset_type"), []).append(record)
+        for function_name in ["graphics", "inline_graphics", "media", "self_uri",
+                              "supplementary_material"]:
+            self.assertEqual(records.get(function_name, []),
+                             getattr(parser, function_name)(soup), function_name)
+        # components records have the asset values of the components
+        components = parser.components(soup)
+        self.assertEqual(len(records.get("components", [])), len(components))
+        for record, component in zip(records.get("components", []), components):
+            self.assertEqual(record, dict((key, component[key]) for key in record))
+        # the index made for the call is not left on the soup
+        self.assertEqual(document_index(soup), None)
+
     @data("elife-kitchen-sink.xml", "elife-02833-v2.xml", "elife00351.xml", "elife-00666.xml")
     def test_authors_json(self, filename):
         """note elife00351.xml has email inside an inline aff tag, very irregular"""
@@ -0,0 +1,98 @@
+import unittest
+import os
+import json
+import threading
+from collections import OrderedDict
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parseJATS as parser
+import rawJATS
+import utils_html
+import profiling
+from bs4.element import Tag
+
+from file_utils import sample_xml
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        # in case ELIFETOOLS_PROFILE enabled it
+        profiling.disable()
+        self.soup = parser.parse_document(sample_xml("elife-kitchen-sink.xml"))
+        profiling.reset()
+
+    def tearDown(self):
+        profiling.disable()
+        profiling.reset()
+
+    def test_disabled(self):
+        authors_json = parser.authors_json
+        find_all = Tag.find_all
+        profiling.enable()
+        self.assertTrue(profiling.is_enabled())
+        self.assertNotEqual(parser.authors_json, authors_json)
+        profiling.disable()
+        self.assertFalse(profiling.is_enabled())
+        self.assertTrue(parser.authors_json is authors_json)
+        self.assertEqual(Tag.find_all, find_all)
+        self.assertTrue(parser.xml_to_html is utils_html.xml_to_html)
+        parser.authors_json(self.soup)
+        self.assertEqual(profiling.stats()["functions"], {})
+
+    def test_counts(self):
+        expected = parser.authors_json(self.soup)
+        profiling.enable()
+        self.assertEqual(parser.authors_json(self.soup), expected)
+        functions = profiling.stats()["functions"]
+        self.assertEqual(functions["parseJATS.authors_json"]["calls"], 1)
+        self.assertEqual(functions["parseJATS.contributors"]["calls"], 2)
+        self.assertTrue(functions["rawJATS.article_contributors"]["find_all"] > 0)
+        # calls between modules imported by name are counted
+        self.assertTrue(functions["utils_html.xml_to_html"]["calls"] > 0)
+        for name, values in functions.items():
+            self.assertTrue(values["exclusive"] <= values["inclusive"] + 1e-6, name)
+        self.assertTrue(functions["parseJATS.authors_json"]["inclusive"]
+                        >= functions["parseJATS.contributors"]["inclusive"])
+        counters = profiling.stats()["counters"]
+        self.assertEqual(counters["find_all"],
+                         sum(values["find_all"] for values in functions.values()))
+
+    def test_threads(self):
+        profiling.enable()
+        threads = [threading.Thread(target=lambda: [parser.doi(self.soup) for i in range(200)])
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        profiling.disable()
+        self.assertEqual(profiling.stats()["functions"]["parseJATS.doi"]["calls"], 800)
+
+    def test_soups(self):
+        profiling.enable()
+        tag = rawJATS.article_title(self.soup)
+        parser.duplicate_tag(tag)
+        profiling.disable()
+        profile = profiling.stats()
+        self.assertEqual(profile["counters"]["duplicate_tag"], 1)
+        self.assertEqual(profile["counters"]["BeautifulSoup"], 1)
+        self.assertEqual(profile["functions"]["parseJATS.parse_xml"]["soups"], 1)
+
+    def test_report(self):
+        profiling.enable()
+        parser.doi(self.soup)
+        profiling.disable()
+        profile = json.loads(profiling.report(format="json", sort="calls"),
+                             object_pairs_hook=OrderedDict)
+        self.assertEqual(profile["functions"].keys()[0], "parseJATS.doi")
+        self.assertTrue("rawJATS.doi" in profile["functions"])
+        self.assertEqual(profile["functions"]["parseJATS.doi"]["calls"], 1)
+        table = profiling.report(sort="calls", limit=1).split("\n")
+        self.assertEqual(len(table), 3)
+        self.assertTrue(table[1].startswith("parseJATS.doi"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import os
+import tempfile
+from ddt import ddt, data, unpack
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_rewrite
+import rewrite_rules
+
+
+@ddt
+class TestRewriteRules(unittest.TestCase):
+
+    def test_rules_file(self):
+        "the rules file is packed from the current JSON source"
+        version, rules = rewrite_rules.read_source()
+        with open(rewrite_rules.RULES_FILE, 'rb') as fp:
+            self.assertEqual(fp.read(), rewrite_rules.pack_rules(version, rules))
+
+    def test_rules_version(self):
+        version, rules = rewrite_rules.read_source()
+        self.assertEqual(json_rewrite.rules_version(), version)
+
+    @unpack
+    @data(
+        ('10.7554/eLife.00051', ['references_json']),
+        (u'10.7554/eLife.02304', ['datasets_json']),
+        ('10.7554/eLife.13023', ['authors_json', 'editors_json']),
+        ('10.7554/eLife.00001', None),
+        ('10.7554/eLife.1', None),
+        ('', None),
+        )
+    def test_get(self, doi, expected):
+        rules = rewrite_rules.rules_index().get(doi)
+        if expected is None:
+            self.assertEqual(rules, None)
+        else:
+            self.assertEqual(sorted(rules.keys()), expected)
+
+    def test_pack_rules(self):
+        rules = {u'b': {'x': [1]}, u'a': {}, u'\xe9': {'y': u'\xe9'}}
+        handle, filename = tempfile.mkstemp(suffix=".rules.bin")
+        try:
+            with os.fdopen(handle, 'wb') as fp:
+                fp.write(rewrite_rules.pack_rules(7, rules))
+            index = rewrite_rules.RulesIndex(filename)
+            self.assertEqual(index.version, 7)
+            for doi, value in rules.items():
+                self.assertEqual(index.get(doi), value)
+            self.assertEqual(index.get(u'c'), None)
+        finally:
+            os.remove(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
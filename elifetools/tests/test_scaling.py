@@ -0,0 +1,70 @@
+import unittest
+import os
+import time
+from ddt import ddt, data
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parseJATS as parser
+
+from synthetic_article import article_xml
+
+
+"""
+Check the time of the functions grows about linearly with the size of the article,
+by timing them on synthetic articles with ten times as many of each part. A linear
+function takes about ten times as long on the larger article and a function which
+searches the document once for each part about a hundred times as long.
+
+The articles are parsed with the tag index, without it the contributors and the
+asset ordinals search the whole document for each author or asset
+"""
+
+SMALL_SCALE, LARGE_SCALE = 2, 20
+
+# largest ratio of the times allowed, linear is about 10
+MAXIMUM_RATIO = 25
+
+REPEAT = 3
+
+scaling_functions = ["refs", "components", "media", "body_json", "authors_json",
+                     "references_json", "graphics", "supplementary_material", "asset_manifest"]
+
+
+@ddt
+class TestScaling(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.small_soup = parser.parse_xml(article_xml(SMALL_SCALE), index=True)
+        cls.large_soup = parser.parse_xml(article_xml(LARGE_SCALE), index=True)
+
+    def best_time(self, function, soup):
+        times = []
+        for i in range(REPEAT):
+            start = time.time()
+            function(soup)
+            times.append(time.time() - start)
+        return min(times)
+
+    def test_article_size(self):
+        "the large article has ten times as many of each part"
+        for function_name, scaled in [("refs", True), ("authors_json", True), ("media", True),
+                                      ("supplementary_material", True), ("decision_letter", False)]:
+            small = len(getattr(parser, function_name)(self.small_soup))
+            large = len(getattr(parser, function_name)(self.large_soup))
+            self.assertEqual(large, small * (LARGE_SCALE / SMALL_SCALE) if scaled else small,
+                             function_name)
+
+    @data(*scaling_functions)
+    def test_linear_time(self, function_name):
+        function = getattr(parser, function_name)
+        small_time = self.best_time(function, self.small_soup)
+        large_time = self.best_time(function, self.large_soup)
+        self.assertTrue(large_time < small_time * MAXIMUM_RATIO,
+                        "%s took %.4fs and %.4fs at ten times the size" % (
+                            function_name, small_time, large_time))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@ os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))
 
 import utils
 import parseJATS as parser
+from file_utils import sample_xml
 
 
 
@@ -74,6 +75,25 @@ class TestUtils(unittest.TestCase):
         modified_tag = utils.remove_tag_from_tag(tag, unwanted_tag_names)
         self.assertEqual(unicode(modified_tag), expected_xml)
 
+    @unpack
+    @data(
+        ("<p><bold>A</bold> c</p>", "bold", u" c", u" c"),
+        ("<p>A <bold>c</bold> <italic>d <fig>e</fig></italic> &amp; <fig>f</fig></p>", ["bold", "fig"],
+            u"A  <italic>d </italic> & ", u"A  d  & "),
+        ("<p>A <italic><fig>e</fig></italic><!--note--></p>", "fig",
+            u"A <italic/>note", u"A "),
+        ("<p><fig>e</fig></p>", "fig", None, u""),
+        )
+    def test_node_contents_str_exclude(self, xml, exclude, expected_contents, expected_text):
+        for backend in ["bs4", "lxml"]:
+            tag = utils.first(utils.extract_nodes(parser.parse_xml(xml, backend=backend), "p"))
+            self.assertEqual(utils.node_contents_str(tag, exclude), expected_contents)
+            self.assertEqual(utils.node_text(tag, exclude), expected_text)
+        # the same as removing the tags, which changes the tag
+        tag = utils.remove_tag_from_tag(parser.parse_xml(xml).find_all()[0], exclude)
+        self.assertEqual(utils.node_contents_str(tag), expected_contents)
+        self.assertEqual(utils.node_text(tag), expected_text)
+
     @unpack
     @data(
         (None, None),
@@ -176,5 +196,73 @@ class TestUtils(unittest.TestCase):
     def test_rstrip_punctuation(self, value, expected):
         self.assertEqual(expected, utils.rstrip_punctuation(value))
 
+    @unpack
+    @data(
+        ("elife-kitchen-sink.xml", "fig", None, None),
+        ("elife-kitchen-sink.xml", ["media", "fig", "media"], None, None),
+        ("elife-kitchen-sink.xml", "xref", "ref-type", "bibr"),
+        ("elife-kitchen-sink.xml", ["xref", "ext-link"], "ref-type", "fig"),
+        ("elife-kitchen-sink.xml", "article-id", "pub-id-type", "doi"),
+        ("elife-kitchen-sink.xml", "graphic", "xlink:href", "elife00013f002"),
+        ("elife-kitchen-sink.xml", "not-a-tag", None, None),
+        ("elife00013.xml", "p", None, None),
+        )
+    def test_extract_nodes_index(self, filename, nodename, attr, value):
+        soup = parser.parse_document(sample_xml(filename))
+        indexed_soup = parser.parse_document(sample_xml(filename), index=True)
+        self.assertIsNone(utils.document_index(soup))
+        self.assertIsNotNone(utils.document_index(indexed_soup))
+        # Compare the whole document and each section of the document
+        self.assertEqual(
+            map(unicode, utils.extract_nodes(indexed_soup, nodename, attr, value)),
+            map(unicode, utils.extract_nodes(soup, nodename, attr, value)))
+        for sec_tag, indexed_sec_tag in zip(soup.find_all("sec"), indexed_soup.find_all("sec")):
+            self.assertEqual(
+                map(unicode, utils.extract_nodes(indexed_sec_tag, nodename, attr, value)),
+                map(unicode, utils.extract_nodes(sec_tag, nodename, attr, value)))
+
+    def test_extract_nodes_index_document_changed(self):
+        soup = parser.parse_xml("<article><p>A <bold>b</bold></p><p><bold>c</bold></p></article>",
+                                index=True)
+        self.assertEqual(len(utils.extract_nodes(soup, "bold")), 2)
+        utils.remove_tag_from_tag(utils.first(utils.extract_nodes(soup, "p")), "bold")
+        self.assertEqual(map(unicode, utils.extract_nodes(soup, "bold")), [u"<bold>c</bold>"])
+
+    @data("elife-kitchen-sink.xml", "elife-00666.xml", "elife00013.xml", "elife04493.xml",
+          "elife-02833-v2.xml")
+    def test_ordinals_index(self, filename):
+        soup = parser.parse_document(sample_xml(filename))
+        indexed_soup = parser.parse_document(sample_xml(filename), index=True)
+        for nodename in ["fig", "media", "supplementary-material", "table-wrap", "app",
+                         "sub-article"]:
+            tags = soup.find_all(nodename)
+            indexed_tags = indexed_soup.find_all(nodename)
+            for tag, indexed_tag in zip(tags, indexed_tags):
+                self.assertEqual(utils.tag_ordinal(indexed_tag), utils.tag_ordinal(tag))
+                self.assertEqual(utils.tag_fig_ordinal(indexed_tag), utils.tag_fig_ordinal(tag))
+                self.assertEqual(utils.tag_subarticle_sibling_ordinal(indexed_tag),
+                                 utils.tag_subarticle_sibling_ordinal(tag))
+                self.assertEqual(utils.tag_appendix_sibling_ordinal(indexed_tag),
+                                 utils.tag_appendix_sibling_ordinal(tag))
+                self.assertEqual(utils.tag_media_sibling_ordinal(indexed_tag),
+                                 utils.tag_media_sibling_ordinal(tag))
+                self.assertEqual(utils.tag_supplementary_material_sibling_ordinal(indexed_tag),
+                                 utils.tag_supplementary_material_sibling_ordinal(tag))
+
+    def test_document_details(self):
+        soup = parser.parse_document(sample_xml("elife-kitchen-sink.xml"))
+        media = parser.media(soup)
+        self.assertTrue(len(utils.document_details(soup)) > 0)
+        self.assertEqual(parser.media(soup), media)
+        fig_tag = utils.first(utils.extract_nodes(soup, "fig"))
+        details = parser.tag_details(fig_tag, ["fig"])
+        details["type"] = "changed"
+        self.assertEqual(parser.tag_details(fig_tag, ["fig"])["type"], "fig")
+        utils.document_changed(fig_tag)
+        self.assertEqual(utils.document_details(soup), {})
+        compact_soup = parser.parse_document(sample_xml("elife-kitchen-sink.xml"), backend="compact")
+        self.assertIsNone(utils.document_details(compact_soup))
+        self.assertEqual(parser.media(compact_soup), media)
+
 if __name__ == '__main__':
     unittest.main()
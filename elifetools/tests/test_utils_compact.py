@@ -0,0 +1,151 @@
+# coding=utf-8
+
+import unittest
+import os
+from ddt import ddt, data, unpack
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parseJATS as parser
+import utils
+import utils_compact
+
+from file_utils import sample_xml
+from test_utils_lxml import lxml_functions, xml_filenames
+
+
+"""
+Functions giving the same output when parsing with the compact backend
+"""
+compact_functions = lxml_functions + ["abstract_json", "acknowledgements",
+"acknowledgements_json", "appendices_json", "author_line", "author_notes",
+"author_response", "authors", "authors_json", "award_groups", "body", "body_json",
+"conflict", "contributors", "correspondence", "datasets_json", "decision_letter", "digest_json",
+"editors_json", "ethics_json", "full_author_notes", "full_award_groups",
+"full_custom_meta", "full_title_json", "funding_awards_json", "funding_statement_json",
+"impact_statement_json", "journal_issn", "keywords_json", "license_json", "mixed_citations",
+"other_foot_notes", "present_addresses", "references", "references_json", "refs",
+"research_organism_json", "supplementary_files_json", "title_prefix_json"]
+
+
+@ddt
+class TestUtilsCompact(unittest.TestCase):
+
+    @data(*xml_filenames)
+    def test_parse_document(self, filename):
+        soup = parser.parse_document(sample_xml(filename), backend="compact")
+        self.assertTrue(isinstance(soup, utils_compact.CompactDocument))
+        self.assertTrue(utils_compact.is_element(soup.root))
+        self.assertEqual(soup.root.name, "article")
+
+    @data(*xml_filenames)
+    def test_compact_functions(self, filename):
+        soup = parser.parse_document(sample_xml(filename))
+        compact_soup = parser.parse_document(sample_xml(filename), backend="compact")
+        for function_name in compact_functions:
+            self.assertEqual(getattr(parser, function_name)(soup),
+                             getattr(parser, function_name)(compact_soup),
+                             "%s %s" % (filename, function_name))
+
+    @unpack
+    @data(
+        ("elife-kitchen-sink.xml", ["article-title", "p", "fig", "table-wrap", "math", "ref"]),
+        ("elife-00666.xml", ["kwd", "aff", "media", "supplementary-material", "sub-article"]),
+        )
+    def test_node_contents_str(self, filename, nodenames):
+        soup = parser.parse_document(sample_xml(filename))
+        compact_soup = parser.parse_document(sample_xml(filename), backend="compact")
+        for nodename in nodenames:
+            tags = utils.extract_nodes(soup, nodename)
+            compact_tags = utils.extract_nodes(compact_soup, nodename)
+            self.assertEqual(len(tags), len(compact_tags))
+            for tag, compact_tag in zip(tags, compact_tags):
+                self.assertEqual(unicode(tag), unicode(compact_tag))
+                self.assertEqual(utils.node_contents_str(tag), utils.node_contents_str(compact_tag))
+                self.assertEqual(utils.node_text(tag), utils.node_text(compact_tag))
+
+    @unpack
+    @data(
+        (u'<p>A &amp; <italic>b &lt; c</italic><!--note--> <?pi data?>d<x></x></p>',
+         u'<p>A &amp; <italic>b &lt; c</italic><!--note--> d<x/></p>',
+         u'A & <italic>b &lt; c</italic>note d<x/>',
+         u'A & b < c d'),
+        (u'<p xmlns:xlink="http://www.w3.org/1999/xlink">\n    <ext-link xlink:href="a\'b&quot;"/>\n</p>',
+         u'<p xmlns:xlink="http://www.w3.org/1999/xlink">\n<ext-link xlink:href="a\'b&quot;"/>\n</p>',
+         u'\n<ext-link xlink:href="a\'b&quot;"/>\n',
+         u'\n\n'),
+        (u'<p>caf\xe9 <![CDATA[x < y]]> – z</p>',
+         u'<p>caf\xe9 x &lt; y – z</p>',
+         u'caf\xe9 x < y – z',
+         u'caf\xe9 x < y – z'),
+        (u'<p><b  c=\'2\'   a="1">x &gt; y</b ><x></x>\n   \n<?pi?><i><?pi?></i>\t<y  /></p>',
+         u'<p><b a="1" c="2">x &gt; y</b><x/>\n<i/> <y/></p>',
+         u'<b a="1" c="2">x &gt; y</b><x/>\n<i/> <y/>',
+         u'x > y\n '),
+        )
+    def test_serialize(self, xml, expected_unicode, expected_contents, expected_text):
+        tag = utils.first(utils.extract_nodes(parser.parse_xml(xml, backend="compact"), "p"))
+        self.assertEqual(unicode(tag), expected_unicode)
+        self.assertEqual(utils.node_contents_str(tag), expected_contents)
+        self.assertEqual(utils.node_text(tag), expected_text)
+
+    def test_tree_arrays(self):
+        soup = parser.parse_xml(u'<a><b x="1">t</b><b x="1"/></a>', backend="compact")
+        tree = soup.tree
+        self.assertEqual(list(tree.kinds), [utils_compact.ELEMENT, utils_compact.ELEMENT,
+                                            utils_compact.TEXT, utils_compact.ELEMENT])
+        self.assertEqual(list(tree.parents), [-1, 0, 1, 0])
+        self.assertEqual(list(tree.first_children), [1, 2, -1, -1])
+        self.assertEqual(list(tree.next_siblings), [-1, 3, -1, -1])
+        self.assertEqual(tree.names, ['a', 'b', 'x'])
+        # equal attribute values are held once
+        self.assertTrue(tree.attr_values[0] is tree.attr_values[1])
+
+    def test_source_spans(self):
+        xml = u'<a>\n  <b x="1">t</b>\n  <c y="2" x="1">u</c>\n</a>'
+        soup = parser.parse_xml(xml, backend="compact")
+        tree = soup.tree
+        # the whitespace text and the start tag of c are patched
+        self.assertEqual(len(tree.patch_starts), 3)
+        self.assertEqual(unicode(soup.root), u'<a>\n<b x="1">t</b>\n<c x="1" y="2">u</c>\n</a>')
+        # the contents are made once
+        contents = utils.node_contents_str(soup.root)
+        self.assertTrue(utils.node_contents_str(soup.root) is contents)
+
+    @data("elife-kitchen-sink.xml", "elife-00666.xml")
+    def test_ordinals(self, filename):
+        soup = parser.parse_document(sample_xml(filename))
+        compact_soup = parser.parse_document(sample_xml(filename), backend="compact")
+        for nodename in ["fig", "media", "supplementary-material", "table-wrap", "app"]:
+            tags = utils.extract_nodes(soup, nodename)
+            compact_tags = utils.extract_nodes(compact_soup, nodename)
+            for tag, compact_tag in zip(tags, compact_tags):
+                self.assertEqual(utils.tag_ordinal(tag), utils.tag_ordinal(compact_tag))
+                self.assertEqual(utils.tag_sibling_ordinal(tag), utils.tag_sibling_ordinal(compact_tag))
+                self.assertEqual(utils.tag_media_sibling_ordinal(tag),
+                                 utils.tag_media_sibling_ordinal(compact_tag))
+                self.assertEqual(unicode(utils.first_parent(tag, ["fig", "sec"])),
+                                 unicode(utils.first_parent(compact_tag, ["fig", "sec"])))
+
+
+    @data("elife-kitchen-sink.xml", "elife-00666.xml")
+    def test_indexed_ordinals(self, filename):
+        soup = parser.parse_document(sample_xml(filename))
+        compact_soup = parser.parse_document(sample_xml(filename), index=True, backend="compact")
+        self.assertTrue(utils.document_index(compact_soup.root) is compact_soup.tag_index)
+        for nodename in ["fig", "media", "supplementary-material"]:
+            tags = utils.extract_nodes(soup, nodename)
+            compact_tags = utils.extract_nodes(compact_soup, nodename)
+            self.assertEqual(len(tags), len(compact_tags))
+            for tag, compact_tag in zip(tags, compact_tags):
+                self.assertTrue(compact_soup.tag_index.span(compact_tag) is not None)
+                self.assertEqual(utils.tag_ordinal(tag), utils.tag_ordinal(compact_tag))
+                self.assertEqual(utils.tag_fig_ordinal(tag), utils.tag_fig_ordinal(compact_tag))
+                self.assertEqual(utils.tag_media_sibling_ordinal(tag),
+                                 utils.tag_media_sibling_ordinal(compact_tag))
+                self.assertEqual(utils.tag_supplementary_material_sibling_ordinal(tag),
+                                 utils.tag_supplementary_material_sibling_ordinal(compact_tag))
+        self.assertEqual(parser.asset_manifest(soup), parser.asset_manifest(compact_soup))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,8 @@ from ddt import ddt, data, unpack
 os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import utils_html
+import parseJATS as parser
+import utils
 
 
 @ddt
@@ -111,9 +113,74 @@ class TestUtilsHtml(unittest.TestCase):
         (True, u'<p>Bad named-content for test coverage <named-content/></p>', None,
          u'<p>Bad named-content for test coverage <named-content></named-content></p>'),
 
+        (True, u'G<sub>L</sub> << A<sub>L</sub> and p<0.01 & C > T', None,
+         u'G<sub>L</sub> &lt;&lt; A<sub>L</sub> and p&lt;0.01 &amp; C &gt; T'),
+
+        (True, u'<p>&#945; &#x3b2;&nbsp;&foo; R&D <break/></p></p></xref><italic>', None,
+         u'<p>α β &amp;foo; R&amp;D; <br/></p><i></i>'),
+
+        (True, u'<p>\n  <!-- a\ncomment --> <img src="a.jpg">text</p>', None,
+         u'<p>\n<!-- a\ncomment --> <img src="a.jpg">text</img></p>'),
+
+        (True, u'<p><ext-link ext-link-type="uri" xlink:href="a.org">a</ext-link> <ext-link ext-link-type="ftp" xlink:href="b">b</ext-link></p>', None,
+         u'<p><a href="http://a.org">a</a> <ext-link ext-link-type="ftp" xlink:href="b">b</ext-link></p>'),
+
         )
     def test_xml_to_html(self, html_flag, xml_string, base_url, expected):
         self.assertEqual(utils_html.xml_to_html(html_flag, xml_string, base_url), expected)
 
+    @unpack
+    @data(
+        (u'<xref ref-type="bibr" rid="bib1">1</xref>, <xref ref-type="bibr" rid="bib2 bib3">2</xref>, <xref>3</xref>',
+         u'<a href="#bib1">1</a>, <a href="#bib2">2</a>, <a>3</a>'),
+        (u'<xref ref-type="bibr" rid="bib1">1</xref>' * 3,
+         u'<a href="#bib1">1</a>' * 3),
+        (u'<xref>No rid</xref>', u'<xref>No rid</xref>'),
+        )
+    def test_replace_xref_tags(self, xml_string, expected):
+        self.assertEqual(utils_html.replace_xref_tags(xml_string), expected)
+
+    @data(
+        u'<p><italic>A</italic> &amp; <xref rid="bib1">B</xref> <inline-formula>x</inline-formula></p>',
+        u'<p>Unmatched <bold>tags</p></italic> and stray < and > signs &lt;</p>',
+        u'<table><tr><td style="author-callout-style-b8" valign="top"/></tr></table>',
+        u'<p><email>a@example.org</email> <ext-link ext-link-type="uri" xlink:href="www.example.org">a</ext-link></p>',
+        u'<p>α <mml:math><mml:mi>x</mml:mi></mml:math></p>',
+        u'Plain text',
+        )
+    def test_convert_html(self, xml_string):
+        self.assertEqual(utils_html.convert_html(xml_string),
+                         utils_html.replace_html_tags(xml_string))
+        self.assertEqual(type(utils_html.convert_html(xml_string)),
+                         type(utils_html.replace_html_tags(xml_string)))
+
+    @data(
+        u'<p>A comment <!-- over\nlines --></p>',
+        u'<p>Ends with &amp',
+        u'<p>A <style>tag</style></p>',
+        )
+    def test_convert_html_unsupported(self, xml_string):
+        self.assertRaises(utils_html.UnsupportedMarkup, utils_html.convert_html, xml_string)
+
+    @unpack
+    @data(
+        (u'<p xmlns:xlink="http://www.w3.org/1999/xlink">\n  A <italic>b</italic> &amp; <xref ref-type="bibr" rid="bib1">c</xref><fig id="f1"><label>x</label></fig> <email>a@example.org</email>\n</p>',
+         'A <i>b</i> &amp; <a href="#bib1">c</a> <a href="mailto:a@example.org">a@example.org</a>'),
+        (u'<p xmlns:mml="http://www.w3.org/1998/Math/MathML">An <inline-formula><mml:math><mml:mi>x</mml:mi></mml:math></inline-formula><!-- note --> and <named-content content-type="author-callout-style-a1">y</named-content><break/></p>',
+         'An <math><mi>x</mi></math> note  and <span class="author-callout-style-a1">y</span><br/>'),
+        (u'<p>p&lt;0.05 and R&amp;D</p>',
+         'p&lt;0.05 and R'),
+        )
+    def test_nodes_html(self, xml, expected):
+        for backend in ["bs4", "lxml"]:
+            tag = utils.first(utils.extract_nodes(parser.parse_xml(xml, backend=backend), "p"))
+            tag_copy = utils.remove_tag_from_tag(parser.duplicate_tag(tag), ["fig"])
+            self.assertEqual(utils_html.nodes_html(tag.children, None, ["fig"], clean=True), expected)
+            self.assertEqual(utils_html.nodes_html(tag.children, None, ["fig"], clean=True),
+                             utils_html.xml_to_html(True, utils.clean_whitespace(
+                                 utils.node_contents_str(tag_copy))))
+            self.assertEqual(utils_html.nodes_html(tag.children),
+                             utils_html.xml_to_html(True, utils.node_contents_str(tag)))
+
 if __name__ == '__main__':
     unittest.main()
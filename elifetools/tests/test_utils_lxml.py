@@ -0,0 +1,170 @@
+# coding=utf-8
+
+import unittest
+import os
+import json
+from ddt import ddt, data, unpack
+
+os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parseJATS as parser
+import utils
+import utils_lxml
+from article import ARTICLE_JSON_FIELDS
+
+from file_utils import sample_xml, json_expected_file
+
+
+"""
+Functions giving the same output when parsing with the lxml backend
+"""
+lxml_functions = ["abstract", "abstracts", "accepted_date_day", "accepted_date_month",
+"accepted_date_timestamp", "accepted_date_year", "ack", "article_type",
+"authors_non_byline", "category", "collection_year", "component_doi", "components",
+"copyright_holder", "copyright_statement", "copyright_year", "digest", "display_channel",
+"doi", "elocation_id", "full_abstract", "full_affiliation", "full_correspondence",
+"full_digest", "full_funding_statement", "full_keyword_groups", "full_keywords",
+"full_license", "full_research_organism", "full_subject_area", "full_title",
+"funding_statement", "graphics", "impact_statement", "inline_graphics", "is_poa",
+"journal_id", "journal_title", "keywords", "license", "license_url", "media",
+"pub_date_day", "pub_date_month", "pub_date_timestamp", "pub_date_year", "publisher",
+"publisher_id", "received_date_day", "received_date_month", "received_date_timestamp",
+"received_date_year", "related_article", "related_object_ids", "research_organism",
+"self_uri", "subject_area", "supplementary_material", "title", "title_prefix",
+"title_short", "title_slug", "volume"]
+
+xml_filenames = ["elife-kitchen-sink.xml", "elife-00666.xml", "elife-00777.xml",
+                 "elife-02833-v2.xml", "elife00013.xml", "elife00051.xml", "elife04493.xml",
+                 "elife_poa_e06828.xml"]
+
+# every eLife article in the sample folder
+article_filenames = sorted(filename for filename in os.listdir(os.path.dirname(sample_xml("")))
+                           if filename.startswith("elife") and filename.endswith(".xml"))
+
+
+@ddt
+class TestUtilsLxml(unittest.TestCase):
+
+    def json_expected(self, filename, function_name):
+        json_expected = None
+        json_file = json_expected_file(filename, function_name)
+        try:
+            with open(json_file, 'rb') as json_file_fp:
+                json_expected = json.loads(json_file_fp.read())
+        except IOError:
+            # file may not exist or the value is None for this article
+            pass
+        return json_expected
+
+    @data(*xml_filenames)
+    def test_parse_document(self, filename):
+        soup = parser.parse_document(sample_xml(filename), backend="lxml")
+        self.assertTrue(isinstance(soup, utils_lxml.JATSDocument))
+        self.assertTrue(utils_lxml.is_element(soup.root))
+
+    @data(*xml_filenames)
+    def test_lxml_functions(self, filename):
+        soup = parser.parse_document(sample_xml(filename), backend="lxml")
+        for function_name in lxml_functions:
+            self.assertEqual(self.json_expected(filename, function_name),
+                             getattr(parser, function_name)(soup),
+                             "%s %s" % (filename, function_name))
+
+    @data(*article_filenames)
+    def test_article_json_fields(self, filename):
+        "the article JSON is the same as from BeautifulSoup, or the same error"
+        soup = parser.parse_document(sample_xml(filename))
+        lxml_soup = parser.parse_document(sample_xml(filename), backend="lxml")
+        for function_name in ARTICLE_JSON_FIELDS:
+            function = getattr(parser, function_name)
+            try:
+                expected = function(soup)
+            except Exception as exception:
+                self.assertRaises(type(exception), function, lxml_soup)
+                continue
+            self.assertEqual(expected, function(lxml_soup), "%s %s" % (filename, function_name))
+
+    def test_text_and_children(self):
+        tag = utils.first(utils.extract_nodes(
+            parser.parse_xml(u'<p>A <bold>b</bold> c</p>', backend="lxml"), "p"))
+        self.assertEqual(tag.text, u'A b c')
+        self.assertEqual(list(tag), tag.contents)
+        self.assertEqual(len(tag), 3)
+        self.assertEqual([child.name for child in tag], [None, u'bold', None])
+
+    @unpack
+    @data(
+        ("elife-kitchen-sink.xml", ["article-title", "p", "fig", "table-wrap", "math", "ref"]),
+        ("elife-00666.xml", ["kwd", "aff", "media", "supplementary-material", "sub-article"]),
+        )
+    def test_node_contents_str(self, filename, nodenames):
+        soup = parser.parse_document(sample_xml(filename))
+        lxml_soup = parser.parse_document(sample_xml(filename), backend="lxml")
+        for nodename in nodenames:
+            tags = utils.extract_nodes(soup, nodename)
+            lxml_tags = utils.extract_nodes(lxml_soup, nodename)
+            self.assertEqual(len(tags), len(lxml_tags))
+            for tag, lxml_tag in zip(tags, lxml_tags):
+                self.assertEqual(unicode(tag), unicode(lxml_tag))
+                self.assertEqual(utils.node_contents_str(tag), utils.node_contents_str(lxml_tag))
+                self.assertEqual(utils.node_text(tag), utils.node_text(lxml_tag))
+
+    @unpack
+    @data(
+        (u'<p>A &amp; <italic>b &lt; c</italic><!--note--> <?pi data?>d<x></x></p>',
+         u'<p>A &amp; <italic>b &lt; c</italic><!--note--> d<x/></p>',
+         u'A & <italic>b &lt; c</italic>note d<x/>',
+         u'A & b < c d'),
+        (u'<p xmlns:xlink="http://www.w3.org/1999/xlink">\n    <ext-link xlink:href="a\'b&quot;"/>\n</p>',
+         u'<p xmlns:xlink="http://www.w3.org/1999/xlink">\n<ext-link xlink:href="a\'b&quot;"/>\n</p>',
+         u'\n<ext-link xlink:href="a\'b&quot;"/>\n',
+         u'\n\n'),
+        )
+    def test_serialize(self, xml, expected_unicode, expected_contents, expected_text):
+        tag = utils.first(utils.extract_nodes(parser.parse_xml(xml, backend="lxml"), "p"))
+        self.assertEqual(unicode(tag), expected_unicode)
+        self.assertEqual(utils.node_contents_str(tag), expected_contents)
+        self.assertEqual(utils.node_text(tag), expected_text)
+
+    @data("elife-kitchen-sink.xml", "elife-00666.xml")
+    def test_ordinals(self, filename):
+        soup = parser.parse_document(sample_xml(filename))
+        lxml_soup = parser.parse_document(sample_xml(filename), backend="lxml")
+        for nodename in ["fig", "media", "supplementary-material", "table-wrap", "app"]:
+            tags = utils.extract_nodes(soup, nodename)
+            lxml_tags = utils.extract_nodes(lxml_soup, nodename)
+            for tag, lxml_tag in zip(tags, lxml_tags):
+                self.assertEqual(utils.tag_ordinal(tag), utils.tag_ordinal(lxml_tag))
+                self.assertEqual(utils.tag_fig_ordinal(tag), utils.tag_fig_ordinal(lxml_tag))
+                self.assertEqual(utils.tag_sibling_ordinal(tag), utils.tag_sibling_ordinal(lxml_tag))
+                self.assertEqual(utils.tag_subarticle_sibling_ordinal(tag),
+                                 utils.tag_subarticle_sibling_ordinal(lxml_tag))
+                self.assertEqual(utils.tag_media_sibling_ordinal(tag),
+                                 utils.tag_media_sibling_ordinal(lxml_tag))
+                self.assertEqual(utils.tag_supplementary_material_sibling_ordinal(tag),
+                                 utils.tag_supplementary_material_sibling_ordinal(lxml_tag))
+                self.assertEqual(unicode(utils.first_parent(tag, ["fig", "sec"])),
+                                 unicode(utils.first_parent(lxml_tag, ["fig", "sec"])))
+
+
+    @data("elife-kitchen-sink.xml", "elife-00666.xml")
+    def test_indexed_ordinals(self, filename):
+        soup = parser.parse_document(sample_xml(filename))
+        lxml_soup = parser.parse_document(sample_xml(filename), index=True, backend="lxml")
+        self.assertTrue(utils.document_index(lxml_soup.root) is lxml_soup.tag_index)
+        for nodename in ["fig", "media", "supplementary-material"]:
+            tags = utils.extract_nodes(soup, nodename)
+            lxml_tags = utils.extract_nodes(lxml_soup, nodename)
+            self.assertEqual(len(tags), len(lxml_tags))
+            for tag, lxml_tag in zip(tags, lxml_tags):
+                self.assertTrue(lxml_soup.tag_index.span(lxml_tag) is not None)
+                self.assertEqual(utils.tag_ordinal(tag), utils.tag_ordinal(lxml_tag))
+                self.assertEqual(utils.tag_fig_ordinal(tag), utils.tag_fig_ordinal(lxml_tag))
+                self.assertEqual(utils.tag_media_sibling_ordinal(tag),
+                                 utils.tag_media_sibling_ordinal(lxml_tag))
+                self.assertEqual(utils.tag_supplementary_material_sibling_ordinal(tag),
+                                 utils.tag_supplementary_material_sibling_ordinal(lxml_tag))
+        self.assertEqual(parser.asset_manifest(soup), parser.asset_manifest(lxml_soup))
+
+if __name__ == '__main__':
+    unittest.main()
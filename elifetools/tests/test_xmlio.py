@@ -29,6 +29,27 @@ class TestXmlio(unittest.TestCase):
         root, doctype_dict = xmlio.parse(sample_xml(filename), return_doctype_dict=True)
         self.assertEqual(xmlio.output(root, None, doctype_dict), xml_output_expected)
 
+    def test_parse_doctype_dict(self):
+        "each parse has its own doctype details"
+        root, doctype_dict = xmlio.parse(sample_xml("simple-jats-doctype-1.1.xml"), return_doctype_dict=True)
+        self.assertEqual(doctype_dict["system"], "JATS-archivearticle1.dtd")
+        root, doctype_dict = xmlio.parse(StringIO.StringIO("<article/>"), return_doctype_dict=True)
+        self.assertEqual(doctype_dict, {})
+
+    @data(1, 4)
+    def test_parse_many(self, workers):
+        filenames = ["elife-02833-v2.xml", "simple-jats-doctype-1.1.xml", "simple-jats-doctype-1.1d3.xml",
+                     "xmlio_input.xml"] * 5
+        results = xmlio.parse_many([sample_xml(filename) for filename in filenames], True, workers)
+        self.assertEqual(len(results), len(filenames))
+        for filename, (root, doctype_dict) in zip(filenames, results):
+            expected_root, expected_doctype_dict = xmlio.parse(sample_xml(filename), True)
+            self.assertEqual(ElementTree.tostring(root), ElementTree.tostring(expected_root))
+            self.assertEqual(doctype_dict, expected_doctype_dict)
+
+    def test_parse_many_empty(self):
+        self.assertEqual(xmlio.parse_many([]), [])
+
     @data("elife-02833-v2.xml")
     def test_input_output_forcing_jats_doctype(self, filename):
         with open(sample_xml(filename), "rb") as xml_file:
@@ -63,6 +84,23 @@ class TestXmlio(unittest.TestCase):
             xml_output_expected = xml_file.read()
         self.assertEqual(xml_output, xml_output_expected)
 
+    @unpack
+    @data(
+        ({"a.tif": "b.tif"}, "a.tif", "b.tif", 1),
+        ({"a.tif": "b.tif"}, "a", "b", 1),
+        ({"a": "c", "a.tif": "b.tif"}, "a", "c", 1),
+        ({"a.v1.tif": "b.v2.tif"}, "a", "b", 1),
+        ({"a.tif": "b.tif", "b.tif": "c.tif"}, "a.tif", "b.tif", 1),
+        ({"a.tif": "b.tif"}, "a.pdf", "a.pdf", 0),
+        )
+    def test_convert_xlink_href_names(self, name_map, href, expected_href, expected_count):
+        root = ElementTree.fromstring(
+            '<article xmlns:xlink="http://www.w3.org/1999/xlink"><p><graphic xlink:href="%s"/>'
+            '<xref xlink:href="%s"/></p></article>' % (href, href))
+        self.assertEqual(xmlio.convert_xlink_href(root, name_map), expected_count)
+        self.assertEqual(root.find('.//graphic').get(xmlio.XLINK_HREF), expected_href)
+        self.assertEqual(root.find('.//xref').get(xmlio.XLINK_HREF), href)
+
     @unpack
     @data(("<article/>", "JATS", '<?xml version="1.0" encoding="UTF-8"?><!DOCTYPE article PUBLIC "-//NLM//DTD JATS (Z39.96) Journal Archiving and Interchange DTD v1.1d3 20150301//EN"  "JATS-archivearticle1.dtd"><article/>'),
         ("<article/>", None, '<?xml version="1.0" encoding="UTF-8"?><!DOCTYPE article><article/>'))
@@ -71,6 +109,28 @@ class TestXmlio(unittest.TestCase):
         xml_output = xmlio.output(root, type)
         self.assertEqual(xml_output, xml_expected)
 
+    @data("elife-02833-v2.xml", "simple-jats-doctype-1.1.xml", "xmlio_input.xml")
+    def test_write(self, filename):
+        root, doctype_dict = xmlio.parse(sample_xml(filename), return_doctype_dict=True)
+        output_file = StringIO.StringIO()
+        xmlio.write(root, output_file, None, doctype_dict)
+        self.assertEqual(output_file.getvalue(), xmlio.output(root, None, doctype_dict))
+
+    @unpack
+    @data(
+        (u'<a b="x&quot;&gt;&#9;&#10;&#13;&amp;" c="\'"/>',
+         '<a b="x&quot;&gt; \n &amp;" c="\'"/>'),
+        (u'<a>"\'&gt;&lt;&amp;&#13;&#13;&#10;<!--c--><?pi?><?pi  d ?><b></b>t<c>\xe9</c></a>',
+         '<a>&quot;\'&gt;&lt;&amp;\n\n<b/>t<c>\xc3\xa9</c></a>'),
+        (u'<a xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:n="http://example.org/n" z="1"><n:b xlink:href="x"/></a>',
+         '<a xmlns:ns0="http://example.org/n" xmlns:xlink="http://www.w3.org/1999/xlink" z="1"><ns0:b xlink:href="x"/></a>'),
+        )
+    def test_output_escaping(self, xml, xml_expected):
+        xmlio.register_xmlns()
+        root = xmlio.parse(StringIO.StringIO(xml.encode("utf-8")))
+        xml_output = xmlio.output(root, None)
+        self.assertEqual(xml_output, '<?xml version="1.0" encoding="UTF-8"?><!DOCTYPE article>' + xml_expected)
+
     @unpack
     @data(("<article/>", "", "", None,
            '<?xml version="1.0" encoding="UTF-8"?><!DOCTYPE article><article/>'),
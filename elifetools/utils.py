@@ -2,6 +2,15 @@ import cgi
 import htmlentitydefs
 import time
 import calendar
+import functools
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
+from bs4 import BeautifulSoup
+from bs4.dammit import EntitySubstitution
+from bs4.element import Tag, NavigableString, CData
+import utils_lxml
+import utils_compact
+import metrics
 
 def first(x):
     if x is None:
@@ -53,8 +62,17 @@ def coerce_to_int(val, default=0xDEADBEEF):
         return val
 
 
+def wraps(function):
+    "Like functools.wraps, also keeping the decorated function as __wrapped__"
+    def decorator(wrapper):
+        wrapper = functools.wraps(function)(wrapper)
+        wrapper.__wrapped__ = function
+        return wrapper
+    return decorator
+
 def nullify(function):
     "Decorator. If empty list, returns None, else list."
+    @wraps(function)
     def wrapper(*args, **kwargs):
         value = function(*args, **kwargs)
         if(type(value) == list and len(value) == 0):
@@ -64,16 +82,56 @@ def nullify(function):
 
 def strippen(function):
     "Decorator. Strip excess whitespace from return value."
+    @wraps(function)
     def wrapper(*args, **kwargs):
         return strip_strings(function(*args, **kwargs))
     return wrapper
 
 def inten(function):
     "Decorator. Attempts to convert return value to int"
+    @wraps(function)
     def wrapper(*args, **kwargs):
         return coerce_to_int(function(*args, **kwargs))
     return wrapper
 
+def memoize(function):
+    """
+    Decorator. If the soup has a memo, see memo_document, the value is computed
+    once for the same arguments and a copy of it returned after that
+    """
+    @wraps(function)
+    def wrapper(soup, *args, **kwargs):
+        memo = getattr(soup, '__dict__', {}).get('memo')
+        if memo is None:
+            return function(soup, *args, **kwargs)
+        key = (function.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return function(soup, *args, **kwargs)
+        if key not in memo:
+            metrics.memo_lookup(False)
+            memo[key] = copy_value(function(soup, *args, **kwargs))
+        else:
+            metrics.memo_lookup(True)
+        return copy_value(memo[key])
+    return wrapper
+
+def memo_document(soup):
+    "Keep a memo with the document so memoized functions only compute their values once"
+    soup.memo = {}
+    return soup
+
+def copy_value(value):
+    "Copy of lists and dicts in the value, tags and other values are not copied"
+    if type(value) in (dict, OrderedDict):
+        return type(value)((key, copy_value(item)) for key, item in value.items())
+    if type(value) == list:
+        return [copy_value(item) for item in value]
+    if type(value) == tuple:
+        return tuple(copy_value(item) for item in value)
+    return value
+
 def clean_whitespace(value):
     if not value:
         return value
@@ -193,6 +251,8 @@ def remove_tag_from_tag(tag, nodename):
     if not nodename:
         return tag
     unwanted_tags = extract_nodes(tag, nodename)
+    if unwanted_tags:
+        document_changed(tag)
     for unwanted_tag in unwanted_tags:
         unwanted_tag.decompose()
     return tag
@@ -212,6 +272,263 @@ def component_acting_parent_tag(parent_tag, tag):
         acting_parent_tag = parent_tag
     return acting_parent_tag
 
+#
+# Document index
+#
+
+def document_tags(soup):
+    "the tags below the soup in document order"
+    if isinstance(soup, Tag):
+        return (node for node in soup.descendants if isinstance(node, Tag))
+    return soup.find_all()
+
+def node_key(tag):
+    """
+    key of a tag in a tag index. Compact tags are views made again on each
+    lookup so are keyed by their node, the tags of the other backends are kept
+    by the index so their identity holds
+    """
+    if isinstance(tag, utils_compact.CompactTag):
+        return tag.index
+    return id(tag)
+
+class TagIndex(object):
+    """
+    Lookup tables for the tags of a parsed document, built in one pass
+    over the tree: tag name to tags, (tag name, attribute, value) to tags,
+    and the document order position and last descendant position of each tag
+    so lookups below any tag in the document can be answered without a tree walk.
+    The positions also give the tag ordinals, with running counts of tags
+    built on first use
+    """
+    def __init__(self, soup):
+        self.names = {}
+        self.starts = {}
+        self.attributes = {}
+        self.positions = {}
+        self.counts = {}
+        self.parentless_ordinals = {}
+        self.build(soup)
+
+    def build(self, soup):
+        open_tags = []
+        position = 0
+        for node in document_tags(soup):
+            position += 1
+            parent_key = node_key(node.parent)
+            while open_tags and open_tags[-1][0] != parent_key:
+                open_tags.pop()[1][1] = position - 1
+            span = [position, None]
+            key = node_key(node)
+            self.positions[key] = span
+            open_tags.append((key, span))
+            self.names.setdefault(node.name, []).append(node)
+            self.starts.setdefault(node.name, []).append(position)
+            for attr, value in node.attrs.items():
+                try:
+                    self.attributes.setdefault((node.name, attr, value), []).append(node)
+                except TypeError:
+                    # Unhashable multi-valued attribute, filtered on lookup instead
+                    pass
+        for node, span in open_tags:
+            span[1] = position
+
+    def span(self, tag):
+        "document order position of the tag and of its last descendant tag"
+        return self.positions.get(node_key(tag))
+
+    def find_all(self, tag, nodename, attr=None, value=None):
+        """
+        Tags below the given tag matching nodename, a tag name or list of tag names,
+        in document order. Returns None if the query cannot be answered by the index
+        """
+        if isinstance(nodename, basestring):
+            nodenames = [nodename]
+        elif isinstance(nodename, (list, tuple)):
+            nodenames = list(set(nodename))
+        else:
+            return None
+        filter_attr = attr is not None and value is not None
+        if tag.parent is None:
+            # Whole document lookup
+            if filter_attr and len(nodenames) == 1:
+                return list(self.attributes.get((nodenames[0], attr, value), []))
+            start, end = 0, None
+        else:
+            span = self.span(tag)
+            if span is None:
+                return None
+            start, end = span
+        found = []
+        for name in nodenames:
+            starts = self.starts.get(name)
+            if not starts:
+                continue
+            low = bisect_right(starts, start)
+            high = len(starts) if end is None else bisect_right(starts, end)
+            found.extend(zip(starts[low:high], self.names[name][low:high]))
+        if len(nodenames) > 1:
+            found.sort(key=lambda item: item[0])
+        tags = [found_tag for position, found_tag in found]
+        if filter_attr:
+            return filter(lambda found_tag: found_tag.get(attr) == value, tags)
+        return tags
+
+    def count_before(self, nodename, position):
+        "number of tags named nodename before the document position"
+        return bisect_left(self.starts.get(nodename, []), position)
+
+    def running_counts(self, nodename, key, function):
+        """
+        Running count of the tags named nodename for which function is true,
+        item i is the count for the first i tags in document order
+        """
+        if (nodename, key) not in self.counts:
+            counts = [0]
+            for tag in self.names.get(nodename, []):
+                counts.append(counts[-1] + (1 if function(tag) else 0))
+            self.counts[(nodename, key)] = counts
+        return self.counts[(nodename, key)]
+
+    def parentless_ordinal(self, tag, parent_nodenames, key):
+        """
+        Ordinal among the previous tags of the same name which have no parent
+        named in parent_nodenames and have the same key(tag, previous_tag) value
+        """
+        if (tag.name, key) not in self.parentless_ordinals:
+            ordinals = {}
+            seen = {}
+            for named_tag in self.names.get(tag.name, []):
+                ordinal_key, count_key = key(named_tag)
+                ordinals[node_key(named_tag)] = seen.get(ordinal_key, 0) + 1
+                if not first_parent(named_tag, parent_nodenames):
+                    seen[count_key] = seen.get(count_key, 0) + 1
+            self.parentless_ordinals[(tag.name, key)] = ordinals
+        return self.parentless_ordinals[(tag.name, key)].get(node_key(tag))
+
+    def ordinal(self, tag):
+        span = self.span(tag)
+        if span is None:
+            return None
+        return self.count_before(tag.name, span[0]) + 1
+
+    def fig_ordinal(self, tag):
+        span = self.span(tag)
+        if span is None:
+            return None
+        counts = self.running_counts(tag.name, 'no-specific-use',
+                                     lambda fig_tag: 'specific-use' not in fig_tag.attrs)
+        return counts[self.count_before(tag.name, span[0])] + 1
+
+    def limit_sibling_ordinal(self, tag, stop_tag_name):
+        span = self.span(tag)
+        if span is None:
+            return None
+        stop_starts = self.starts.get(stop_tag_name, [])
+        stop_index = bisect_left(stop_starts, span[0])
+        stop_position = stop_starts[stop_index - 1] if stop_index else 0
+        return (self.count_before(tag.name, span[0])
+                - self.count_before(tag.name, stop_position) + 1)
+
+    def count_in_parent(self, tag, parent_tag, counts, include_tag):
+        "from running counts, the count for the tags inside parent_tag up to tag"
+        parent_span = self.span(parent_tag)
+        if parent_span is None:
+            return None
+        tag_index = self.count_before(tag.name, self.span(tag)[0])
+        if include_tag:
+            tag_index += 1
+        return counts[tag_index] - counts[bisect_right(self.starts[tag.name], parent_span[0])]
+
+    def media_sibling_ordinal(self, tag, parent_nodenames):
+        if self.span(tag) is None:
+            return None
+        is_video = 'mimetype' in tag.attrs and tag['mimetype'] == 'video'
+        parent_tag = first_parent(tag, parent_nodenames)
+        if parent_tag:
+            if is_video:
+                counts = self.running_counts(tag.name, 'mimetype',
+                                             lambda media_tag: 'mimetype' in media_tag.attrs)
+            else:
+                counts = self.running_counts(tag.name, 'all', lambda media_tag: True)
+            return self.count_in_parent(tag, parent_tag, counts, True)
+        return self.parentless_ordinal(tag, parent_nodenames, media_ordinal_key)
+
+    def supplementary_material_sibling_ordinal(self, tag, parent_nodenames):
+        if self.span(tag) is None:
+            return None
+        parent_tag = first_parent(tag, parent_nodenames)
+        if parent_tag:
+            asset = supp_asset(tag)
+            counts = self.running_counts(tag.name, ('asset', asset),
+                                         lambda supp_tag: supp_asset(supp_tag) == asset)
+            count = self.count_in_parent(tag, parent_tag, counts, False)
+            return count + 1 if count is not None else None
+        return self.parentless_ordinal(tag, parent_nodenames, supp_ordinal_key)
+
+def media_ordinal_key(tag):
+    "videos count previous media with a mimetype and other media count those without"
+    is_video = 'mimetype' in tag.attrs and tag['mimetype'] == 'video'
+    return (supp_asset(tag), is_video), (supp_asset(tag), 'mimetype' in tag.attrs)
+
+def supp_ordinal_key(tag):
+    return supp_asset(tag), supp_asset(tag)
+
+def document_root(tag):
+    "the top level document object a tag belongs to"
+    parent = getattr(tag, 'parent', None)
+    while parent is not None:
+        tag = parent
+        parent = tag.parent
+    return tag
+
+def index_document(soup):
+    "Build a tag index for the document and keep it with the document"
+    soup.tag_index = TagIndex(soup)
+    soup.tag_index_stale = False
+    return soup
+
+def document_index(tag):
+    """
+    The tag index of the document the tag belongs to, or None
+    if the document was not indexed. A stale index is rebuilt first
+    """
+    root = document_root(tag)
+    root_attrs = getattr(root, '__dict__', {})
+    if root_attrs.get('tag_index') is None:
+        return None
+    if root_attrs.get('tag_index_stale'):
+        index_document(root)
+    return root.tag_index
+
+def unindex_document(soup):
+    "Remove the tag index kept with the document"
+    soup.__dict__.pop('tag_index', None)
+    soup.__dict__.pop('tag_index_stale', None)
+    return soup
+
+def document_changed(tag):
+    "Mark the index of the tag's document as stale, call before changing the tree"
+    root = document_root(tag)
+    root_attrs = getattr(root, '__dict__', {})
+    if root_attrs.get('tag_index') is not None:
+        root.tag_index_stale = True
+    root_attrs.pop('tag_details', None)
+
+def document_details(tag):
+    """
+    Cache of values found for the tags of the document the tag belongs to, keyed
+    by the tag identity, or None when the tag is not in a BeautifulSoup document.
+    The tags of the lxml and compact documents are made again on each lookup
+    so cannot be keys. A value is kept with its tag so the identity is not reused
+    """
+    root = document_root(tag)
+    if not isinstance(root, BeautifulSoup):
+        return None
+    if root.__dict__.get('tag_details') is None:
+        root.tag_details = {}
+    return root.tag_details
+
 #
 #
 #
@@ -221,23 +538,114 @@ def extract_nodes(soup, nodename, attr = None, value = None):
     Returns a list of tags (nodes) from the given soup matching the given nodename.
     If an optional attribute and value are given, these are used to filter the results
     further."""
+    index = document_index(soup)
+    if index is not None:
+        tags = index.find_all(soup, nodename, attr, value)
+        if tags is not None:
+            return tags
     tags = soup.find_all(nodename)
     if attr != None and value != None:
         return filter(lambda tag: tag.get(attr) == value, tags)
     return tags
 
-def node_text(tag):
-    "Returns the text contents of a tag"
+def node_text(tag, exclude=None):
+    """
+    Returns the text contents of a tag, leaving out the text of
+    the tags named in exclude, a tag name or list of tag names
+    """
+    if exclude and getattr(tag, 'name', None) is not None:
+        return u"".join(tag_strings(tag, excluded_names(exclude)))
+    if utils_lxml.is_element(tag) or utils_compact.is_element(tag):
+        return tag.get_text()
     return getattr(tag, 'text', None)
 
-def node_contents_str(tag):
+def node_contents_str(tag, exclude=None):
     """
     Return the contents of a tag, including it's children, as a string.
     Does not include the root/parent of the tag.
+    Tags named in exclude, a tag name or list of tag names, are left out
+    the same as if they were removed from the tag first
     """
     if tag is None:
         return None
+    if exclude:
+        exclude = excluded_names(exclude)
+        parts = []
+        for child in tag.children:
+            if child.name is None:
+                parts.append(unicode(child))
+            elif child.name not in exclude:
+                write_tag(child, exclude, parts)
+        return "".join(parts) or None
+    if isinstance(tag, utils_compact.CompactTag):
+        return tag.tree.contents_str(tag.index) or None
     return "".join(map(unicode, tag.children)) or None
+
+def excluded_names(exclude):
+    if isinstance(exclude, basestring):
+        return [exclude]
+    return exclude
+
+def tag_strings(tag, exclude):
+    "The strings get_text() joins, without those inside tags named in exclude"
+    for child in tag.children:
+        if child.name is None:
+            if type(child) in (NavigableString, CData, utils_lxml.JATSString):
+                yield child
+        elif child.name not in exclude:
+            for string in tag_strings(child, exclude):
+                yield string
+
+def tag_start(tag):
+    "Qualified name of the tag and its start tag up to the closing > or />, as unicode(tag) writes it"
+    if utils_lxml.is_element(tag):
+        return utils_lxml.tag_start(tag)
+    if utils_compact.is_element(tag):
+        return utils_compact.tag_start(tag)
+    attrs = []
+    for key, value in sorted(tag.attrs.items()):
+        if value is None:
+            attrs.append(key)
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ' '.join(value)
+        elif not isinstance(value, basestring):
+            value = unicode(value)
+        attrs.append(unicode(key) + u'=' + EntitySubstitution.quoted_attribute_value(
+            EntitySubstitution.substitute_xml(value)))
+    tag_name = tag.prefix + u':' + tag.name if tag.prefix else tag.name
+    start = u'<' + tag_name
+    if attrs:
+        start += u' ' + u' '.join(attrs)
+    return tag_name, start
+
+def is_empty_tag(tag, children):
+    "Whether the tag with these children is written as an empty element tag"
+    return not children and (utils_lxml.is_element(tag) or utils_compact.is_element(tag)
+                             or tag.can_be_empty_element)
+
+def string_str(string):
+    "The string node as unicode() of its parent tag writes it"
+    if isinstance(string, (utils_lxml.JATSComment, utils_compact.CompactComment)):
+        return u'<!--' + unicode(string) + u'-->'
+    if isinstance(string, utils_lxml.JATSString):
+        return utils_lxml.escape_text(string)
+    return string.output_ready()
+
+def write_tag(tag, exclude, parts):
+    "Append unicode(tag) to parts with the tags named in exclude left out"
+    tag_name, start = tag_start(tag)
+    children = [child for child in tag.children if child.name not in exclude]
+    if is_empty_tag(tag, children):
+        parts.append(start + u'/>')
+        return
+    parts.append(start + u'>')
+    for child in children:
+        if child.name is None:
+            parts.append(string_str(child))
+        else:
+            write_tag(child, exclude, parts)
+    parts.append(u'</' + tag_name + u'>')
     
 def first_parent(tag, nodename):
     """
@@ -254,7 +662,9 @@ def tag_ordinal(tag):
     to get the tag ordinal. For example, if it is tag name fig
     and two fig tags are before it, then it is the third fig (3)
     """
-    tag_count = 0
+    index = document_index(tag)
+    if index is not None and index.span(tag) is not None:
+        return index.ordinal(tag)
     return len(tag.find_all_previous(tag.name)) + 1
 
 def tag_fig_ordinal(tag):
@@ -262,9 +672,11 @@ def tag_fig_ordinal(tag):
     Meant for finding the position of fig tags with respect to whether
     they are for a main figure or a child figure
     """
-    tag_count = 0
     if 'specific-use' not in tag.attrs:
         # Look for tags with no "specific-use" attribute
+        index = document_index(tag)
+        if index is not None and index.span(tag) is not None:
+            return index.fig_ordinal(tag)
         return len(filter(lambda tag: 'specific-use' not in tag.attrs,
                           tag.find_all_previous(tag.name))) + 1
 
@@ -283,6 +695,9 @@ def tag_limit_sibling_ordinal(tag, stop_tag_name):
     Count previous tags of the same name until it
     reaches a tag name of type stop_tag, then stop counting
     """
+    index = document_index(tag)
+    if index is not None and index.span(tag) is not None:
+        return index.limit_sibling_ordinal(tag, stop_tag_name)
     tag_count = 1
     for prev_tag in tag.previous_elements:
         if prev_tag.name == tag.name:
@@ -307,6 +722,11 @@ def tag_media_sibling_ordinal(tag):
         return None
     
     nodenames = ['fig','supplementary-material','sub-article']
+
+    index = document_index(tag)
+    if index is not None and index.span(tag) is not None:
+        return index.media_sibling_ordinal(tag, nodenames)
+
     first_parent_tag = first_parent(tag, nodenames)
     
     sibling_ordinal = None
@@ -355,6 +775,11 @@ def tag_supplementary_material_sibling_ordinal(tag):
         return None
 
     nodenames = ['fig','media','sub-article']
+
+    index = document_index(tag)
+    if index is not None and index.span(tag) is not None:
+        return index.supplementary_material_sibling_ordinal(tag, nodenames)
+
     first_parent_tag = first_parent(tag, nodenames)
     
     sibling_ordinal = 1
@@ -0,0 +1,609 @@
+from array import array
+from bisect import bisect_left
+from xml.parsers import expat
+from utils_lxml import JATSString, ASCII_SPACES, escape_text, quoted_attribute_value
+
+"""
+utils_compact.py is a compact backend for parsing an article. The document is
+held in parallel arrays, one entry per node in document order: the kind of node,
+an interned tag name id, the parent, first child and next sibling indexes, the
+end of the node's subtree and the offset of its attributes in the attribute
+table. Text is kept as byte offsets into the XML it was parsed from and decoded
+when it is read.
+
+Elements keep the byte span of their markup in the XML too. Where the XML differs
+from the way BeautifulSoup writes the document, a start tag with its attributes
+in another order, an entity or a run of whitespace, the parser adds a patch, the
+span and the text written in its place. unicode() of an element and
+node_contents_str are then the source span decoded with the patches in it, and
+are not written out node by node. node_contents_str of an element is kept once
+made.
+
+CompactTag and CompactDocument are views of one node of the arrays and support
+the same part of the BeautifulSoup Tag interface as the lxml backend, so rawJATS
+and the utils helpers run on them unchanged. Views are made when a node is read
+and hold nothing but the tree and the node index, except for the CompactDocument
+which is made once for the tree and is the parent of the root element.
+"""
+
+ELEMENT, TEXT, COMMENT = 0, 1, 2
+NO_NODE = -1
+SPACE_BYTES = ASCII_SPACES.encode('ascii')
+
+
+class CompactTree(object):
+    "The arrays of a parsed document"
+
+    def __init__(self, source, encoding):
+        self.source = source
+        self.encoding = encoding
+        self.kinds = array('b')
+        self.name_ids = array('i')
+        self.parents = array('i')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        self.ends = array('i')
+        self.attr_offsets = array('i')
+        # byte span of a text node, or of an element from its start tag to its end tag
+        self.text_starts = array('i')
+        self.text_ends = array('i')
+        # decoded text of the nodes which can not be read from the source as it is
+        self.texts = {}
+        # attribute table, the attributes of node i are attr_offsets[i] to attr_offsets[i + 1]
+        self.attr_name_ids = array('i')
+        self.attr_values = []
+        # patches of the spans, sorted by their start
+        self.patch_starts = array('i')
+        self.patch_ends = array('i')
+        self.patch_texts = []
+        self.contents_strs = {}
+        # interned qualified names with their local names
+        self.names = []
+        self.local_names = []
+        self.name_table = {}
+        self.name_positions = None
+        self.document = None
+
+    def name_id(self, name):
+        name_id = self.name_table.get(name)
+        if name_id is None:
+            try:
+                # ASCII names are str as they are from lxml
+                name = str(name)
+            except UnicodeEncodeError:
+                pass
+            name_id = self.name_table[name] = len(self.names)
+            self.names.append(name)
+            self.local_names.append(name.split(':', 1)[-1])
+        return name_id
+
+    def add_node(self, kind, name_id, parent):
+        index = len(self.kinds)
+        self.kinds.append(kind)
+        self.name_ids.append(name_id)
+        self.parents.append(parent)
+        self.first_children.append(NO_NODE)
+        self.next_siblings.append(NO_NODE)
+        self.ends.append(index + 1)
+        self.attr_offsets.append(len(self.attr_name_ids))
+        self.text_starts.append(0)
+        self.text_ends.append(0)
+        return index
+
+    def text(self, index):
+        "Text of a text or comment node"
+        text = self.texts.get(index)
+        if text is None:
+            text = self.source[self.text_starts[index]:self.text_ends[index]].decode(self.encoding)
+        return text
+
+    def source_str(self, start, end, parts):
+        "Append the source from start to end with the patches in it to parts"
+        patch_starts = self.patch_starts
+        position = bisect_left(patch_starts, start)
+        while position < len(patch_starts) and patch_starts[position] < end:
+            parts.append(self.source[start:patch_starts[position]].decode(self.encoding))
+            parts.append(self.patch_texts[position])
+            start = self.patch_ends[position]
+            position += 1
+        parts.append(self.source[start:end].decode(self.encoding))
+
+    def element_str(self, index):
+        "The element as unicode() of a BeautifulSoup tag writes it"
+        parts = []
+        self.source_str(self.text_starts[index], self.text_ends[index], parts)
+        return u''.join(parts)
+
+    def contents_str(self, index):
+        "The children of the element as node_contents_str writes them, kept once made"
+        contents = self.contents_strs.get(index)
+        if contents is None:
+            parts = []
+            for child in self.children(index):
+                kind = self.kinds[child]
+                if kind == ELEMENT:
+                    self.source_str(self.text_starts[child], self.text_ends[child], parts)
+                elif kind == TEXT:
+                    parts.append(text_node(self.text(child)))
+                else:
+                    parts.append(self.text(child))
+            contents = self.contents_strs[index] = u''.join(parts)
+        return contents
+
+    def attr_range(self, index):
+        if index + 1 < len(self.attr_offsets):
+            return self.attr_offsets[index], self.attr_offsets[index + 1]
+        return self.attr_offsets[index], len(self.attr_name_ids)
+
+    def get(self, index, key, default=None):
+        name_id = self.name_table.get(key)
+        if name_id is not None:
+            start, end = self.attr_range(index)
+            for position in xrange(start, end):
+                if self.attr_name_ids[position] == name_id:
+                    return self.attr_values[position]
+        return default
+
+    def attrs(self, index):
+        start, end = self.attr_range(index)
+        return dict((self.names[self.attr_name_ids[position]], self.attr_values[position])
+                    for position in xrange(start, end))
+
+    def matching_name_ids(self, nodename):
+        "Ids of the tag names matching a name or list of names by local or qualified name"
+        if isinstance(nodename, basestring):
+            nodename = [nodename]
+        return set(name_id for name_id, name in enumerate(self.names)
+                   if name in nodename or self.local_names[name_id] in nodename)
+
+    def positions(self, name_id):
+        "Indexes of the elements with the tag name id in document order"
+        if self.name_positions is None:
+            self.name_positions = {}
+            for index, kind in enumerate(self.kinds):
+                if kind == ELEMENT:
+                    self.name_positions.setdefault(self.name_ids[index], array('i')).append(index)
+        return self.name_positions.get(name_id, ())
+
+    def elements(self, nodename, start, end):
+        "Indexes of the matching elements from start up to end in document order"
+        if nodename is None:
+            return [index for index in xrange(start, end) if self.kinds[index] == ELEMENT]
+        indexes = []
+        for name_id in self.matching_name_ids(nodename):
+            positions = self.positions(name_id)
+            position = bisect_left(positions, start)
+            while position < len(positions) and positions[position] < end:
+                indexes.append(positions[position])
+                position += 1
+        return sorted(indexes)
+
+    def children(self, index):
+        child = self.first_children[index]
+        while child != NO_NODE:
+            yield child
+            child = self.next_siblings[child]
+
+    def node(self, index):
+        "View of the node, text nodes are strings"
+        kind = self.kinds[index]
+        if kind == ELEMENT:
+            return CompactTag(self, index)
+        if kind == COMMENT:
+            return CompactComment(self.text(index))
+        return text_node(self.text(index))
+
+
+class TreeBuilder(object):
+    "Build a CompactTree from the expat events of the XML"
+
+    def __init__(self, source, encoding=None):
+        self.tree = CompactTree(source, encoding or 'utf-8')
+        self.parser = expat.ParserCreate(encoding)
+        self.parser.ordered_attributes = True
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+        self.parser.CharacterDataHandler = self.data
+        self.parser.CommentHandler = self.comment
+        self.parser.ProcessingInstructionHandler = self.processing_instruction
+        self.parser.StartCdataSectionHandler = self.cdata
+        if encoding is None:
+            self.parser.XmlDeclHandler = self.xml_declaration
+        # open elements with their last child, where their start tag ends
+        # and the number of patches before them
+        self.stack = []
+        self.last_children = []
+        self.start_tag_ends = []
+        self.patch_counts = []
+        self.text_start = None
+        self.text_parts = []
+        self.text_from_source = True
+        # markup which ends where the next event starts
+        self.markup = None
+        self.patches = []
+        self.values = {}
+        self.namespace_depth = None
+
+    def build(self):
+        tree = self.tree
+        self.parser.Parse(tree.source, True)
+        if self.markup is not None:
+            # end tag of the root element
+            position = self.markup[2]
+            if tree.source.startswith('</', position):
+                position = tree.source.index('>', position) + 1
+            self.end_markup(position)
+        self.patches.sort()
+        for start, end, text in self.patches:
+            tree.patch_starts.append(start)
+            tree.patch_ends.append(end)
+            tree.patch_texts.append(text)
+        return tree
+
+    def xml_declaration(self, version, encoding, standalone):
+        if encoding:
+            self.tree.encoding = encoding
+
+    def add_child(self, kind, name_id):
+        tree = self.tree
+        parent = self.stack[-1]
+        index = tree.add_node(kind, name_id, parent)
+        previous = self.last_children[-1]
+        if previous == NO_NODE:
+            tree.first_children[parent] = index
+        else:
+            tree.next_siblings[previous] = index
+        self.last_children[-1] = index
+        return index
+
+    def check_span(self, start, end, text):
+        "Add a patch if the source from start to end is not the text"
+        if isinstance(text, str):
+            # made of ASCII names
+            if self.tree.source[start:end] == text:
+                return
+        else:
+            try:
+                if self.tree.source[start:end] == text.encode(self.tree.encoding):
+                    return
+            except UnicodeEncodeError:
+                pass
+        self.patches.append((start, end, text))
+
+    def end_markup(self, position):
+        "End the markup read before the event at position"
+        if self.markup is None:
+            return
+        kind, index, start = self.markup
+        self.markup = None
+        tree = self.tree
+        if kind == 'start':
+            self.start_tag_ends[-1] = position
+        elif kind == 'end':
+            tree.text_ends[index] = position
+            if tree.first_children[index] == NO_NODE:
+                self.check_span(tree.text_starts[index], position,
+                                tag_start(CompactTag(tree, index))[1] + u'/>')
+            else:
+                self.check_span(start, position, '</' + tree.names[tree.name_ids[index]] + '>')
+        else:
+            # a processing instruction is left out
+            self.patches.append((start, position, u''))
+
+    def end_text(self):
+        "Add the text read since the last tag or comment as one text node"
+        if self.text_start is None:
+            return
+        source = self.tree.source
+        start, end = self.text_start, self.parser.CurrentByteIndex
+        text_from_source = (self.text_from_source and source.find('&', start, end) < 0
+                            and source.find('\r', start, end) < 0)
+        if self.stack:
+            index = self.add_child(TEXT, NO_NODE)
+            if text_from_source:
+                self.tree.text_starts[index] = start
+                self.tree.text_ends[index] = end
+                text = source[start:end]
+                # unless it is escaped or collapsed the text is written as it is
+                if '>' in text or (not text.strip(SPACE_BYTES) and text != '\n' and text != ' '):
+                    self.patches.append((start, end, escape_text(text_node(self.tree.text(index)))))
+            else:
+                text = self.tree.texts[index] = u''.join(self.text_parts)
+                self.patches.append((start, end, escape_text(text_node(text))))
+        self.text_start = None
+        self.text_parts = []
+        self.text_from_source = True
+
+    def start(self, name, attributes):
+        self.end_text()
+        position = self.parser.CurrentByteIndex
+        if self.markup is not None:
+            self.end_markup(position)
+        tree = self.tree
+        name_id = tree.name_id(name)
+        if self.stack:
+            index = self.add_child(ELEMENT, name_id)
+        else:
+            index = tree.add_node(ELEMENT, name_id, NO_NODE)
+        tree.text_starts[index] = position
+        namespaces = False
+        for position in xrange(0, len(attributes), 2):
+            attr_name, value = attributes[position], attributes[position + 1]
+            if attr_name == u'xmlns' or attr_name.startswith(u'xmlns:'):
+                # BeautifulSoup keeps namespace declarations only outside of
+                # an element which already declared some
+                if self.namespace_depth is not None:
+                    continue
+                namespaces = True
+            tree.attr_name_ids.append(tree.name_id(attr_name))
+            tree.attr_values.append(self.values.setdefault(value, value))
+        if namespaces:
+            self.namespace_depth = len(self.stack)
+        self.stack.append(index)
+        self.last_children.append(NO_NODE)
+        self.start_tag_ends.append(None)
+        self.patch_counts.append(len(self.patches))
+        self.markup = ('start', index, tree.text_starts[index])
+
+    def end(self, name):
+        self.end_text()
+        position = self.parser.CurrentByteIndex
+        if self.markup is not None:
+            self.end_markup(position)
+        tree = self.tree
+        index = self.stack.pop()
+        self.last_children.pop()
+        start_tag_end = self.start_tag_ends.pop()
+        patch_count = self.patch_counts.pop()
+        if tree.first_children[index] == NO_NODE:
+            # written as an empty element tag, checked as a whole once it ends
+            del self.patches[patch_count:]
+        elif tree.attr_offsets[index] == tree.attr_offsets[index + 1]:
+            self.check_span(tree.text_starts[index], start_tag_end,
+                            '<' + tree.names[tree.name_ids[index]] + '>')
+        else:
+            self.check_span(tree.text_starts[index], start_tag_end,
+                            tag_start(CompactTag(tree, index))[1] + u'>')
+        if self.namespace_depth == len(self.stack):
+            self.namespace_depth = None
+        tree.ends[index] = len(tree.kinds)
+        self.markup = ('end', index, position)
+
+    def data(self, data):
+        if self.text_start is None:
+            self.text_start = self.parser.CurrentByteIndex
+            if self.markup is not None:
+                self.end_markup(self.text_start)
+        self.text_parts.append(data)
+
+    def comment(self, data):
+        self.end_text()
+        if self.markup is not None:
+            self.end_markup(self.parser.CurrentByteIndex)
+        if self.stack:
+            index = self.add_child(COMMENT, NO_NODE)
+            self.tree.texts[index] = data
+
+    def processing_instruction(self, target, data):
+        # left out of the tree, the text either side of it is one text node
+        if self.text_start is not None:
+            self.text_from_source = False
+        elif self.stack:
+            position = self.parser.CurrentByteIndex
+            if self.markup is not None:
+                self.end_markup(position)
+            self.markup = ('pi', None, position)
+
+    def cdata(self):
+        self.data(u'')
+        self.text_from_source = False
+
+
+def text_node(text):
+    "A text node, whitespace only text is collapsed to one character as BeautifulSoup does"
+    if text.strip(ASCII_SPACES) == u'':
+        text = u'\n' if u'\n' in text else u' '
+    return JATSString(text)
+
+def tag_start(tag):
+    "Qualified name of the tag and its start tag up to the closing > or />"
+    attrs = [name + u'=' + quoted_attribute_value(value)
+             for name, value in sorted(tag.attrs.items())]
+    tag_name = tag.tree.names[tag.tree.name_ids[tag.index]]
+    start = u'<' + tag_name
+    if attrs:
+        start += u' ' + u' '.join(attrs)
+    return tag_name, start
+
+class CompactTag(object):
+    "View of an element with the BeautifulSoup Tag attributes and methods used by the parser"
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def name(self):
+        return self.tree.local_names[self.tree.name_ids[self.index]]
+
+    @property
+    def parent(self):
+        parent = self.tree.parents[self.index]
+        if parent == NO_NODE:
+            return tree_document(self.tree)
+        return CompactTag(self.tree, parent)
+
+    @property
+    def parents(self):
+        parent = self.tree.parents[self.index]
+        while parent != NO_NODE:
+            yield CompactTag(self.tree, parent)
+            parent = self.tree.parents[parent]
+
+    @property
+    def attrs(self):
+        return self.tree.attrs(self.index)
+
+    @property
+    def children(self):
+        return iter(self.contents)
+
+    @property
+    def contents(self):
+        return [self.tree.node(child) for child in self.tree.children(self.index)]
+
+    @property
+    def previous_elements(self):
+        return (CompactTag(self.tree, index)
+                for index in reversed(self.tree.elements(None, 0, self.index)))
+
+    def get(self, key, default=None):
+        return self.tree.get(self.index, key, default)
+
+    def has_attr(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get_text(self):
+        tree = self.tree
+        return u''.join(text_node(tree.text(index)) for index in xrange(self.index + 1, tree.ends[self.index])
+                        if tree.kinds[index] == TEXT)
+
+    text = property(get_text)
+
+    def find_all(self, name=None, **attrs):
+        tags = [CompactTag(self.tree, index)
+                for index in self.tree.elements(name, self.index + 1, self.tree.ends[self.index])]
+        for key, value in attrs.items():
+            tags = filter(lambda tag: tag.get(key) == value, tags)
+        return tags
+
+    def sibling_elements(self, name):
+        parent = self.tree.parents[self.index]
+        if parent == NO_NODE:
+            return []
+        name_ids = self.tree.matching_name_ids(name) if name is not None else None
+        return [index for index in self.tree.children(parent)
+                if self.tree.kinds[index] == ELEMENT
+                and (name_ids is None or self.tree.name_ids[index] in name_ids)]
+
+    def find_next_siblings(self, name=None):
+        return [CompactTag(self.tree, index) for index in self.sibling_elements(name)
+                if index > self.index]
+
+    def find_all_previous(self, name=None):
+        "Matching elements before this one, nearest first"
+        return [CompactTag(self.tree, index)
+                for index in reversed(self.tree.elements(name, 0, self.index))]
+
+    def find_previous_siblings(self, name=None):
+        return [CompactTag(self.tree, index) for index in reversed(self.sibling_elements(name))
+                if index < self.index]
+
+    def __iter__(self):
+        return iter(self.contents)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def __contains__(self, node):
+        return node in self.contents
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactTag) and other.tree is self.tree
+                and other.index == self.index)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __nonzero__(self):
+        "An element is not false for having no children, same as a Tag"
+        return True
+
+    def __unicode__(self):
+        return self.tree.element_str(self.index)
+
+    def __str__(self):
+        return unicode(self).encode('utf8')
+
+    def __repr__(self):
+        return str(self)
+
+
+class CompactComment(unicode):
+    "A comment node"
+    name = None
+
+
+class CompactDocument(object):
+    "The document holding the root element, in the place of the BeautifulSoup object"
+    name = u'[document]'
+    parent = None
+    attrs = {}
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    @property
+    def root(self):
+        return CompactTag(self.tree, 0)
+
+    @property
+    def children(self):
+        return iter([self.root])
+
+    @property
+    def parents(self):
+        return iter([])
+
+    def get(self, key, default=None):
+        return default
+
+    def get_text(self):
+        return self.root.get_text()
+
+    def find_all(self, name=None, **attrs):
+        tags = [CompactTag(self.tree, index)
+                for index in self.tree.elements(name, 0, len(self.tree.kinds))]
+        for key, value in attrs.items():
+            tags = filter(lambda tag: tag.get(key) == value, tags)
+        return tags
+
+    def __eq__(self, other):
+        return isinstance(other, CompactDocument) and other.tree is self.tree
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(id(self.tree))
+
+    def __unicode__(self):
+        return unicode(self.root)
+
+
+def tree_document(tree):
+    "The one CompactDocument of the tree, so values kept on it like a tag index are found from any tag"
+    if tree.document is None:
+        tree.document = CompactDocument(tree)
+    return tree.document
+
+def parse_xml(xml):
+    "Parse the XML string or file into a CompactDocument"
+    if hasattr(xml, 'read'):
+        xml = xml.read()
+    if isinstance(xml, unicode):
+        return tree_document(TreeBuilder(xml.encode('utf8'), 'utf-8').build())
+    return tree_document(TreeBuilder(xml).build())
+
+def is_element(tag):
+    return isinstance(tag, (CompactTag, CompactDocument))
@@ -1,10 +1,37 @@
 import re
+from HTMLParser import HTMLParser
 from bs4 import BeautifulSoup
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution
+from bs4.element import PreformattedString, Comment
+import utils_lxml
+import utils_compact
+from utils import clean_whitespace, tag_start, is_empty_tag, string_str
+
+"""
+xml_to_html converts in a single pass over the string. The string is read once as
+tokens of text, tags, comments and email addresses, each tag is changed the same way
+the replace_* functions would change it, and the tokens are written out the same way
+as BeautifulSoup using html.parser would parse and encode the changed string.
+
+Markup the tokenizer does not handle, for example a comment over more than one line,
+raises UnsupportedMarkup and that string is converted by replace_html_tags instead
+
+nodes_html takes the tokens from the parsed tree instead of a string, giving the
+same tokens as tokenizing the string written out from the tree would
+"""
 
 def xml_to_html(html_flag, xml_string, base_url=None):
     "For formatting json output into HTML friendly format"
     if not xml_string or not html_flag is True:
         return xml_string
+    try:
+        return convert_html(xml_string, base_url)
+    except UnsupportedMarkup:
+        return replace_html_tags(xml_string, base_url)
+
+def replace_html_tags(xml_string, base_url=None):
+    "Convert to HTML by replacing each kind of tag in turn then parsing with BeautifulSoup"
     html_string = xml_string
     html_string = replace_xref_tags(html_string)
     html_string = replace_ext_link_tags(html_string)
@@ -32,6 +59,372 @@ def xml_to_html(html_flag, xml_string, base_url=None):
             html_string = html_string.decode('utf8')
     return html_string
 
+
+class UnsupportedMarkup(Exception):
+    pass
+
+TOKEN_PATTERN = re.compile(
+    r'(?P<comment><!--.*?-->)'
+    r'|(?P<email><email>(?P<address>[^<\n]*)</email>)'
+    r'|(?P<tag></?[a-zA-Z][^<>\n]*>)'
+    r'|(?P<text>[^<]+|<(?=[^a-zA-Z/!?]))')
+
+START_TAG_PATTERN = re.compile(
+    r'<([a-zA-Z][-.a-zA-Z0-9:_]*)(?![^\t\n\r\f />])'
+    r'((?:\s+[^\s/>"\'=]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*)\s*(/?)>$')
+
+ATTRIBUTE_PATTERN = re.compile(r'\s+([^\s/>"\'=]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+END_TAG_PATTERN = re.compile(r'</([a-zA-Z][-.a-zA-Z0-9:_]*)\s*>$')
+
+REFERENCE_PATTERN = re.compile(
+    r'&(?:#(?:([0-9]+)|[xX]([0-9a-fA-F]+))(?=([^0-9a-fA-F]|$))'
+    r'|([a-zA-Z][-.a-zA-Z0-9]*)(?=([^a-zA-Z0-9]|$))'
+    r'|(?=[^a-zA-Z#]))')
+
+# Tags replaced by replace_simple_tags in xml_to_html
+SIMPLE_TAGS = {}
+for from_tag, to_tag, to_open_tag in [
+        ('italic', 'i', None), ('bold', 'b', None),
+        ('underline', 'span', '<span class="underline">'),
+        ('sc', 'span', '<span class="small-caps">'),
+        ('monospace', 'span', '<span class="monospace">'),
+        ('inline-formula', None, None), ('break', 'br', None)]:
+    if to_open_tag:
+        SIMPLE_TAGS['<' + from_tag + '>'] = to_open_tag
+    elif to_tag:
+        SIMPLE_TAGS['<' + from_tag + '>'] = '<' + to_tag + '>'
+        SIMPLE_TAGS['<' + from_tag + '/>'] = '<' + to_tag + '/>'
+    else:
+        SIMPLE_TAGS['<' + from_tag + '>'] = ''
+        SIMPLE_TAGS['<' + from_tag + '/>'] = ''
+    SIMPLE_TAGS['</' + from_tag + '>'] = '</' + to_tag + '>' if to_tag else ''
+
+# Tags replaced everywhere once one of their open tags is replaced
+CLOSE_TAGS = {
+    'xref': {'<xref>': '<a>', '<xref/>': '<a/>', '</xref>': '</a>'},
+    'ext-link': {'<ext-link>': '<a>', '<ext-link/>': '<a/>', '</ext-link>': '</a>'},
+    'named-content': {'<named-content>': '<span>', '<named-content/>': '<span/>',
+                      '</named-content>': '</span>'},
+    }
+
+EMPTY_ELEMENT_TAGS = HTMLTreeBuilder.empty_element_tags
+CDATA_LIST_ATTRIBUTES = HTMLTreeBuilder.cdata_list_attributes
+WHITESPACE_PATTERN = re.compile(r'\s+')
+ASCII_SPACES = u'\x20\x0a\x09\x0c\x0d'
+
+html_parser = HTMLParser()
+
+
+def first_match_group(pattern, tag):
+    "First group of the first match, None when there is no match"
+    match = re.search(pattern, tag)
+    if match:
+        return match.group(1)
+    return None
+
+def convert_tag(tag, base_url, replaced):
+    """
+    Change the tag the same way the replace_* functions do, adding the name of
+    the tag to replaced when its close tags are to be replaced too
+    """
+    for name, new_tag_function in [('xref', xref_tag), ('ext-link', ext_link_tag),
+                                   ('named-content', named_content_tag)]:
+        if tag.startswith('<' + name):
+            new_tag = new_tag_function(tag)
+            if new_tag is not None:
+                replaced.add(name)
+                return new_tag
+            break
+    else:
+        if tag.startswith('<inline-graphic'):
+            new_tag = inline_graphic_tag(tag, base_url)
+            if new_tag is not None:
+                return new_tag
+        elif tag.startswith('<email>'):
+            # an email tag replace_email_tags would match across other tags
+            raise UnsupportedMarkup(tag)
+    if tag.startswith('<mml:'):
+        tag = '<' + tag[5:]
+    elif tag.startswith('</mml:'):
+        tag = '</' + tag[6:]
+    if tag.startswith('<td'):
+        tag = replace_table_style_author_callout(tag)
+    return SIMPLE_TAGS.get(tag, tag)
+
+def xml_tokens(xml_string):
+    "Tokens of the string as (kind, string) pairs, the kind is text, tag, comment or email"
+    position = 0
+    for match in TOKEN_PATTERN.finditer(xml_string):
+        if match.start() != position:
+            raise UnsupportedMarkup(xml_string[position:])
+        position = match.end()
+        yield match.lastgroup, match.group()
+    if position != len(xml_string):
+        raise UnsupportedMarkup(xml_string[position:])
+
+def html_tokens(source_tokens, base_url):
+    """
+    The tokens with the tags changed to HTML, as (tag, html) pairs where the tag
+    of text tokens is None. A token of any kind other than text, tag, comment or
+    email, or one of them over more than one line, raises UnsupportedMarkup
+    """
+    tokens = []
+    converted_tags = {}
+    replaced = set()
+    for kind, value in source_tokens:
+        if kind == 'text':
+            tokens.append((None, value))
+            continue
+        if '\n' in value:
+            # not read as one token from a string
+            raise UnsupportedMarkup(value)
+        if tokens and tokens[-1] == (None, '<'):
+            # a tag removed after a single < would change how the < is read
+            if kind != 'tag' or convert_tag(value, base_url, set()) == '':
+                raise UnsupportedMarkup(value)
+        if kind == 'tag':
+            # The same tags are replaced together, as str.replace in the replace_* functions
+            if value not in converted_tags:
+                converted_tags[value] = convert_tag(value, base_url, replaced)
+            tokens.append((value, converted_tags[value]))
+        elif kind == 'email':
+            address = value[len('<email>'):-len('</email>')]
+            tokens.append(('<email>', '<a href="mailto:' + address + '">'))
+            if address:
+                tokens.append((None, address))
+            tokens.append(('</email>', '</a>'))
+        elif kind == 'comment':
+            if '<' in value[4:]:
+                # a tag in a comment, the replace_* functions would change it
+                raise UnsupportedMarkup(value)
+        else:
+            raise UnsupportedMarkup(value)
+    if replaced:
+        close_tags = {}
+        for name in replaced:
+            close_tags.update(CLOSE_TAGS[name])
+        tokens = [(tag, close_tags.get(tag, html)) for tag, html in tokens]
+    return tokens
+
+def decode_references(text, at_end):
+    """
+    Replace character and entity references in text as html.parser and BeautifulSoup do,
+    at_end is False when a tag follows the text
+    """
+    if '&' not in text:
+        return text
+    parts = []
+    position = 0
+    reference_start = text.find('&')
+    while reference_start >= 0:
+        match = REFERENCE_PATTERN.match(text, reference_start)
+        if not match or (at_end and match.end() == len(text)):
+            # html.parser leaves out the rest of the text
+            raise UnsupportedMarkup(text)
+        parts.append(text[position:reference_start])
+        position = match.end()
+        decimal, hexadecimal, char_end, name, name_end = match.groups()
+        if decimal or hexadecimal:
+            if char_end == ';':
+                position += 1
+            try:
+                parts.append(unichr(int(decimal) if decimal else int(hexadecimal, 16)))
+            except (ValueError, OverflowError):
+                parts.append(u"\N{REPLACEMENT CHARACTER}")
+        elif name:
+            if name_end == ';':
+                position += 1
+            character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+            parts.append(character if character is not None else "&%s;" % name)
+        else:
+            parts.append('&')
+        reference_start = text.find('&', position)
+    parts.append(text[position:])
+    return u''.join(parts)
+
+def start_tag(html):
+    "Name and attributes of a start tag and whether it is also closed"
+    match = START_TAG_PATTERN.match(html)
+    if not match:
+        raise UnsupportedMarkup(html)
+    name = match.group(1).lower()
+    if name in ('script', 'style', 'pre', 'textarea', 'meta'):
+        raise UnsupportedMarkup(html)
+    list_attributes = (CDATA_LIST_ATTRIBUTES['*'] + CDATA_LIST_ATTRIBUTES.get(name, []))
+    attrs = {}
+    for attribute_match in ATTRIBUTE_PATTERN.finditer(match.group(2)):
+        key, value = attribute_match.group(1).lower(), attribute_match.group(2)
+        if value is None:
+            value = attribute_match.group(3)
+        if value:
+            value = html_parser.unescape(value)
+        if key in list_attributes:
+            value = WHITESPACE_PATTERN.sub(' ', value)
+        attrs[key] = value
+    attribute_string = u''.join(
+        u' ' + key + u'=' + EntitySubstitution.quoted_attribute_value(
+            EntitySubstitution.substitute_xml(value))
+        for key, value in sorted(attrs.items()))
+    return name, attribute_string, match.group(3) == '/'
+
+def write_text(text, open_tags, parts):
+    "Write the text node, or one space or new line if it is only spaces"
+    for character in text:
+        if character not in ASCII_SPACES:
+            break
+    else:
+        text = u'\n' if u'\n' in text else u' '
+    write_content(open_tags, parts)
+    parts.append(EntitySubstitution.substitute_xml(text))
+
+def write_content(open_tags, parts):
+    "Before content is added to the current tag, its start tag is written if it was left out"
+    if open_tags and open_tags[-1][2] is not None:
+        parts.append(open_tags[-1][2])
+        open_tags[-1][2] = None
+
+def close_tag(open_tags, parts):
+    name, attribute_string, start = open_tags.pop()
+    if start is not None:
+        # an empty element tag with no content
+        parts.append(u'<' + name + attribute_string + u'/>')
+    else:
+        parts.append(u'</' + name + u'>')
+
+def convert_html(xml_string, base_url=None):
+    "Convert the JATS XML string to HTML in one pass, see the notes above"
+    if not isinstance(xml_string, unicode):
+        try:
+            xml_string.decode('ascii')
+        except UnicodeDecodeError:
+            # BeautifulSoup would guess the encoding
+            raise UnsupportedMarkup(xml_string)
+    return write_html(html_tokens(xml_tokens(xml_string), base_url), xml_string[:0])
+
+def write_html(tokens, empty_string):
+    """
+    Write the HTML tokens out as BeautifulSoup would encode them once parsed,
+    empty_string is the empty string of the type of the XML string
+    """
+    if not any(('<' in html or '>' in html) for tag, html in tokens):
+        return empty_string.join(html for tag, html in tokens)
+
+    parts = []
+    # open tags as [name, attributes, start tag if not written yet]
+    open_tags = []
+    text = []
+    for tag, html in tokens:
+        if tag is None:
+            text.append(html)
+            continue
+        if not html:
+            continue
+        if text:
+            write_text(decode_references(u''.join(text), False), open_tags, parts)
+            text = []
+        if html.startswith('</'):
+            end_match = END_TAG_PATTERN.match(html)
+            if not end_match:
+                raise UnsupportedMarkup(html)
+            name = end_match.group(1).lower()
+            # close the open tags up to the one with the name, or all of them
+            while open_tags:
+                open_name = open_tags[-1][0]
+                close_tag(open_tags, parts)
+                if open_name == name:
+                    break
+        else:
+            name, attribute_string, closed = start_tag(html)
+            write_content(open_tags, parts)
+            if name in EMPTY_ELEMENT_TAGS:
+                open_tags.append([name, attribute_string, u'<' + name + attribute_string + u'>'])
+            else:
+                parts.append(u'<' + name + attribute_string + u'>')
+                open_tags.append([name, attribute_string, None])
+            if closed:
+                close_tag(open_tags, parts)
+    if text:
+        write_text(decode_references(u''.join(text), True), open_tags, parts)
+    while open_tags:
+        close_tag(open_tags, parts)
+    html_string = u''.join(parts)
+    try:
+        return html_string.encode('ascii')
+    except UnicodeEncodeError:
+        return html_string
+
+def node_tokens(node, exclude, tokens):
+    "Add the tokens of the node as unicode(node) would write it to tokens"
+    if node.name is None:
+        if isinstance(node, (Comment, utils_lxml.JATSComment, utils_compact.CompactComment)):
+            tokens.append(('comment', string_str(node)))
+        elif isinstance(node, PreformattedString):
+            tokens.append(('other', string_str(node)))
+        else:
+            tokens.append(('text', string_str(node)))
+        return
+    tag_name, start = tag_start(node)
+    children = [child for child in node.children if not exclude or child.name not in exclude]
+    if is_empty_tag(node, children):
+        tokens.append(('tag', start + u'/>'))
+        return
+    child_tokens = []
+    for child in children:
+        node_tokens(child, exclude, child_tokens)
+    if start == u'<email>' and all(kind == 'text' for kind, value in child_tokens):
+        tokens.append(('email', u'<email>' + u''.join(value for kind, value in child_tokens)
+                       + u'</email>'))
+    else:
+        tokens.append(('tag', start + u'>'))
+        tokens.extend(child_tokens)
+        tokens.append(('tag', u'</' + tag_name + u'>'))
+
+def tree_tokens(nodes, exclude=None):
+    """
+    Tokens of u"".join(map(unicode, nodes)) the same as xml_tokens would read them,
+    with the tags named in exclude left out
+    """
+    tokens = []
+    for node in nodes:
+        if node.name is None:
+            # unicode() of a string is its text as it is, it is read as a string when it has no <
+            text = unicode(node)
+            tokens.append(('text' if '<' not in text else 'other', text))
+        elif not exclude or node.name not in exclude:
+            node_tokens(node, exclude, tokens)
+    return tokens
+
+def clean_tokens(tokens):
+    "The tokens changed the same way clean_whitespace changes their string"
+    tokens = [(kind, value.replace('\n', ' ')) for kind, value in tokens]
+    while tokens and tokens[0][0] == 'text' and not tokens[0][1].lstrip(' '):
+        del tokens[0]
+    if tokens and tokens[0][0] == 'text':
+        tokens[0] = ('text', tokens[0][1].lstrip(' '))
+    while tokens and tokens[-1][0] == 'text' and not tokens[-1][1].rstrip(' '):
+        del tokens[-1]
+    if tokens and tokens[-1][0] == 'text':
+        tokens[-1] = ('text', tokens[-1][1].rstrip(' '))
+    return tokens
+
+def nodes_html(nodes, base_url=None, exclude=None, clean=False):
+    """
+    HTML of the nodes, the same value as xml_to_html(True, xml_string, base_url) where
+    xml_string is u"".join(map(unicode, nodes)) after removing the tags named in exclude,
+    with clean_whitespace applied when clean is True. None when xml_string is empty
+    """
+    tokens = tree_tokens(nodes, exclude)
+    if not any(value for kind, value in tokens):
+        return None
+    try:
+        return write_html(html_tokens(clean_tokens(tokens) if clean else tokens, base_url), u'')
+    except UnsupportedMarkup:
+        xml_string = u''.join(value for kind, value in tokens)
+        if clean:
+            xml_string = clean_whitespace(xml_string)
+        return xml_to_html(True, xml_string, base_url)
+
 def replace_simple_tags(s, from_tag='italic', to_tag='i', to_open_tag=None):
     """
     Replace tags such as <italic> to <i>
@@ -53,24 +446,36 @@ def replace_simple_tags(s, from_tag='italic', to_tag='i', to_open_tag=None):
 
     return s
 
-def replace_xref_tags(s):
-    for tag_match in re.finditer("<(xref.*?)>", s):
-        rid_match = re.finditer('rid="(.*)"', tag_match.group())
-        if rid_match:
-            try:
-                all_rid = rid_match.next().group(1)
-                # Take only the first rid value if separated by spaces
-                rid = all_rid.split(' ')[0]
-                new_tag = '<a href="#' + rid + '">'
-                old_tag = '<' + tag_match.group(1) + '>'
-                s = s.replace(old_tag, new_tag)
-                # Replace all close tags even if one open tag gets replaced
-                s = replace_simple_tags(s, 'xref', 'a')
-            except StopIteration:
-                pass
-            
+def replace_tags(s, pattern, new_tag_function, from_tag=None, to_tag=None):
+    """
+    Replace each match of the pattern with the tag new_tag_function returns for it,
+    leaving it as it is for None. When from_tag is given and any tag was replaced,
+    the other from_tag tags are replaced with to_tag tags
+    """
+    replaced = []
+    def replace_tag(tag_match):
+        new_tag = new_tag_function(tag_match.group())
+        if new_tag is None:
+            return tag_match.group()
+        replaced.append(new_tag)
+        return new_tag
+    s = re.sub(pattern, replace_tag, s)
+    if replaced and from_tag:
+        # Replace all close tags even if one open tag gets replaced
+        s = replace_simple_tags(s, from_tag, to_tag)
     return s
 
+def xref_tag(tag):
+    all_rid = first_match_group('rid="(.*)"', tag)
+    if all_rid is None:
+        return None
+    # Take only the first rid value if separated by spaces
+    rid = all_rid.split(' ')[0]
+    return '<a href="#' + rid + '">'
+
+def replace_xref_tags(s):
+    return replace_tags(s, "<(xref.*?)>", xref_tag, 'xref', 'a')
+
 def replace_mathml_tags(s):
     p = re.compile('<mml:')
     s = p.sub('<', s)
@@ -78,83 +483,63 @@ def replace_mathml_tags(s):
     s = p.sub('</', s)
     return s
 
+def ext_link_tag(tag):
+    xlink = first_match_group('xlink:href="(.*)"', tag)
+    ext_link_type = first_match_group('ext-link-type="(.*)"', tag)
+    if xlink is None or ext_link_type is None:
+        return None
+    if ext_link_type.startswith('uri'):
+        # Compare the start of the unicode string and prepend incomplete URL values
+        if not xlink[0:4] in ['http', 'ftp:']:
+            xlink = 'http://' + xlink
+        return '<a href="' + xlink + '">'
+    elif ext_link_type.startswith('doi'):
+        return '<a href="https://doi.org/' + xlink + '">'
+    return None
+
 def replace_ext_link_tags(s):
-    for tag_match in re.finditer("<(ext-link.*?)>", s):
-        xlink_match = re.finditer('xlink:href="(.*)"', tag_match.group())
-        ext_link_type_match = re.finditer('ext-link-type="(.*)"', tag_match.group())
-        if xlink_match and ext_link_type_match:
-            try:
-                xlink = xlink_match.next().group(1)
-                ext_link_type = ext_link_type_match.next().group(1)
-                if ext_link_type.startswith('uri'):
-                    # Compare the start of the unicode string and prepend incomplete URL values
-                    if not xlink[0:4] in ['http', 'ftp:']:
-                        xlink = 'http://' + xlink
-                    new_tag = '<a href="' + xlink + '">'
-                elif ext_link_type.startswith('doi'):
-                    new_tag = '<a href="https://doi.org/' + xlink + '">'
-                old_tag = '<' + tag_match.group(1) + '>'
-                s = s.replace(old_tag, new_tag)
-                # Replace all close tags even if one open tag gets replaced
-                s = replace_simple_tags(s, 'ext-link', 'a')
-            except StopIteration:
-                pass
-    return s
+    return replace_tags(s, "<(ext-link.*?)>", ext_link_tag, 'ext-link', 'a')
 
 def replace_email_tags(s):
-    for tag_match in re.finditer("<email>(.*?)</email>", s):
-        email = tag_match.group(1)
-        old_tag = '<email>' + email + '</email>'
-        new_tag = '<a href="mailto:' + email + '">' + email + '</a>'
-        s = s.replace(old_tag, new_tag)
-    return s
+    return re.sub("<email>(.*?)</email>",
+                  lambda tag_match: ('<a href="mailto:' + tag_match.group(1) + '">'
+                                     + tag_match.group(1) + '</a>'), s)
 
-def replace_inline_graphic_tags(s, base_url=None):
+def inline_graphic_tag(tag, base_url=None):
     from_file_extension = ['.tif', '.tiff']
     to_file_extension = '.jpg'
-    for tag_match in re.finditer("<(inline-graphic.*?)>", s):
-        xlink_match = re.finditer('xlink:href="(.*)"', tag_match.group())
-        if xlink_match:
-            try:
-                xlink = xlink_match.next().group(1)
-                # Add or change file extension
-                if '.' not in xlink:
-                    xlink = xlink + to_file_extension
-                else:
-                    for extension in from_file_extension:
-                        if xlink.endswith(extension):
-                            xlink = xlink.replace(extension, to_file_extension)
-                # Add base_url if given
-                if base_url:
-                    xlink = base_url + xlink
-                new_tag = '<img src="' + xlink + '"/>'
-                old_tag = '<' + tag_match.group(1) + '>'
-                s = s.replace(old_tag, new_tag)
-            except StopIteration:
-                pass
-    return s
+    xlink = first_match_group('xlink:href="(.*)"', tag)
+    if xlink is None:
+        return None
+    # Add or change file extension
+    if '.' not in xlink:
+        xlink = xlink + to_file_extension
+    else:
+        for extension in from_file_extension:
+            if xlink.endswith(extension):
+                xlink = xlink.replace(extension, to_file_extension)
+    # Add base_url if given
+    if base_url:
+        xlink = base_url + xlink
+    return '<img src="' + xlink + '"/>'
+
+def replace_inline_graphic_tags(s, base_url=None):
+    return replace_tags(s, "<(inline-graphic.*?)>",
+                        lambda tag: inline_graphic_tag(tag, base_url))
+
+def named_content_tag(tag):
+    all_match = first_match_group('content-type="(.*)"', tag)
+    if all_match is None:
+        return None
+    # Take only the first value
+    span_class = all_match.split(' ')[0]
+    return '<span class="' + span_class + '">'
 
 def replace_named_content_tags(s):
-    for tag_match in re.finditer("<(named-content.*?)>", s):
-        content_type_match = re.finditer('content-type="(.*)"', tag_match.group())
-        try:
-            all_match = content_type_match.next().group(1)
-            # Take only the first value
-            span_class = all_match.split(' ')[0]
-            new_tag = '<span class="' + span_class + '">'
-            old_tag = '<' + tag_match.group(1) + '>'
-            s = s.replace(old_tag, new_tag)
-            # Replace all close tags even if one open tag gets replaced
-            s = replace_simple_tags(s, 'named-content', 'span')
-        except StopIteration:
-            pass
-    return s
+    return replace_tags(s, "<(named-content.*?)>", named_content_tag, 'named-content', 'span')
 
 def remove_comment_tags(s):
-    for tag_match in re.finditer("<!--(.*?)-->", s):
-        old_tag = '<!--' + tag_match.group(1) + '-->'
-        s = s.replace(old_tag, '')
-    return s
+    return re.sub("<!--(.*?)-->", '', s)
 
 def replace_table_style_author_callout(s):
     for tag_match in re.finditer('<(td[^>]*style="author-callout-style[^>]*?")/?>', s):
@@ -0,0 +1,324 @@
+import weakref
+from lxml import etree
+
+"""
+utils_lxml.py is an lxml backend for parsing an article. Elements of the tree
+support the part of the BeautifulSoup Tag interface used by rawJATS and the
+utils helpers, so those can run directly on lxml elements. Tag searches use
+the tag filtered lxml iterators, which run in C. As with a Tag, iterating an
+element gives all its child nodes including the text, and its text is all the
+text inside it rather than the text before its first child.
+
+Serialising an element with unicode() gives the same string as BeautifulSoup does.
+
+As the BeautifulSoup object is the parent of the root tag, the JATSDocument is the
+parent of the root element while the document is in use, so values kept on the
+document like a tag index are found from any element.
+"""
+
+# JATSDocument of each root element, by the id of the root element the document holds
+DOCUMENTS = weakref.WeakValueDictionary()
+
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+
+NAMESPACES = {
+    'xml': XML_NAMESPACE,
+    'xlink': 'http://www.w3.org/1999/xlink',
+    'mml': 'http://www.w3.org/1998/Math/MathML',
+    'ali': 'http://www.niso.org/schemas/ali/1.0/'
+}
+
+def tag_names(nodename):
+    "lxml tag filters for a tag name or list of tag names, matching in any namespace"
+    if nodename is None:
+        return [etree.Element]
+    if isinstance(nodename, basestring):
+        nodename = [nodename]
+    return ['{*}' + name for name in nodename]
+
+def elements_before(element, nodename):
+    "Matching elements before the element in document order, which includes its ancestors"
+    tags = []
+    for tag in element.getroottree().getroot().iter(*tag_names(nodename)):
+        if tag is element:
+            break
+        tags.append(tag)
+    return tags
+
+
+def escape_text(value):
+    "Escape text the same way BeautifulSoup does in its minimal formatter"
+    return value.replace(u'&', u'&amp;').replace(u'<', u'&lt;').replace(u'>', u'&gt;')
+
+def quoted_attribute_value(value):
+    value = escape_text(value)
+    quote_with = u'"'
+    if u'"' in value:
+        if u"'" in value:
+            value = value.replace(u'"', u'&quot;')
+        else:
+            quote_with = u"'"
+    return quote_with + value + quote_with
+
+def qualified_name(element, name):
+    "Turn an lxml {namespace}name into prefix:name"
+    if not name.startswith('{'):
+        return name
+    namespace, local_name = name[1:].split('}', 1)
+    if namespace == XML_NAMESPACE:
+        return u'xml:' + local_name
+    for prefix, uri in element.nsmap.items():
+        if uri == namespace and prefix:
+            return prefix + u':' + local_name
+    return local_name
+
+def clark_name(element, name):
+    "Turn a prefix:name into the lxml {namespace}name"
+    if ':' not in name:
+        return name
+    prefix, local_name = name.split(':', 1)
+    namespace = element.nsmap.get(prefix) or NAMESPACES.get(prefix)
+    if namespace is None:
+        return name
+    return '{%s}%s' % (namespace, local_name)
+
+ASCII_SPACES = u'\x20\x0a\x09\x0c\x0d'
+
+# the text of an element before its first child, JATSElement.text is the whole text
+leading_text = etree.ElementBase.text.__get__
+# the child elements, iterating a JATSElement gives all the child nodes
+child_elements = etree.ElementBase.__iter__
+
+def text_node(text):
+    "A text node, whitespace only text is collapsed to one character as BeautifulSoup does"
+    if text.strip(ASCII_SPACES) == u'':
+        text = u'\n' if u'\n' in text else u' '
+    return JATSString(text)
+
+def contents(element):
+    """
+    Child nodes of the element the way BeautifulSoup keeps them: text and tail text
+    as text nodes, comments and elements, with processing instructions left out
+    """
+    nodes = []
+    text = [leading_text(element) or u'']
+    for child in child_elements(element):
+        if isinstance(child, (JATSElement, JATSComment)):
+            if u''.join(text):
+                nodes.append(text_node(u''.join(text)))
+            nodes.append(child)
+            text = []
+        text.append(child.tail or u'')
+    if u''.join(text):
+        nodes.append(text_node(u''.join(text)))
+    return nodes
+
+def tag_start(element):
+    "Qualified name of the element and its start tag up to the closing > or />"
+    attrs = [name + u'=' + quoted_attribute_value(value)
+             for name, value in sorted(element.attrs.items())]
+    tag_name = qualified_name(element, element.tag)
+    start = u'<' + tag_name
+    if attrs:
+        start += u' ' + u' '.join(attrs)
+    return tag_name, start
+
+def serialize(element, parts):
+    "Append the BeautifulSoup style serialisation of the node to parts"
+    if isinstance(element, JATSString):
+        parts.append(escape_text(element))
+        return
+    if isinstance(element, JATSComment):
+        parts.append(u'<!--' + (element.text or u'') + u'-->')
+        return
+    tag_name, start = tag_start(element)
+    child_nodes = contents(element)
+    if child_nodes:
+        parts.append(start + u'>')
+        for node in child_nodes:
+            serialize(node, parts)
+        parts.append(u'</' + tag_name + u'>')
+    else:
+        parts.append(start + u'/>')
+
+def text_parts(element, parts):
+    for node in contents(element):
+        if isinstance(node, JATSString):
+            parts.append(node)
+        elif isinstance(node, JATSElement):
+            text_parts(node, parts)
+
+
+class JATSElement(etree.ElementBase):
+    "An lxml element with the BeautifulSoup Tag attributes and methods used by the parser"
+
+    @property
+    def name(self):
+        return etree.QName(self).localname
+
+    @property
+    def parent(self):
+        parent = self.getparent()
+        if parent is None:
+            # the root element held by a document is kept, so its id is not reused
+            return DOCUMENTS.get(id(self))
+        return parent
+
+    @property
+    def parents(self):
+        return self.iterancestors()
+
+    @property
+    def attrs(self):
+        "Attributes keyed by qualified name, including namespaces declared on this element"
+        attrs = {}
+        parent = self.getparent()
+        parent_nsmap = parent.nsmap if parent is not None else {}
+        for prefix, namespace in self.nsmap.items():
+            if parent_nsmap.get(prefix) != namespace:
+                attrs[u'xmlns:' + prefix if prefix else u'xmlns'] = namespace
+        for name, value in self.attrib.items():
+            attrs[qualified_name(self, name)] = value
+        return attrs
+
+    @property
+    def children(self):
+        return iter(contents(self))
+
+    @property
+    def contents(self):
+        return contents(self)
+
+    def __iter__(self):
+        "The child nodes including the text, the same as a Tag"
+        return iter(contents(self))
+
+    def __len__(self):
+        return len(contents(self))
+
+    @property
+    def previous_elements(self):
+        return reversed(elements_before(self, None))
+
+    def get(self, key, default=None):
+        return super(JATSElement, self).get(clark_name(self, key), default)
+
+    def has_attr(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        if isinstance(key, basestring):
+            value = self.get(key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        return super(JATSElement, self).__getitem__(key)
+
+    def get_text(self):
+        parts = []
+        text_parts(self, parts)
+        return u''.join(parts)
+
+    @property
+    def text(self):
+        "All the text in the element, the same as BeautifulSoup"
+        return self.get_text()
+
+    def find_all(self, name=None, **attrs):
+        tags = list(self.iterdescendants(*tag_names(name)))
+        for key, value in attrs.items():
+            tags = filter(lambda tag: tag.get(key) == value, tags)
+        return tags
+
+    def find_next_siblings(self, name=None):
+        return list(self.itersiblings(*tag_names(name)))
+
+    def find_all_previous(self, name=None):
+        "Matching elements before this one, nearest first"
+        return list(reversed(elements_before(self, name)))
+
+    def find_previous_siblings(self, name=None):
+        return list(self.itersiblings(*tag_names(name), preceding=True))
+
+    def __nonzero__(self):
+        "An element is not false for having no children, same as a Tag"
+        return True
+
+    def __unicode__(self):
+        parts = []
+        serialize(self, parts)
+        return u''.join(parts)
+
+    def __str__(self):
+        return unicode(self).encode('utf8')
+
+
+class JATSComment(etree.CommentBase):
+    name = None
+
+    def __nonzero__(self):
+        return True
+
+    def __unicode__(self):
+        return self.text or u''
+
+
+class JATSProcessingInstruction(etree.PIBase):
+    name = None
+
+
+class JATSString(unicode):
+    "A text node"
+    name = None
+
+
+class JATSDocument(object):
+    "The document holding the root element, in the place of the BeautifulSoup object"
+    name = u'[document]'
+    parent = None
+    attrs = {}
+
+    def __init__(self, root):
+        self.root = root
+        DOCUMENTS[id(root)] = self
+
+    @property
+    def children(self):
+        return iter([self.root])
+
+    @property
+    def parents(self):
+        return iter([])
+
+    def get(self, key, default=None):
+        return default
+
+    def get_text(self):
+        return self.root.get_text()
+
+    def find_all(self, name=None, **attrs):
+        tags = list(self.root.iter(*tag_names(name)))
+        for key, value in attrs.items():
+            tags = filter(lambda tag: tag.get(key) == value, tags)
+        return tags
+
+    def __unicode__(self):
+        return unicode(self.root)
+
+
+def xml_parser(encoding=None):
+    parser = etree.XMLParser(recover=True, strip_cdata=False, encoding=encoding)
+    parser.set_element_class_lookup(etree.ElementDefaultClassLookup(
+        element=JATSElement, comment=JATSComment, pi=JATSProcessingInstruction))
+    return parser
+
+def parse_xml(xml):
+    "Parse the XML string or file into a JATSDocument"
+    if hasattr(xml, 'read'):
+        xml = xml.read()
+    if isinstance(xml, unicode):
+        return JATSDocument(etree.fromstring(xml.encode('utf8'), xml_parser('utf8')))
+    return JATSDocument(etree.fromstring(xml, xml_parser()))
+
+def is_element(tag):
+    return isinstance(tag, (JATSElement, JATSDocument))
@@ -1,14 +1,28 @@
 import xml
+import threading
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 from xml.etree import ElementTree
 from xml.etree.ElementTree import Element, SubElement
 from xml.dom import minidom
+from StringIO import StringIO
 
 """
 xmlio can do input and output of XML, allowing it to be edited using ElementTree library
 """
 
+XMLNS = [("mml", "http://www.w3.org/1998/Math/MathML"),
+         ("xlink", "http://www.w3.org/1999/xlink"),
+         ("ali", "http://www.niso.org/schemas/ali/1.0/")]
+
+XMLNS_LOCK = threading.Lock()
+
 class CustomXMLParser(ElementTree.XMLParser):
-    doctype_dict = {}
+    def __init__(self, *args, **kwargs):
+        ElementTree.XMLParser.__init__(self, *args, **kwargs)
+        # the doctype details of the document parsed by this parser
+        self.doctype_dict = {}
+
     def doctype(self, name, pubid, system):
         self.doctype_dict["name"] = name
         self.doctype_dict["pubid"] = pubid
@@ -16,11 +30,14 @@ class CustomXMLParser(ElementTree.XMLParser):
 
 def register_xmlns():
     """
-    Register namespaces globally
+    Register namespaces globally. The ElementTree namespace map is only changed
+    for a namespace not registered yet, so it can be called from many threads
+    while others are writing XML
     """
-    ElementTree.register_namespace("mml","http://www.w3.org/1998/Math/MathML")
-    ElementTree.register_namespace("xlink","http://www.w3.org/1999/xlink")
-    ElementTree.register_namespace("ali","http://www.niso.org/schemas/ali/1.0/")
+    with XMLNS_LOCK:
+        for prefix, uri in XMLNS:
+            if ElementTree._namespace_map.get(uri) != prefix:
+                ElementTree.register_namespace(prefix, uri)
 
 def parse(filename, return_doctype_dict=False):
     """
@@ -37,6 +54,21 @@ def parse(filename, return_doctype_dict=False):
     else:
         return root
 
+def parse_many(filenames, return_doctype_dict=False, workers=None):
+    """
+    parse the files in a pool of threads, by default one for each CPU, and return
+    the results of parse for the files in the same order
+    """
+    filenames = list(filenames)
+    if not filenames:
+        return []
+    pool = ThreadPool(min(workers or cpu_count(), len(filenames)))
+    try:
+        return pool.map(lambda filename: parse(filename, return_doctype_dict), filenames)
+    finally:
+        pool.close()
+        pool.join()
+
 def add_tag_before(tag_name, tag_text, parent_tag, before_tag_name):
     """
     Helper function to refactor the adding of new tags
@@ -66,31 +98,52 @@ def get_first_element_index(root, tag_name):
     return None
 
 
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+XLINK_HREF_TAGS = set(['graphic', 'media', 'inline-graphic', 'self-uri', 'ext-link'])
+
+def xlink_href_lookup(name_map):
+    """
+    Map of an xlink:href value to its new value, with the names of name_map
+    and the names without their file extension. An exact name is matched first
+    """
+    lookup = {}
+    for k, v in name_map.iteritems():
+        lookup.setdefault(k.split('.')[0], v.split('.')[0])
+    lookup.update(name_map)
+    return lookup
+
 def convert_xlink_href(root, name_map):
-    
-    xpath_list = ['.//graphic', './/media', './/inline-graphic', './/self-uri', './/ext-link']
+    """
+    Rename the xlink:href of asset tags found in name_map, or renamed without
+    the file extension when the value matches a name without its extension.
+    Returns the number of tags renamed
+    """
+    lookup = xlink_href_lookup(name_map)
     count = 0
-    for xpath in xpath_list:
-        for tag in root.findall(xpath):
-            
-            if tag.get('{http://www.w3.org/1999/xlink}href'):
-                
-                for k,v in name_map.iteritems():
-                    # Try to match the exact name first, and if not then
-                    #  try to match it without the file extension
-                    if tag.get('{http://www.w3.org/1999/xlink}href') == k:
-                        tag.set('{http://www.w3.org/1999/xlink}href', v)
-                        count += 1
-                    elif tag.get('{http://www.w3.org/1999/xlink}href') == k.split('.')[0]:
-                        tag.set('{http://www.w3.org/1999/xlink}href', v.split('.')[0])
-                        count += 1
+    for tag in root.iter():
+        if tag.tag in XLINK_HREF_TAGS and tag is not root:
+            href = tag.get(XLINK_HREF)
+            if href and href in lookup:
+                tag.set(XLINK_HREF, lookup[href])
+                count += 1
     return count
 
 
-
-
 def output(root, type='JATS', doctype_dict=None):
+    """
+    XML string of the root element, with the doctype of the doctype details
+    or the default doctype of the type
+    """
+    output_file = StringIO()
+    write(root, output_file, type, doctype_dict)
+    return output_file.getvalue()
+
 
+def write(root, file, type='JATS', doctype_dict=None):
+    """
+    Write the root element to the file-like object, as output returns it
+    """
     if doctype_dict is not None:
         publicId = doctype_dict.get('pubid')
         systemId = doctype_dict.get('system')
@@ -106,24 +159,119 @@ def output(root, type='JATS', doctype_dict=None):
 
     encoding = 'UTF-8'
 
-    namespaceURI = None
-
     doctype = build_doctype(qualifiedName, publicId, systemId)
 
-    return output_root(root, doctype, encoding)
+    write_root(root, doctype, encoding, file)
 
 
 def output_root(root, doctype, encoding):
-    rough_string = ElementTree.tostring(root, encoding)
+    output_file = StringIO()
+    write_root(root, doctype, encoding, output_file)
+    return output_file.getvalue()
 
-    reparsed = minidom.parseString(rough_string)
+
+def write_root(root, doctype, encoding, file):
+    """
+    Stream the XML declaration, the doctype and the root element to the file.
+    The bytes are the same as serializing with ElementTree, parsing that again
+    with minidom to add the doctype and serializing with minidom toxml
+    """
+    writer = XMLWriter(file, encoding)
+    writer.write(u'<?xml version="1.0" encoding="%s"?>' % encoding)
     if doctype:
-        reparsed.insertBefore(doctype, reparsed.documentElement)
+        doctype.writexml(writer)
+    qnames, namespaces = ElementTree._namespaces(root, "utf-8")
+    qnames = dict((key, value.decode("utf-8") if value else value) for key, value in qnames.items())
+    write_element(writer, root, qnames, namespaces)
+    writer.flush()
+
+
+class XMLWriter(object):
+    "Collects unicode strings and writes them to the file encoded, in chunks"
+
+    def __init__(self, file, encoding, chunk_size=4096):
+        self.file = file
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.parts = []
+
+    def write(self, string):
+        self.parts.append(string)
+        if len(self.parts) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.file.write(u"".join(self.parts).encode(self.encoding))
+            self.parts = []
+
+
+def write_element(writer, element, qnames, namespaces=None):
+    """
+    Write the element as minidom writes it after parsing the ElementTree output.
+    Text is written like the parser reads it, with line ends normalised, and
+    whitespace other than a newline in attribute values becomes a space.
+    The tail of the element is written by its parent
+    """
+    tag = element.tag
+    if tag is ElementTree.Comment:
+        writer.write(u"<!--%s-->" % normalise_text(element.text))
+        return
+    if tag is ElementTree.ProcessingInstruction:
+        target_data = normalise_text(element.text).split(None, 1)
+        writer.write(u"<?%s %s?>" % (target_data[0], target_data[1] if len(target_data) > 1 else u""))
+        return
+    tag = qnames[tag]
+    if tag is not None:
+        attributes = []
+        if namespaces:
+            for uri, prefix in namespaces.items():
+                attributes.append((u"xmlns:" + prefix if prefix else u"xmlns", uri))
+        for key, value in element.items():
+            if isinstance(key, ElementTree.QName):
+                key = key.text
+            if isinstance(value, ElementTree.QName):
+                value = qnames[value.text]
+            attributes.append((qnames[key], value))
+        writer.write(u"<" + tag)
+        for name, value in sorted(attributes):
+            writer.write(u' %s="%s"' % (name, escape_data(normalise_attribute(value))))
+        if not element.text and not len(element):
+            writer.write(u"/>")
+            return
+        writer.write(u">")
+    if element.text:
+        writer.write(escape_data(normalise_text(element.text)))
+    for child in element:
+        write_element(writer, child, qnames)
+        if child.tail:
+            writer.write(escape_data(normalise_text(child.tail)))
+    if tag is not None:
+        writer.write(u"</%s>" % tag)
+
+
+def normalise_text(text):
+    if u"\r" in text:
+        text = text.replace(u"\r\n", u"\n").replace(u"\r", u"\n")
+    return text
+
+
+def normalise_attribute(value):
+    if u"\r" in value or u"\t" in value:
+        value = value.replace(u"\r", u" ").replace(u"\t", u" ")
+    return value
 
-    #reparsed_string =  reparsed.toprettyxml(indent="\t", encoding = encoding)
-    reparsed_string = reparsed.toxml(encoding = encoding)
 
-    return reparsed_string
+def escape_data(text):
+    if u"&" in text:
+        text = text.replace(u"&", u"&amp;")
+    if u"<" in text:
+        text = text.replace(u"<", u"&lt;")
+    if u"\"" in text:
+        text = text.replace(u"\"", u"&quot;")
+    if u">" in text:
+        text = text.replace(u">", u"&gt;")
+    return text
 
 
 def build_doctype(qualifiedName, publicId=None, systemId=None, internalSubset=None):
@@ -13,6 +13,8 @@ setup(name='elifetools',
     description='Tools for using article data in Python.',
     long_description=readme,
     packages=['elifetools'],
+    package_data={'elifetools': ['rewrite-rules/*']},
+    entry_points={'console_scripts': ['elifetools = elifetools.cli:main']},
     license = 'MIT',
     install_requires=install_requires,
     url='https://github.com/elifesciences/elife-tools',